@@ -0,0 +1 @@
+"""Headless benchmarks and synthetic data for the dashboard hot paths"""
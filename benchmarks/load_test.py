@@ -0,0 +1,337 @@
+"""Concurrent-session load test for the Streamlit app.
+
+Run from the repository root:
+
+    python -m benchmarks.load_test --sessions 8 --employees 200 --weeks 26 --uploads 4
+
+Each simulated session is a Streamlit ``AppTest`` of ``performance_dashboard.py``
+on its own thread. All sessions live in one process, so they share the
+server-wide store, caches and ingest queue the way browser sessions on one
+server do. The first ``--weeks`` synthetic reports are preloaded from a batch
+snapshot. During the run, sessions upload ``--uploads`` more reports through
+the sidebar and then browse: they pick employees for the individual journey,
+filter by role and search by name. Every rerun is timed.
+
+The report gives:
+
+* p50, p95 and max latency per kind of rerun;
+* process RSS before and after the sessions, and the growth per session
+  (from ``/proc`` on Linux, otherwise psutil if installed or the peak from
+  ``resource``; skipped where none is available);
+* CPU time against wall time, which shows how much the sessions contend for the CPU.
+
+AppTest keeps its own copy of each session's last page, so the per-session
+RSS is an upper bound.
+
+AppTest can't drive ``st.file_uploader``. Uploads therefore go through a
+stand-in that hands the sidebar uploader a scripted file for one rerun.
+Everything after that is the app's own code: hashing, the ingest queue and
+the commit. AppTest also isn't built for parallel runs: each run installs a
+mock ``Runtime`` and removes it when it ends, which breaks the runs still
+going on other threads. The harness keeps the last mock installed in place.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.runtime import Runtime
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.synthetic_data import generate_reports
+from performance_analytics.batch import ingest_directory
+from performance_analytics.snapshot import compute_aggregates, write_snapshot
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'performance_dashboard.py')
+# Environment variables read by performance_dashboard.py
+SNAPSHOT_DIR_ENV_VAR = 'DASHBOARD_SNAPSHOT_DIR'
+WORKERS_ENV_VAR = 'DASHBOARD_WORKERS'
+UPLOADER_KEY_PREFIX = 'new_upload_'
+UPLOAD_STATE_KEY = '_load_test_upload'
+JOURNEY_LABEL = "🔍 Select Employee for Journey Analysis"
+# Longest wait for an upload to be cleaned and committed
+INGEST_TIMEOUT = 120
+POLL_INTERVAL = 0.25
+
+
+class _ScriptedFile(io.BytesIO):
+    def __init__(self, name, payload):
+        super().__init__(payload)
+        self.name = name
+
+
+def install_upload_stand_in():
+    """Make the sidebar uploader return the file a session left in its state, for one rerun"""
+    original = st.file_uploader
+
+    def file_uploader(label, *args, **kwargs):
+        widget = original(label, *args, **kwargs)
+        pending = st.session_state.get(UPLOAD_STATE_KEY)
+        if pending is None or not str(kwargs.get('key', '')).startswith(UPLOADER_KEY_PREFIX):
+            return widget
+        del st.session_state[UPLOAD_STATE_KEY]
+        return _ScriptedFile(*pending)
+
+    st.file_uploader = file_uploader
+    return original
+
+
+def share_app_test_runtime():
+    """Fall back to the last mock Runtime AppTest installed when a parallel run has just removed it"""
+    original = Runtime.__dict__['instance'], Runtime.__dict__['exists']
+    installed = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            installed[:] = [cls._instance]
+            return cls._instance
+        if installed:
+            return installed[0]
+        return original[0].__func__(cls)
+
+    def exists(cls):
+        return cls._instance is not None or bool(installed)
+
+    Runtime.instance, Runtime.exists = classmethod(instance), classmethod(exists)
+    return original
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where it can't be read"""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return psutil.Process().memory_info().rss
+    try:
+        # Unix only; peak rather than current (KB on Linux/BSD, bytes on macOS)
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _cpu_seconds():
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class SimulatedSession:
+    """One manager's browser session: load, upload, then click around"""
+
+    def __init__(self, number, uploads, steps, seed=0, timeout=300, think_time=0.0):
+        self.number = number
+        self.app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.uploads = uploads
+        self.steps = steps
+        self.think_time = think_time
+        self.rng = random.Random(seed * 1000 + number)
+        self.timings = []
+        self.errors = []
+
+    def _run(self, kind):
+        start = time.perf_counter()
+        try:
+            self.app.run()
+        except Exception as e:
+            self.errors.append(f"{kind}: {type(e).__name__}: {e}")
+        self.timings.append((kind, (time.perf_counter() - start) * 1000))
+        self.errors.extend(f"{kind}: {element.message}" for element in self.app.exception)
+
+    def _upload(self, name, payload):
+        self.app.session_state[UPLOAD_STATE_KEY] = (name, payload)
+        self._run('upload')
+        # The sidebar polls the ingest queue on reruns until the job is done
+        deadline = time.monotonic() + INGEST_TIMEOUT
+        while self.app.session_state['ingest_jobs'] and time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            self._run('ingest_poll')
+
+    def _browse(self):
+        action = self.rng.choice(['journey', 'journey', 'roles', 'search', 'clear_filters'])
+        if action == 'journey':
+            journey = [select for select in self.app.selectbox if select.label == JOURNEY_LABEL]
+            if journey and journey[0].options:
+                # Options read "Name (Role) - N reports"; the value is the Employee_ID in front
+                journey[0].set_value(self.rng.choice(journey[0].options).rsplit(' - ', 1)[0])
+        elif action == 'roles':
+            roles = self.app.multiselect(key='filter_roles')
+            roles.set_value(self.rng.sample(roles.options, self.rng.randint(1, len(roles.options))))
+        elif action == 'search':
+            self.app.text_input(key='filter_employee').input(self.rng.choice('abcdefghijklmnorstyz'))
+        else:
+            self.app.multiselect(key='filter_roles').set_value([])
+            self.app.text_input(key='filter_employee').input('')
+        self._run(action)
+
+    def run(self, start):
+        start.wait()
+        self._run('first_load')
+        for name, payload in self.uploads:
+            self._upload(name, payload)
+        for _ in range(self.steps):
+            if self.think_time:
+                time.sleep(self.rng.uniform(0, 2 * self.think_time))
+            self._browse()
+
+
+def preload_snapshot(reports, directory):
+    """Batch-build a snapshot of ``reports`` for the app to open on"""
+    input_dir = os.path.join(directory, 'reports')
+    os.makedirs(input_dir)
+    paths = []
+    for week, text in enumerate(reports, start=1):
+        paths.append(os.path.join(input_dir, f"week_{week:03d}.csv"))
+        with open(paths[-1], 'w', encoding='utf-8') as handle:
+            handle.write(text)
+
+    store, sources, hashes, *_ = ingest_directory(paths, workers=1)
+    snapshot_dir = os.path.join(directory, 'snapshot')
+    write_snapshot(store, snapshot_dir, compute_aggregates(store), sources, hashes)
+    return snapshot_dir
+
+
+def latency_table(timings):
+    """p50 / p95 / max rerun latency in ms per kind of rerun, plus all reruns together"""
+    frame = pd.DataFrame(timings, columns=['rerun', 'ms'])
+    groups = list(frame.groupby('rerun', sort=False)) + [('all', frame)]
+    return pd.DataFrame([{'rerun': kind, 'count': len(group), 'p50_ms': np.percentile(group['ms'], 50),
+                          'p95_ms': np.percentile(group['ms'], 95), 'max_ms': group['ms'].max()}
+                         for kind, group in groups])
+
+
+def _restore_environ(saved):
+    for name, value in saved.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+
+def run_load_test(sessions=4, employees=100, weeks=12, uploads=2, steps=10, seed=0, timeout=300,
+                  think_time=0.0, workers=0):
+    """Drive ``sessions`` concurrent sessions and measure them; returns a results dict.
+
+    The preloaded snapshot lives in a temporary directory, and the
+    environment variables set for the app are put back afterwards.
+    """
+    reports = generate_reports(employees, weeks + uploads, seed)
+    saved_environ = {name: os.environ.get(name) for name in (SNAPSHOT_DIR_ENV_VAR, WORKERS_ENV_VAR)}
+    with tempfile.TemporaryDirectory(prefix='dashboard-load-') as work_dir:
+        try:
+            if weeks:
+                os.environ[SNAPSHOT_DIR_ENV_VAR] = preload_snapshot(reports[:weeks], work_dir)
+            if workers:
+                os.environ[WORKERS_ENV_VAR] = str(workers)
+            simulated, rss_before, rss_after, cpu, wall = _run_sessions(reports[weeks:], sessions, steps, seed,
+                                                                        timeout, think_time)
+        finally:
+            _restore_environ(saved_environ)
+
+    timings = [timing for session in simulated for timing in session.timings]
+    return {
+        'params': {'sessions': sessions, 'employees': employees, 'weeks': weeks, 'uploads': uploads,
+                   'steps': steps, 'seed': seed, 'think_time': think_time},
+        'latency': latency_table(timings).to_dict('records'),
+        'rss_before_mb': rss_before / 2 ** 20 if rss_before is not None else None,
+        'rss_after_mb': rss_after / 2 ** 20 if rss_after is not None else None,
+        'rss_per_session_mb': (rss_after - rss_before) / 2 ** 20 / sessions if rss_after is not None else None,
+        'wall_seconds': wall,
+        'cpu_seconds': cpu,
+        'cores_busy': cpu / wall if wall else 0.0,
+        'errors': [error for session in simulated for error in session.errors],
+    }
+
+
+def _run_sessions(upload_reports, sessions, steps, seed, timeout, think_time):
+    # Uploads go round-robin to the sessions
+    extra = [(f"upload_{week:03d}.csv", text.encode('utf-8')) for week, text in enumerate(upload_reports, start=1)]
+    session_uploads = [extra[number::sessions] for number in range(sessions)]
+
+    original_uploader = install_upload_stand_in()
+    original_runtime = share_app_test_runtime()
+    try:
+        # Imports, the shared store and first-time caches are not part of any session's cost
+        AppTest.from_file(APP_PATH, default_timeout=timeout).run()
+
+        simulated = [SimulatedSession(number, session_uploads[number], steps, seed, timeout, think_time)
+                     for number in range(sessions)]
+        start = threading.Barrier(sessions + 1)
+        threads = [threading.Thread(target=session.run, args=(start,), name=f"session-{session.number}")
+                   for session in simulated]
+        for thread in threads:
+            thread.start()
+
+        rss_before = rss_bytes()
+        cpu_before = _cpu_seconds()
+        wall_start = time.perf_counter()
+        start.wait()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - wall_start
+        cpu = _cpu_seconds() - cpu_before
+        rss_after = rss_bytes()
+    finally:
+        st.file_uploader = original_uploader
+        Runtime.instance, Runtime.exists = original_runtime
+    return simulated, rss_before, rss_after, cpu, wall
+
+
+def print_report(results):
+    params = results['params']
+    print(f"Sessions: {params['sessions']}  employees: {params['employees']}  preloaded weeks: {params['weeks']}  "
+          f"uploads: {params['uploads']}  browse steps per session: {params['steps']}")
+    print(f"{'rerun':<16}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'max ms':>12}")
+    for row in results['latency']:
+        print(f"{row['rerun']:<16}{row['count']:>8}{row['p50_ms']:>12.1f}{row['p95_ms']:>12.1f}{row['max_ms']:>12.1f}")
+    if results['rss_after_mb'] is None:
+        print("RSS: not available on this platform (install psutil to measure it)")
+    else:
+        print(f"RSS: {results['rss_before_mb']:.0f} MB before sessions, {results['rss_after_mb']:.0f} MB after "
+              f"({results['rss_per_session_mb']:+.1f} MB per session)")
+    print(f"CPU: {results['cpu_seconds']:.1f}s over {results['wall_seconds']:.1f}s wall "
+          f"({results['cores_busy']:.2f} of {os.cpu_count()} cores busy)")
+    for error in results['errors']:
+        print(f"Error: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the dashboard with concurrent simulated sessions")
+    parser.add_argument('--sessions', type=int, default=4)
+    parser.add_argument('--employees', type=int, default=100)
+    parser.add_argument('--weeks', type=int, default=12, help="Reports preloaded before the sessions start")
+    parser.add_argument('--uploads', type=int, default=2, help="Reports uploaded by the sessions during the run")
+    parser.add_argument('--steps', type=int, default=10, help="Browsing reruns per session after its uploads")
+    parser.add_argument('--think-time', type=float, default=0.0, help="Mean pause between browsing reruns (s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=300, help="Longest a single rerun may take (s)")
+    parser.add_argument('--workers', type=int, default=0, help="DASHBOARD_WORKERS for the app's process pool")
+    parser.add_argument('--json', default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run_load_test(args.sessions, args.employees, args.weeks, args.uploads, args.steps, args.seed,
+                            args.timeout, args.think_time, args.workers)
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+    return 1 if results['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""Headless benchmark suite for the dashboard's hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --employees 200 --weeks 26
+
+Every run is appended to a JSON-lines history file and compared with the
+previous run that used the same parameters, so regressions show up as a
+percentage change per phase.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_reports
+from performance_analytics import (ROLES, PerformanceStore, calculate_enhanced_metrics, heatmap_matrix,
+                                   long_term_rankings)
+from performance_analytics.parallel import ProcessPoolRunner, parallel_heatmap_and_rankings
+from performance_analytics.query import RowIndex
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.jsonl')
+
+
+def _timed(timings, phase, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    timings.setdefault(phase, []).append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def run_once(reports, timings, runner=None):
+    """Push every report through the analytics pipeline, timing each phase"""
+    store = PerformanceStore()
+
+    raw_frames = [_timed(timings, 'read_csv', pd.read_csv, io.StringIO(text)) for text in reports]
+
+    clean_ms = 0.0
+    timeline_ms = 0.0
+    for raw in raw_frames:
+        start = time.perf_counter()
+        cleaned = store.clean(raw)
+        clean_ms += (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        store.add_report(cleaned)
+        timeline_ms += (time.perf_counter() - start) * 1000
+
+    timings.setdefault('clean_data', []).append(clean_ms)
+    timings.setdefault('add_data_to_timeline', []).append(timeline_ms)
+
+    consolidated = _timed(timings, 'get_consolidated_data', store.consolidated)
+    _timed(timings, 'calculate_enhanced_metrics', calculate_enhanced_metrics, consolidated)
+
+    start = time.perf_counter()
+    for role in ROLES:
+        calculate_enhanced_metrics(consolidated, role)
+    timings.setdefault('calculate_enhanced_metrics[per_role]', []).append((time.perf_counter() - start) * 1000)
+
+    _timed(timings, 'heatmap_matrix', heatmap_matrix, consolidated)
+    _timed(timings, 'rankings', long_term_rankings, consolidated, store.employee_timeline)
+
+    # Last four weeks of one role, the kind of slice the sidebar filters ask for
+    index = _timed(timings, 'row_index', RowIndex, consolidated)
+    recent_designers = {'start': consolidated['Week Start Date'].max() - pd.Timedelta(weeks=4), 'roles': ['Designer']}
+    _timed(timings, 'filtered_rows', lambda: consolidated.take(index.rows(recent_designers)))
+
+    if runner is not None:
+        _timed(timings, f'heatmap+rankings[{runner.workers} workers]', parallel_heatmap_and_rankings,
+               runner, consolidated, index.by_employee, store.employee_timeline)
+
+    return len(consolidated)
+
+
+def summarize(timings):
+    return {
+        phase: {
+            'median_ms': statistics.median(values),
+            'min_ms': min(values),
+            'max_ms': max(values),
+        }
+        for phase, values in timings.items()
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def find_baseline(history, params):
+    """Most recent earlier run with identical parameters"""
+    for entry in reversed(history):
+        if entry.get('params') == params:
+            return entry
+    return None
+
+
+def compare(results, baseline, threshold):
+    """Per-phase comparison rows against the baseline run"""
+    rows = []
+    for phase, stats in results.items():
+        row = {'phase': phase, 'median_ms': stats['median_ms'], 'baseline_ms': None,
+               'change_pct': None, 'status': 'new'}
+        if baseline and phase in baseline['results']:
+            previous = baseline['results'][phase]['median_ms']
+            change = ((stats['median_ms'] - previous) / previous * 100) if previous > 0 else 0.0
+            row.update(baseline_ms=previous, change_pct=change)
+            if change > threshold:
+                row['status'] = 'REGRESSION'
+            elif change < -threshold:
+                row['status'] = 'improved'
+            else:
+                row['status'] = 'ok'
+        rows.append(row)
+    return rows
+
+
+def print_report(rows, params, baseline):
+    print(f"\nDashboard benchmarks ({params['employees']} employees x {params['weeks']} weeks, "
+          f"{params['repeat']} repeats)")
+    if baseline:
+        print(f"Baseline: {baseline['timestamp']} ({baseline.get('revision') or 'unknown revision'})")
+    print(f"{'phase':<40}{'median ms':>12}{'baseline':>12}{'change':>10}  status")
+    for row in rows:
+        baseline_text = f"{row['baseline_ms']:.2f}" if row['baseline_ms'] is not None else '-'
+        change_text = f"{row['change_pct']:+.1f}%" if row['change_pct'] is not None else '-'
+        print(f"{row['phase']:<40}{row['median_ms']:>12.2f}{baseline_text:>12}{change_text:>10}  {row['status']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard hot paths headlessly")
+    parser.add_argument('--employees', type=int, default=100)
+    parser.add_argument('--weeks', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Also time heatmap and rankings on a process pool of this many workers")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="JSON-lines file of previous runs")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Percent slowdown against the baseline that counts as a regression")
+    parser.add_argument('--label', default='', help="Free-text note stored with this run")
+    parser.add_argument('--no-save', action='store_true', help="Do not append this run to the history")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+
+    params = {'employees': args.employees, 'weeks': args.weeks, 'repeat': args.repeat, 'seed': args.seed}
+    runner = ProcessPoolRunner(args.workers, min_rows=0) if args.workers > 1 else None
+    reports = generate_reports(args.employees, args.weeks, args.seed)
+    timings = {}
+    rows_processed = 0
+    for _ in range(args.repeat):
+        rows_processed = run_once(reports, timings, runner)
+    if runner is not None:
+        runner.shutdown()
+
+    results = summarize(timings)
+    history = load_history(args.history)
+    baseline = find_baseline(history, params)
+    rows = compare(results, baseline, args.threshold)
+    print_report(rows, params, baseline)
+
+    if not args.no_save:
+        entry = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': _git_revision(),
+            'label': args.label,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'params': params,
+            'rows': rows_processed,
+            'results': results,
+        }
+        with open(args.history, 'a', encoding='utf-8') as handle:
+            handle.write(json.dumps(entry) + '\n')
+
+    if args.fail_on_regression and any(row['status'] == 'REGRESSION' for row in rows):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
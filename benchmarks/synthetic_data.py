@@ -0,0 +1,234 @@
+"""Synthetic weekly performance reports shaped like the real form export.
+
+Each report is a CSV with the long survey-question headers from
+``ContinuousPerformanceDashboard.column_mapping``: one section per role,
+repeated questions included, and only the respondent's own section filled.
+"""
+import csv
+import io
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+ROLES = ['Video Editor', 'Designer', 'Account Manager', 'Filmmaker', 'Team Leader']
+ROLE_WEIGHTS = [0.3, 0.25, 0.2, 0.15, 0.1]
+
+BASE_HEADERS = ['Timestamp', 'Name', 'Role', 'Week Start Date', 'Week End Date']
+
+# Form sections in the order the survey presents them
+ROLE_SECTIONS = {
+    'Video Editor': [
+        'How many videos did you create this week?',
+        'Which clients did you work for this week?',
+        'Did you face any problems this week?',
+        'Overall productivity this week',
+    ],
+    'Designer': [
+        'How many designs did you create this week?',
+        'What types of designs did you make?',
+        'Which clients did you work for this week?',
+        'Did you face any problems this week?',
+        'Overall productivity this week',
+    ],
+    'Account Manager': [
+        'How many scripts did you produce this week?',
+        'How many posts were published this week?',
+        'How many client meetings did you attend this week?',
+        'Main takeaway from this week\'s client meetings',
+        'Did you face any problems this week?',
+        'Overall productivity this week',
+    ],
+    'Filmmaker': [
+        'How many projects did you work on this week?',
+        'How many clients did you work with this week?',
+        'Who were the clients?',
+        'Did you face any problems this week?',
+        'Overall productivity this week',
+    ],
+    'Team Leader': [
+        'How many client meetings did you have this week?',
+        'Review of this week overall',
+        'Did you face any problems this week?',
+        'Overall productivity this week',
+    ],
+}
+
+TRAILING_HEADERS = ['Any other comments?']
+
+# Mean weekly output of each role's count questions
+OUTPUT_RATES = {
+    'How many videos did you create this week?': 6,
+    'How many designs did you create this week?': 9,
+    'How many scripts did you produce this week?': 4,
+    'How many posts were published this week?': 7,
+    'How many client meetings did you attend this week?': 3,
+    'How many projects did you work on this week?': 2,
+    'How many clients did you work with this week?': 3,
+    'How many client meetings did you have this week?': 4,
+}
+
+FIRST_NAMES = ['Amine', 'Sara', 'Youssef', 'Lina', 'Omar', 'Nadia', 'Karim', 'Salma', 'Mehdi', 'Imane',
+               'Hamza', 'Yasmine', 'Adam', 'Rania', 'Zakaria', 'Hiba', 'Ilyas', 'Meryem', 'Anas', 'Kenza']
+LAST_NAMES = ['Alaoui', 'Benali', 'Chraibi', 'Idrissi', 'El Amrani', 'Fassi', 'Tazi', 'Berrada',
+              'Lahlou', 'Ouazzani', 'Sefrioui', 'Bennani', 'Kettani', 'Naciri', 'Squalli']
+CLIENTS = ['Atlas Foods', 'Marina Hotels', 'Nova Telecom', 'Sahara Motors', 'Cedar Bank', 'Orion Fitness',
+           'Blue Coast', 'Medina Crafts', 'Vertex Labs', 'Palm Realty', 'Zenith Air', 'Argan Beauty']
+DESIGN_TYPES = ['Social posts', 'Stories', 'Banners', 'Logos', 'Carousels', 'Print flyers', 'Thumbnails']
+PROBLEMS = [
+    'Client sent feedback late and the deadline slipped',
+    'Too many revision rounds on the same video',
+    'Rendering machine kept crashing during exports',
+    'Brief was unclear, had to redo the first draft',
+    'Waiting on assets from the client for three days',
+    'Internet outage on Tuesday slowed uploads',
+    'Scheduling conflict between two shoots',
+    'Approval process took longer than expected',
+]
+NO_PROBLEM_ANSWERS = ['No', 'None', 'N/A', '', 'no']
+TAKEAWAYS = ['Client wants more short-form content', 'Budget approved for next quarter',
+             'Need faster turnaround on revisions', 'Positive feedback on last campaign']
+REVIEWS = ['Solid week, team hit most deadlines', 'Busy week with a few delays',
+           'Good collaboration across roles', 'Need to rebalance workload next week']
+COMMENTS = ['', '', '', 'Looking forward to the next campaign', 'Would like more training on motion design',
+            'Team lunch was great']
+
+
+def form_headers():
+    """Full header row, including the repeated per-section questions"""
+    headers = list(BASE_HEADERS)
+    for role in ROLES:
+        headers.extend(ROLE_SECTIONS[role])
+    headers.extend(TRAILING_HEADERS)
+    return headers
+
+
+def _section_offsets():
+    offsets = {}
+    position = len(BASE_HEADERS)
+    for role in ROLES:
+        offsets[role] = position
+        position += len(ROLE_SECTIONS[role])
+    return offsets
+
+
+def build_roster(n_employees, seed=0):
+    """Employees with a role, a productivity baseline and an attendance rate"""
+    rng = np.random.default_rng(seed)
+    roster = []
+    used_names = set()
+
+    for i in range(n_employees):
+        name = f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]}"
+        if name in used_names:
+            name = f"{name} {i}"
+        used_names.add(name)
+
+        roster.append({
+            'name': name,
+            'role': ROLES[rng.choice(len(ROLES), p=ROLE_WEIGHTS)],
+            'base_productivity': float(rng.uniform(2.5, 4.8)),
+            'output_scale': float(rng.uniform(0.6, 1.4)),
+            'trend': float(rng.normal(0, 0.02)),
+            'attendance': float(rng.uniform(0.85, 1.0)),
+            'clients': list(rng.choice(CLIENTS, size=3, replace=False)),
+        })
+
+    return roster
+
+
+def _answer(question, employee, week_index, rng):
+    if question in OUTPUT_RATES:
+        rate = OUTPUT_RATES[question] * employee['output_scale'] * (1 + employee['trend'] * week_index)
+        return str(int(rng.poisson(max(rate, 0.1))))
+    if question == 'Overall productivity this week':
+        score = employee['base_productivity'] + employee['trend'] * week_index * 5 + rng.normal(0, 0.6)
+        return str(int(np.clip(round(score), 1, 5)))
+    if question == 'Did you face any problems this week?':
+        if rng.random() < 0.35:
+            return str(rng.choice(PROBLEMS))
+        return str(rng.choice(NO_PROBLEM_ANSWERS))
+    if question in ('Which clients did you work for this week?', 'Who were the clients?'):
+        count = int(rng.integers(1, len(employee['clients']) + 1))
+        return ', '.join(employee['clients'][:count])
+    if question == 'What types of designs did you make?':
+        return ', '.join(rng.choice(DESIGN_TYPES, size=2, replace=False))
+    if question == 'Main takeaway from this week\'s client meetings':
+        return str(rng.choice(TAKEAWAYS))
+    if question == 'Review of this week overall':
+        return str(rng.choice(REVIEWS))
+    return ''
+
+
+def generate_weekly_rows(roster, week_index, week_start, seed=0):
+    """Rows (list of lists, aligned with ``form_headers``) for one week"""
+    rng = np.random.default_rng([seed, week_index])
+    headers = form_headers()
+    offsets = _section_offsets()
+    week_end = week_start + timedelta(days=6)
+    rows = []
+
+    for employee in roster:
+        if rng.random() > employee['attendance']:
+            continue
+
+        row = [''] * len(headers)
+        row[0] = f"{week_end.isoformat()} 18:{int(rng.integers(0, 60)):02d}:00"
+        row[1] = employee['name']
+        row[2] = employee['role']
+        row[3] = week_start.isoformat()
+        row[4] = week_end.isoformat()
+
+        offset = offsets[employee['role']]
+        for j, question in enumerate(ROLE_SECTIONS[employee['role']]):
+            row[offset + j] = _answer(question, employee, week_index, rng)
+
+        row[-1] = str(rng.choice(COMMENTS))
+        rows.append(row)
+
+    return rows
+
+
+def generate_weekly_csv(roster, week_index, week_start, seed=0):
+    """One weekly report as CSV text with the raw survey headers"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(form_headers())
+    writer.writerows(generate_weekly_rows(roster, week_index, week_start, seed))
+    return buffer.getvalue()
+
+
+def generate_reports(n_employees=50, n_weeks=12, seed=0, start=date(2025, 1, 6)):
+    """Generate ``n_weeks`` consecutive weekly CSV reports as text"""
+    roster = build_roster(n_employees, seed)
+    return [
+        generate_weekly_csv(roster, week, start + timedelta(weeks=week), seed)
+        for week in range(n_weeks)
+    ]
+
+
+def write_reports(directory, n_employees=50, n_weeks=12, seed=0, start=date(2025, 1, 6)):
+    """Write generated reports to ``directory`` and return their paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for week, text in enumerate(generate_reports(n_employees, n_weeks, seed, start)):
+        week_start = start + timedelta(weeks=week)
+        path = os.path.join(directory, f"weekly_report_{week_start.isoformat()}.csv")
+        with open(path, 'w', newline='', encoding='utf-8') as handle:
+            handle.write(text)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write synthetic weekly performance CSVs")
+    parser.add_argument('directory')
+    parser.add_argument('--employees', type=int, default=50)
+    parser.add_argument('--weeks', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for written in write_reports(args.directory, args.employees, args.weeks, args.seed):
+        print(written)
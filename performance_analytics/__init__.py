@@ -0,0 +1,34 @@
+"""Headless analytics engine behind the performance dashboard.
+
+Ingestion, storage, metrics, heatmap and ranking logic with explicit
+inputs and outputs; the Streamlit app in ``performance_dashboard.py`` only
+renders what these functions return.
+"""
+from .cleaning import clean_data, find_column
+from .live_source import LiveSync, open_source
+from .metrics import (calculate_enhanced_metrics, employee_journey, heatmap_matrix, long_term_rankings,
+                      report_summary, timeline_summary, timeline_trends)
+from .schema import COLUMN_MAPPING, ROLES, performance_badge
+from .shared import SharedDataStore, StoreSnapshot, content_hash
+from .store import PerformanceStore
+
+__all__ = [
+    'COLUMN_MAPPING',
+    'LiveSync',
+    'ROLES',
+    'PerformanceStore',
+    'SharedDataStore',
+    'StoreSnapshot',
+    'calculate_enhanced_metrics',
+    'clean_data',
+    'content_hash',
+    'employee_journey',
+    'find_column',
+    'heatmap_matrix',
+    'long_term_rankings',
+    'open_source',
+    'performance_badge',
+    'report_summary',
+    'timeline_summary',
+    'timeline_trends',
+]
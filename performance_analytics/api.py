@@ -0,0 +1,281 @@
+"""Read-only HTTP API over the shared store's aggregates.
+
+Other tools can read the dashboard's KPIs, rankings, heatmap and employee
+series without opening the Streamlit page. Every request is answered from
+one ``StoreSnapshot``, so results are computed at most once per data
+version and shared with the dashboard. The encoded response bodies are
+cached on the snapshot as well. ETags are the store's identity, the data
+version and the request, with ``-gz`` added for gzipped bodies, so a
+client that already holds the current version gets a 304 without
+anything being computed or serialized.
+Versions start at 0 in every process, so the identity is a nonce drawn when
+the API starts; a restart or another API process never matches old tags.
+
+Endpoints (GET only)::
+
+    /api/version                      data version, report and employee counts
+    /api/metrics                      overall, per-role and per-report KPIs
+    /api/rankings                     long-term rankings
+    /api/heatmap                      employee x report productivity matrix
+    /api/timeline                     one row per report
+    /api/employees                    Employee_ID, name, role and reports tracked
+    /api/series                       productivity per employee and report, with rolling trends
+    /api/employees/<Employee_ID>      one employee's rows from every report
+
+Every endpoint takes the dashboard filters as query parameters: ``start``
+and ``end`` (week start dates) and repeated ``roles`` / ``employees``.
+Tables are JSON records by default, or an Arrow IPC stream with
+``?format=arrow`` or ``Accept: application/vnd.apache.arrow.stream``.
+
+Run next to the dashboard with ``DASHBOARD_API_PORT`` set, or on its own
+over a batch snapshot::
+
+    python -m performance_analytics.api snapshots/latest --port 8502
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import secrets
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+import pyarrow as pa
+
+from .jsonio import to_builtin
+from .schema import ROLES
+from .shared import SharedDataStore
+
+JSON_MIME = 'application/json'
+ARROW_MIME = 'application/vnd.apache.arrow.stream'
+# Smaller bodies aren't worth compressing
+MIN_GZIP_BYTES = 1024
+DEFAULT_PORT = 8502
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _metrics(snapshot):
+    roles = {role: snapshot.role_metrics(role) for role in ROLES}
+    return {
+        'overall': snapshot.overall_metrics(),
+        'roles': {role: metrics for role, metrics in roles.items() if metrics},
+        'reports': {report['file_order']: snapshot.report_metrics(report) for report in snapshot.reports},
+    }
+
+
+def _heatmap(snapshot):
+    employees, file_orders, values = snapshot.heatmap_matrix()
+    return {'employees': employees, 'file_orders': file_orders, 'values': values}
+
+
+def _employees(snapshot):
+    timeline = snapshot.employee_timeline
+    employee_ids = snapshot.employees_by_name()
+    return pd.DataFrame({
+        'Employee_ID': employee_ids,
+        'Name': [timeline[employee_id]['name'] for employee_id in employee_ids],
+        'Role': [timeline[employee_id]['role'] for employee_id in employee_ids],
+        'Reports': [len(timeline[employee_id]['history']) for employee_id in employee_ids],
+    })
+
+
+def _series(snapshot):
+    """Long form of the productivity panel: one row per employee and report"""
+    panel = snapshot.productivity_panel()
+    if panel.empty:
+        return pd.DataFrame(columns=['Employee_ID', 'File_Order', 'Productivity'])
+
+    series = panel.stack(future_stack=True).dropna().rename('Productivity').to_frame()
+    for name, matrix in snapshot.productivity_trends().items():
+        series[name] = matrix.stack(future_stack=True).reindex(series.index)
+    series.index.names = ['Employee_ID', 'File_Order']
+    return series.reset_index()
+
+
+RESOURCES = {
+    'version': lambda snapshot: {'version': snapshot.version, 'reports': len(snapshot.reports),
+                                 'employees': len(snapshot.employee_timeline)},
+    'metrics': _metrics,
+    'rankings': lambda snapshot: snapshot.rankings(),
+    'heatmap': _heatmap,
+    'timeline': lambda snapshot: snapshot.timeline_summary(),
+    'employees': _employees,
+    'series': _series,
+}
+
+
+def _json_safe(value):
+    """JSON types with NaN as null"""
+    if isinstance(value, dict):
+        return {str(key): _json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_safe(item) for item in value]
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def encode(payload, fmt):
+    """Response body and content type for a dict or DataFrame payload"""
+    if fmt == 'arrow':
+        if not isinstance(payload, pd.DataFrame):
+            raise ApiError(406, "Arrow is only available for table endpoints")
+        table = pa.Table.from_pandas(payload, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), ARROW_MIME
+
+    if isinstance(payload, pd.DataFrame):
+        return payload.to_json(orient='records', date_format='iso').encode('utf-8'), JSON_MIME
+    return json.dumps(_json_safe(to_builtin(payload)), default=str).encode('utf-8'), JSON_MIME
+
+
+def parse_filters(query):
+    """Dashboard filters from parsed query parameters"""
+    filters = {}
+    for name in ('start', 'end'):
+        if query.get(name):
+            try:
+                filters[name] = pd.Timestamp(query[name][-1])
+            except ValueError:
+                raise ApiError(400, f"Invalid {name} date: {query[name][-1]}")
+    for name in ('roles', 'employees'):
+        if name in query:
+            filters[name] = query[name]
+    return filters
+
+
+class PerformanceApi:
+    """Resolves requests against the current snapshot of a ``SharedDataStore``"""
+
+    def __init__(self, shared):
+        self.shared = shared
+        self.instance = secrets.token_hex(4)
+
+    def etag(self, snapshot, path, query, fmt):
+        request = json.dumps([path, sorted(query.items()), fmt])
+        return f'"{self.instance}-{snapshot.version}-{hashlib.sha1(request.encode("utf-8")).hexdigest()[:16]}"'
+
+    def respond(self, target, accept='', accept_encoding='', if_none_match=None):
+        """``(status, headers, body)`` for a GET of ``target``"""
+        parts = urlsplit(target)
+        path = parts.path.rstrip('/')
+        query = parse_qs(parts.query)
+        fmt = query.get('format', ['arrow' if ARROW_MIME in accept else 'json'])[-1]
+        if fmt not in ('json', 'arrow'):
+            raise ApiError(400, f"Unknown format: {fmt}")
+
+        snapshot = self.shared.snapshot()
+        etag = self.etag(snapshot, path, query, fmt)
+        gzip_etag = etag[:-1] + '-gz"'
+        accepts_gzip = 'gzip' in accept_encoding
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept, Accept-Encoding'}
+        if if_none_match:
+            # Whether the body gets gzipped depends on its size, so either tag of this version is still current
+            held = [tag.strip() for tag in if_none_match.split(',')]
+            matched = next((tag for tag in ([gzip_etag, etag] if accepts_gzip else [etag]) if tag in held), None)
+            if matched:
+                return 304, dict(headers, ETag=matched), b''
+
+        view = snapshot.view(parse_filters(query))
+        body, content_type = view.cached(('api_body', (path, fmt)), self._body, view, path, fmt)
+        if accepts_gzip and len(body) >= MIN_GZIP_BYTES:
+            body = view.cached(('api_gzip', (path, fmt)), gzip.compress, body)
+            headers.update({'Content-Encoding': 'gzip', 'ETag': gzip_etag})
+        headers['Content-Type'] = content_type
+        return 200, headers, body
+
+    def _body(self, view, path, fmt):
+        if not path.startswith('/api/'):
+            raise ApiError(404, f"Unknown endpoint: {path}")
+        name = path[len('/api/'):]
+
+        if name.startswith('employees/'):
+            employee_id = unquote(name[len('employees/'):])
+            if employee_id not in view.employee_timeline:
+                raise ApiError(404, f"Unknown employee: {employee_id}")
+            return encode(view.employee_history(employee_id), fmt)
+        if name not in RESOURCES:
+            raise ApiError(404, f"Unknown endpoint: {path}")
+        return encode(RESOURCES[name](view), fmt)
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'PerformanceApi/1.0'
+
+    def do_GET(self):
+        try:
+            status, headers, body = self.server.api.respond(
+                self.path, self.headers.get('Accept', ''), self.headers.get('Accept-Encoding', ''),
+                self.headers.get('If-None-Match'))
+        except ApiError as e:
+            status, headers, body = e.status, {'Content-Type': JSON_MIME}, json.dumps({'error': str(e)}).encode()
+        except Exception as e:
+            status, headers = 500, {'Content-Type': JSON_MIME}
+            body = json.dumps({'error': f"{type(e).__name__}: {e}"}).encode()
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ApiServer:
+    """The API on a background thread, next to the Streamlit server"""
+
+    def __init__(self, shared, host='127.0.0.1', port=DEFAULT_PORT):
+        self.httpd = ThreadingHTTPServer((host, port), ApiRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.api = PerformanceApi(shared)
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='performance-api', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve dashboard aggregates from a snapshot as JSON / Arrow")
+    parser.add_argument('snapshot_dir', help="Snapshot written by performance_analytics.batch")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    server = ApiServer(SharedDataStore.from_snapshot(args.snapshot_dir), args.host, args.port)
+    print(f"Serving {args.snapshot_dir} on {server.address}/api/")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Headless batch mode: precompute a dashboard snapshot from a directory of CSVs.
+
+    python -m performance_analytics.batch weekly_reports/ snapshot/ --workers 8
+
+Files are read, validated and cleaned in parallel, then appended in
+file-name order (name them so they sort chronologically, e.g.
+``2025-01-06.csv``). Each file goes through the same steps as a dashboard
+upload: ``validate_report``, ``clean_data``, then identity resolution, with
+repeated entries checked against the files appended before it. Rejected rows
+are written to ``rejected/`` in the output directory, with their issues, so
+they can be corrected and uploaded. Start the dashboard with
+``DASHBOARD_SNAPSHOT_DIR=snapshot/`` to open on the result instead of
+processing uploads live.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from .cleaning import clean_data
+from .identity import IdentityIndex
+from .shared import content_hash
+from .snapshot import compute_aggregates, write_snapshot
+from .store import PerformanceStore
+from .validation import employee_weeks, number_rows, validate_report
+
+
+def _load_report(path, file_order):
+    """Read, validate and clean one CSV (runs in a worker process).
+
+    Returns the rows that passed (raw and cleaned), the rejected rows, the
+    file's modification time and its content hash.
+    """
+    with open(path, 'rb') as handle:
+        payload = handle.read()
+    upload_time = datetime.fromtimestamp(os.path.getmtime(path))
+    try:
+        valid, rejected = validate_report(number_rows(pd.read_csv(path)))
+    except ValueError:
+        valid = rejected = pd.DataFrame()
+    cleaned = clean_data(valid.reset_index(drop=True), file_order, upload_time) if not valid.empty else valid
+    return valid, cleaned, rejected, upload_time, content_hash(payload)
+
+
+def find_reports(directory, pattern='*.csv'):
+    return sorted(glob.glob(os.path.join(directory, pattern)))
+
+
+def ingest_directory(paths, workers=None, identities=None):
+    """Validate and clean ``paths`` across a process pool and build a store in file order.
+
+    Employees are resolved through ``identities`` (a fresh ``IdentityIndex``
+    when None), and rows repeating an employee's week from an earlier file
+    are rejected the way uploads are.
+
+    Returns ``(store, sources, hashes, skipped, rejected)`` where
+    ``sources`` and ``hashes`` are keyed by file order, ``skipped`` lists
+    files that had no usable rows or duplicated an earlier file and
+    ``rejected`` maps file paths to their rejected rows.
+    """
+    identities = identities if identities is not None else IdentityIndex()
+    workers = workers or os.cpu_count() or 1
+    file_orders = range(1, len(paths) + 1)
+
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_load_report, paths, file_orders))
+    else:
+        results = [_load_report(path, file_order) for path, file_order in zip(paths, file_orders)]
+
+    store = PerformanceStore()
+    sources = {}
+    hashes = {}
+    seen = set()
+    skipped = []
+    rejected_rows = {}
+    loaded = []
+
+    for path, (valid, cleaned, rejected, upload_time, digest) in zip(paths, results):
+        if digest in seen:
+            skipped.append(path)
+            continue
+
+        # Entries repeating a week of an earlier file, now that employees resolve through the index
+        if not valid.empty:
+            existing = pd.concat(loaded, ignore_index=True) if loaded else None
+            kept, repeated = validate_report(valid, existing, identities)
+            if not repeated.empty:
+                cleaned = cleaned[valid.index.isin(kept.index)].reset_index(drop=True)
+                rejected = pd.concat([rejected, repeated]).sort_index()
+        if not rejected.empty:
+            rejected_rows[path] = rejected
+        if cleaned.empty:
+            skipped.append(path)
+            continue
+
+        cleaned = identities.apply(cleaned)
+        # Renumber so file orders stay contiguous after skipped files
+        cleaned['File_Order'] = store.next_file_order
+        report = store.add_report(cleaned, upload_time)
+        loaded.append(employee_weeks(cleaned))
+        sources[report['file_order']] = os.path.basename(path)
+        hashes[report['file_order']] = digest
+        seen.add(digest)
+
+    return store, sources, hashes, skipped, rejected_rows
+
+
+def write_rejected(rejected_rows, directory):
+    """Write each file's rejected rows, with their Row and Issues, to ``directory/rejected``"""
+    rejected_dir = os.path.join(directory, 'rejected')
+    for path, rows in rejected_rows.items():
+        os.makedirs(rejected_dir, exist_ok=True)
+        rows.to_csv(os.path.join(rejected_dir, os.path.basename(path)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute a dashboard snapshot from weekly CSV reports")
+    parser.add_argument('input_dir', help="Directory containing weekly CSV reports")
+    parser.add_argument('output_dir', help="Directory to write the snapshot to")
+    parser.add_argument('--pattern', default='*.csv', help="Glob for report files (default: *.csv)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--aliases', default=None, help="Employee alias table to resolve names through (JSON)")
+    args = parser.parse_args(argv)
+
+    paths = find_reports(args.input_dir, args.pattern)
+    if not paths:
+        print(f"No files matching {args.pattern} in {args.input_dir}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    identities = IdentityIndex.load(args.aliases) if args.aliases else IdentityIndex()
+    store, sources, hashes, skipped, rejected_rows = ingest_directory(paths, args.workers, identities)
+    ingest_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    aggregates = compute_aggregates(store)
+    aggregate_seconds = time.perf_counter() - start
+
+    write_snapshot(store, args.output_dir, aggregates, sources, hashes)
+    write_rejected(rejected_rows, args.output_dir)
+
+    print(f"Ingested {len(store.reports)} reports ({len(aggregates['consolidated'])} rows, "
+          f"{len(store.employee_timeline)} employees) in {ingest_seconds:.2f}s")
+    print(f"Computed aggregates in {aggregate_seconds:.2f}s")
+    for path, rows in rejected_rows.items():
+        print(f"Rejected {len(rows)} row(s) of {path}: see rejected/{os.path.basename(path)}")
+    for path in skipped:
+        print(f"Skipped {path}: no valid rows or duplicate content")
+    print(f"Snapshot written to {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
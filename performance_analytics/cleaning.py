@@ -0,0 +1,70 @@
+"""Column detection and cleaning of raw weekly reports"""
+from datetime import datetime
+
+import pandas as pd
+
+from .schema import COLUMN_MAPPING, DATE_COLUMNS, NUMERIC_COLUMNS, productivity_columns
+
+
+def find_column(df, target_col, column_mapping=COLUMN_MAPPING):
+    """Enhanced column finder with fuzzy matching"""
+    if target_col in df.columns:
+        return target_col
+
+    possible_names = column_mapping.get(target_col, [target_col])
+    for col in df.columns:
+        for possible in possible_names:
+            if possible.lower() in col.lower():
+                return col
+    return None
+
+
+def column_map(df, column_mapping=COLUMN_MAPPING):
+    """Actual column name -> standard name for every standard column found in ``df``"""
+    mapped = {}
+    for standard_name in column_mapping.keys():
+        actual_col = find_column(df, standard_name, column_mapping)
+        if actual_col:
+            mapped[actual_col] = standard_name
+    return mapped
+
+
+def clean_data(df, file_order, upload_time=None, column_mapping=COLUMN_MAPPING):
+    """Standardize a raw report and tag it with its position in the timeline"""
+    if df is None or df.empty:
+        return pd.DataFrame()
+
+    # Rename columns
+    df_clean = df.rename(columns=column_map(df, column_mapping))
+
+    # Create unique employee identifier (Name + Role)
+    if 'Name' in df_clean.columns and 'Role' in df_clean.columns:
+        df_clean['Employee_ID'] = df_clean['Name'] + " (" + df_clean['Role'] + ")"
+
+    # Fill missing values
+    for col in NUMERIC_COLUMNS:
+        if col in df_clean.columns:
+            df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0)
+
+    # Clean productivity scores (assuming 1-5 scale)
+    productivity_cols = productivity_columns(df_clean)
+    for col in productivity_cols:
+        df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(3)
+        df_clean[col] = df_clean[col].clip(1, 5)
+
+    # Clean text columns
+    text_cols = [col for col in df_clean.columns if
+                 col not in NUMERIC_COLUMNS + productivity_cols + DATE_COLUMNS]
+    for col in text_cols:
+        df_clean[col] = df_clean[col].fillna('').astype(str)
+
+    # Parse dates
+    for col in DATE_COLUMNS:
+        if col in df_clean.columns:
+            df_clean[col] = pd.to_datetime(df_clean[col], errors='coerce')
+
+    # Add file upload timestamp
+    df_clean['Upload_Timestamp'] = upload_time or datetime.now()
+    df_clean['File_Order'] = file_order
+
+    return df_clean
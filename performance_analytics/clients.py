@@ -0,0 +1,153 @@
+"""Client workload analytics on an interned client dimension.
+
+Client names are typed free-hand in comma separated lists, so each report's
+client columns are split, trimmed and case-folded once into integer client
+IDs. The IDs come from one append-only ``ClientDimension`` per server, so
+they stay stable across reports and versions. Each report then reduces to a
+small fact table with one row per (employee, client) mention, and workload,
+concentration and churn are group-bys over those integer columns.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .schema import EMPTY_ANSWERS, client_columns
+
+# Separators people use between client names in one answer
+CLIENT_SEPARATORS = r'[,;/|\n]+'
+
+
+class Interner:
+    """Append-only table giving each distinct key a dense integer ID"""
+
+    def __init__(self):
+        self.names = []
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, keys, names=None):
+        """IDs for ``keys``, adding unseen keys with their first display name"""
+        keys = pd.Series(keys)
+        if keys.empty:
+            return np.array([], dtype=np.int64)
+
+        # Only distinct keys go through the dictionary
+        codes, distinct = pd.factorize(keys)
+        first = pd.Series(np.arange(len(codes))).groupby(codes).first().to_numpy()
+        names = pd.Series(names).to_numpy()[first] if names is not None else distinct
+        with self._lock:
+            ids = np.array([self._id(key, name) for key, name in zip(distinct, names)], dtype=np.int64)
+        return ids[codes]
+
+    def _id(self, key, name):
+        if key not in self._ids:
+            self._ids[key] = len(self.names)
+            self.names.append(name)
+        return self._ids[key]
+
+    def lookup(self, ids):
+        """Display names of ``ids``"""
+        return np.asarray(self.names, dtype=object)[np.asarray(ids, dtype=np.int64)]
+
+
+class ClientDimension:
+    """Interned client names and employees shared by every report on the server"""
+
+    def __init__(self):
+        self.clients = Interner()
+        self.employees = Interner()
+
+    def report_facts(self, report_data, file_order):
+        """One row per client named by an employee in one report"""
+        columns = client_columns(report_data)
+        if not columns or report_data.empty or 'Employee_ID' not in report_data.columns:
+            return empty_facts()
+
+        # Every answer of every client column, tagged with its row offset
+        answers = report_data[columns].astype(str).to_numpy().ravel()
+        rows = np.repeat(np.arange(len(report_data)), len(columns))
+        names = (pd.Series(answers, index=rows).str.split(CLIENT_SEPARATORS).explode()
+                 .str.strip().str.replace(r'\s+', ' ', regex=True))
+        keys = names.str.casefold()
+        named = keys.notna() & ~keys.isin(EMPTY_ANSWERS + ['nan'])
+        names, keys = names[named], keys[named]
+        rows = names.index.to_numpy()
+
+        if 'Week Start Date' in report_data.columns:
+            week_start = report_data['Week Start Date'].to_numpy(dtype='datetime64[ns]')[rows]
+        else:
+            week_start = np.full(len(rows), np.datetime64('NaT'), dtype='datetime64[ns]')
+
+        facts = pd.DataFrame({
+            'Client_ID': self.clients.intern(keys.to_numpy(), names.to_numpy()),
+            'Employee_Key': self.employees.intern(report_data['Employee_ID'].to_numpy()[rows]),
+            'File_Order': np.full(len(rows), file_order, dtype=np.int64),
+            'Week_Start': week_start,
+        })
+        # Naming a client twice in one week is still one week on that client
+        return facts.drop_duplicates(['Client_ID', 'Employee_Key']).reset_index(drop=True)
+
+
+def empty_facts():
+    return pd.DataFrame({'Client_ID': pd.Series(dtype=np.int64), 'Employee_Key': pd.Series(dtype=np.int64),
+                         'File_Order': pd.Series(dtype=np.int64), 'Week_Start': pd.Series(dtype='datetime64[ns]')})
+
+
+def client_workload(facts, dimension):
+    """Per client: employee-weeks, reach, active span and how concentrated it is on one person"""
+    if facts.empty:
+        return pd.DataFrame(columns=['Client', 'Employee_Weeks', 'Workload_Share', 'Employees', 'Reports',
+                                     'First_Report', 'Last_Report', 'Top_Employee', 'Top_Employee_Share',
+                                     'Concentration'])
+
+    by_client = facts.groupby('Client_ID')
+    workload = pd.DataFrame({
+        'Employee_Weeks': by_client.size(),
+        'Employees': by_client['Employee_Key'].nunique(),
+        'Reports': by_client['File_Order'].nunique(),
+        'First_Report': by_client['File_Order'].min(),
+        'Last_Report': by_client['File_Order'].max(),
+    })
+    workload.insert(1, 'Workload_Share', workload['Employee_Weeks'] / workload['Employee_Weeks'].sum())
+
+    # Each employee's share of a client's weeks; the sum of squares is the
+    # Herfindahl index (1.0 = one person carries the client)
+    pairs = facts.groupby(['Client_ID', 'Employee_Key']).size()
+    shares = pairs / pairs.groupby(level='Client_ID').transform('sum')
+    by_pair = shares.groupby(level='Client_ID')
+    top = by_pair.idxmax().str[1]
+    workload['Top_Employee'] = dimension.employees.lookup(top.loc[workload.index])
+    workload['Top_Employee_Share'] = by_pair.max()
+    workload['Concentration'] = (shares ** 2).groupby(level='Client_ID').sum()
+
+    workload.insert(0, 'Client', dimension.clients.lookup(workload.index))
+    return workload.sort_values(['Employee_Weeks', 'Client'], ascending=[False, True]).reset_index(drop=True)
+
+
+def client_churn(facts, file_orders):
+    """Active, new, returning and lost clients in each report"""
+    file_orders = list(file_orders)
+    if facts.empty or not file_orders:
+        return pd.DataFrame(columns=['File_Order', 'Active', 'New', 'Returning', 'Lost'])
+
+    # Clients x reports presence matrix
+    presence = (pd.crosstab(facts['Client_ID'], facts['File_Order'])
+                .reindex(columns=file_orders, fill_value=0).to_numpy() > 0)
+    seen = presence.any(axis=1)
+    first_seen = presence[seen].argmax(axis=1)
+    previous = np.zeros_like(presence)
+    previous[:, 1:] = presence[:, :-1]
+
+    churn = pd.DataFrame({
+        'File_Order': file_orders,
+        'Active': presence.sum(axis=0),
+        'New': np.bincount(first_seen, minlength=len(file_orders)),
+        'Lost': (previous & ~presence).sum(axis=0),
+    })
+    churn.insert(3, 'Returning', churn['Active'] - churn['New'])
+    return churn
+
@@ -0,0 +1,142 @@
+"""Dependency graph of the datasets derived from a snapshot's reports.
+
+Every aggregate a ``StoreSnapshot`` caches is a node of ``DERIVED_DATASETS``
+that names the inputs it is built from. The graph's sources are the reports
+(by file order), the employee histories (by employee), the set of employees
+and the team membership. ``Node.per`` says whether a node is kept once per
+report, once per employee or once for the whole snapshot.
+
+A write describes what it touched as a ``Change``. ``carry_over`` follows
+the graph from the touched sources to the nodes built from them, and
+everything it doesn't reach moves to the new version as it is. Per-report
+and per-employee nodes only lose the reports or employees that were
+touched. Nodes marked ``patch`` are handed to the new version together with
+every change made since they were built, so they can recompute only what
+those changes affect: the heatmap rows and ranking entries of the touched
+employees, the changed columns of the productivity panel and the tail of
+its rolling statistics, or a forecast's new weeks. Aggregates that aren't in the graph
+(filtered views, table sort orders, ...) are rebuilt for every version.
+"""
+REPORTS = 'reports'
+EMPLOYEES = 'employees'
+EMPLOYEE_SET = 'employee_set'
+TEAMS = 'teams'
+SOURCES = (REPORTS, EMPLOYEES, EMPLOYEE_SET, TEAMS)
+# Cache key kind of a patchable node's value from an earlier version
+PREVIOUS = 'previous'
+
+
+class Change:
+    """What a write touched: report file orders, employees and whole sources"""
+
+    def __init__(self, file_orders=(), employee_ids=(), sources=()):
+        self.file_orders = frozenset(file_orders)
+        self.employee_ids = frozenset(employee_ids)
+        self.sources = frozenset(sources)
+
+    def __or__(self, other):
+        return Change(self.file_orders | other.file_orders, self.employee_ids | other.employee_ids,
+                      self.sources | other.sources)
+
+    def touches(self, source, item=None, per=None):
+        """Whether ``source`` changed, for one report or employee ``item`` of a node kept ``per`` that source"""
+        if source == REPORTS:
+            return item in self.file_orders if per == REPORTS else bool(self.file_orders)
+        if source == EMPLOYEES:
+            return item in self.employee_ids if per == EMPLOYEES else bool(self.employee_ids)
+        return source in self.sources
+
+
+class Node:
+    """A derived dataset, the nodes or sources it's built from and how it's kept"""
+
+    def __init__(self, name, inputs, per=None, patch=False):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.per = per
+        self.patch = patch
+
+    def sources(self):
+        """Every source this node depends on, directly or through other nodes"""
+        found = set()
+        for name in self.inputs:
+            found.update([name] if name in SOURCES else DERIVED_DATASETS[name].sources())
+        return found
+
+    def unaffected(self, item, change):
+        return not any(change.touches(source, item, self.per) for source in self.sources())
+
+
+DERIVED_DATASETS = {node.name: node for node in (
+    # Once per report, from its rows
+    Node('report_distribution', [REPORTS], per=REPORTS),
+    Node('report_metrics', ['report_distribution'], per=REPORTS),
+    Node('report_productivity', [REPORTS], per=REPORTS),
+    Node('report_client_facts', [REPORTS], per=REPORTS),
+    Node('report_team_facts', [REPORTS, TEAMS], per=REPORTS),
+    Node('report_team_rollup', ['report_team_facts'], per=REPORTS),
+    Node('report_output', [REPORTS], per=REPORTS),
+    Node('report_employees', [REPORTS], per=REPORTS),
+    Node('report_employee_weeks', [REPORTS], per=REPORTS),
+    Node('report_summary', [REPORTS], per=REPORTS),
+    Node('report_extent', [REPORTS], per=REPORTS),
+    # Once per employee, from their history
+    Node('employee_history', [EMPLOYEES], per=EMPLOYEES),
+    # Whole snapshot
+    Node('consolidated', [REPORTS]),
+    Node('row_index', ['consolidated']),
+    Node('timeline_summary', ['report_summary']),
+    Node('filter_options', ['report_extent']),
+    Node('distribution', ['report_distribution']),
+    Node('overall_metrics', ['distribution']),
+    Node('role_metrics', ['distribution']),
+    Node('employee_order', ['report_employees']),
+    Node('employees_by_name', [EMPLOYEE_SET]),
+    Node('employee_weeks', ['report_employee_weeks']),
+    Node('employee_tracking', [EMPLOYEES]),
+    Node('employee_shards', ['consolidated', 'row_index', EMPLOYEES]),
+    Node('heatmap_matrix', [REPORTS, EMPLOYEES, 'employee_order'], patch=True),
+    Node('rankings', [REPORTS, EMPLOYEES, 'employee_order'], patch=True),
+    Node('productivity_panel', ['report_productivity'], patch=True),
+    Node('productivity_trends', ['productivity_panel'], patch=True),
+    Node('latest_trends', ['productivity_panel', 'productivity_trends']),
+    Node('productivity_alerts', ['productivity_panel', 'productivity_trends']),
+    Node('client_facts', ['report_client_facts']),
+    Node('client_workload', ['client_facts']),
+    Node('client_churn', ['client_facts']),
+    Node('team_facts', ['report_team_facts']),
+    Node('team_table', ['report_team_rollup']),
+    Node('company_table', ['team_table']),
+    Node('team_members', ['team_facts']),
+    Node('team_leaders', ['team_facts']),
+    Node('output_panel', ['report_output', EMPLOYEES]),
+    Node('forecast_model', ['output_panel'], patch=True),
+    Node('forecasts', ['forecast_model']),
+    Node('capacity', ['output_panel', 'forecasts']),
+)}
+
+
+def carry_over(aggregates, change):
+    """The ``aggregates`` of one version that are still valid after ``change``.
+
+    Patchable nodes that are no longer valid come back under ``(PREVIOUS,
+    name)`` as ``(value, changes since it was built)``.
+    """
+    carried = {}
+    for key, value in aggregates.items():
+        kind, item = key if isinstance(key, tuple) else (key, None)
+        node = DERIVED_DATASETS.get(kind)
+        if node is None:
+            continue
+        if node.unaffected(item, change):
+            carried[key] = value
+        elif node.patch and item is None:
+            carried[(PREVIOUS, kind)] = (value, change)
+
+    # Patchable values nobody rebuilt keep waiting, with the changes piling up
+    for kind, node in DERIVED_DATASETS.items():
+        pending = aggregates.get((PREVIOUS, kind))
+        if node.patch and pending is not None and kind not in aggregates:
+            value, since = pending
+            carried[(PREVIOUS, kind)] = (value, since | change)
+    return carried
@@ -0,0 +1,197 @@
+"""Mergeable distribution summaries of productivity answers and output counts.
+
+A ``ValueHistogram`` holds sorted distinct values with their counts, plus
+the exact sum, minimum and maximum. Histograms merge by adding counts, so
+KPIs, band counts and percentiles for any set of reports come from merging
+small per-report summaries instead of rescanning rows.
+
+Survey answers (1-5) and weekly output counts take few distinct values, so
+the histograms are exact in practice. Past ``MAX_BINS`` distinct values
+they fold into logarithmic buckets with ``RELATIVE_ACCURACY`` error (the
+sum, minimum and maximum stay exact), so merged summaries stay small.
+"""
+import numpy as np
+import pandas as pd
+
+from .schema import PRODUCTIVITY_BANDS, ROLE_METRICS, productivity_columns
+
+MAX_BINS = 512
+RELATIVE_ACCURACY = 0.01
+PERCENTILES = (0.25, 0.5, 0.75, 0.9)
+
+
+class ValueHistogram:
+    """Counts of each distinct value of one numeric measure"""
+
+    def __init__(self, values=(), counts=(), total=0.0, minimum=np.nan, maximum=np.nan):
+        self.values = np.asarray(values, dtype=float)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.total = total
+        self.minimum = minimum
+        self.maximum = maximum
+        if len(self.values) > MAX_BINS:
+            self._compact()
+
+    @classmethod
+    def from_values(cls, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return cls()
+        distinct, counts = np.unique(values, return_counts=True)
+        return cls(distinct, counts, values.sum(), distinct[0], distinct[-1])
+
+    @classmethod
+    def merge_all(cls, histograms):
+        histograms = [histogram for histogram in histograms if histogram.n]
+        if not histograms:
+            return cls()
+        if len(histograms) == 1:
+            return histograms[0]
+
+        distinct, inverse = np.unique(np.concatenate([histogram.values for histogram in histograms]),
+                                      return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([histogram.counts for histogram in histograms]))
+        return cls(distinct, counts.astype(np.int64),
+                   sum(histogram.total for histogram in histograms),
+                   min(histogram.minimum for histogram in histograms),
+                   max(histogram.maximum for histogram in histograms))
+
+    def _compact(self):
+        gamma = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+        magnitude = np.abs(self.values)
+        nonzero = magnitude > 0
+        bucket = np.zeros(len(self.values))
+        bucket[nonzero] = np.ceil(np.log(magnitude[nonzero]) / np.log(gamma))
+        representative = np.where(nonzero, np.sign(self.values) * 2 * gamma ** bucket / (gamma + 1), 0.0)
+        self.values, inverse = np.unique(representative, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=self.counts).astype(np.int64)
+
+    @property
+    def n(self):
+        return int(self.counts.sum())
+
+    @property
+    def mean(self):
+        return self.total / self.n if self.n else np.nan
+
+    @property
+    def std(self):
+        """Population standard deviation, like ``np.std``"""
+        if not self.n:
+            return np.nan
+        return float(np.sqrt(np.dot(self.counts, (self.values - self.mean) ** 2) / self.n))
+
+    def quantile(self, q):
+        """Linearly interpolated quantile, matching ``np.quantile``'s default"""
+        if not self.n:
+            return np.nan
+        position = q * (self.n - 1)
+        cumulative = np.cumsum(self.counts)
+        lower, upper = self.values[np.searchsorted(cumulative, [np.floor(position), np.ceil(position)], side='right')]
+        return float(lower + (upper - lower) * (position - np.floor(position)))
+
+    def count_between(self, lower=None, upper=None):
+        """Number of values in ``[lower, upper)``"""
+        start = np.searchsorted(self.values, lower, side='left') if lower is not None else 0
+        stop = np.searchsorted(self.values, upper, side='left') if upper is not None else len(self.values)
+        return int(self.counts[start:stop].sum())
+
+
+def report_distribution(df):
+    """Histograms of one report's productivity and KPI columns, for every row and per role.
+
+    Scopes are ``None`` (all rows) and each role name.
+    """
+    distribution = {'rows': {}, 'productivity': {}, 'outputs': {}}
+    if df.empty:
+        return distribution
+
+    scopes = {None: np.arange(len(df))}
+    if 'Role' in df.columns:
+        scopes.update(df.groupby('Role', sort=False).indices)
+
+    productivity = df[productivity_columns(df)].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    outputs = {column: pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+               for column in dict.fromkeys(column for _, column, _, _ in ROLE_METRICS) if column in df.columns}
+
+    for scope, rows in scopes.items():
+        distribution['rows'][scope] = len(rows)
+        distribution['productivity'][scope] = ValueHistogram.from_values(productivity[rows])
+        for column, values in outputs.items():
+            distribution['outputs'][(column, scope)] = ValueHistogram.from_values(values[rows])
+    return distribution
+
+
+def merge_distributions(distributions):
+    """One distribution covering every report in ``distributions``"""
+    merged = {'rows': {}, 'productivity': {}, 'outputs': {}}
+    for part in ('productivity', 'outputs'):
+        grouped = {}
+        for distribution in distributions:
+            for key, histogram in distribution[part].items():
+                grouped.setdefault(key, []).append(histogram)
+        merged[part] = {key: ValueHistogram.merge_all(histograms) for key, histograms in grouped.items()}
+    for distribution in distributions:
+        for scope, rows in distribution['rows'].items():
+            merged['rows'][scope] = merged['rows'].get(scope, 0) + rows
+    return merged
+
+
+def productivity_metrics(histogram):
+    """Average, spread and band counts of the productivity answers"""
+    if histogram is None or not histogram.n:
+        return {}
+
+    return {
+        'avg_productivity': histogram.mean,
+        'productivity_std': histogram.std,
+        'productivity_min': histogram.minimum,
+        'productivity_max': histogram.maximum,
+        # Performance distribution
+        'performance_distribution': {
+            band: histogram.count_between(lower, upper) for band, lower, upper in PRODUCTIVITY_BANDS
+        },
+    }
+
+
+def metrics_from_distribution(distribution, role=None):
+    """The ``calculate_enhanced_metrics`` KPIs, read from a (merged) distribution"""
+    if not distribution['rows'].get(role):
+        return {}
+
+    metrics = {}
+
+    # Output metrics by role
+    for metric_role, column, suffix, extremes in ROLE_METRICS:
+        histogram = distribution['outputs'].get((column, role))
+        if histogram is None or (role and role != metric_role):
+            continue
+        metrics[f'avg_{suffix}'] = histogram.mean
+        metrics[f'total_{suffix}'] = histogram.total
+        if extremes:
+            metrics[f'max_{suffix}'] = histogram.maximum
+            metrics[f'min_{suffix}'] = histogram.minimum
+
+    # Enhanced productivity analysis
+    metrics.update(productivity_metrics(distribution['productivity'].get(role)))
+    return metrics
+
+
+def distribution_table(distribution, role=None):
+    """Median and percentiles of productivity and of each KPI column among the role that reports it"""
+    measures = [('Productivity', distribution['productivity'].get(role))]
+    for metric_role, column, _, _ in ROLE_METRICS:
+        if role is None or role == metric_role:
+            measures.append((f"{column} ({metric_role})", distribution['outputs'].get((column, metric_role))))
+
+    rows = []
+    for name, histogram in measures:
+        if histogram is None or not histogram.n:
+            continue
+        row = {'Measure': name, 'Answers': histogram.n}
+        for q in PERCENTILES:
+            row['Median' if q == 0.5 else f'P{int(q * 100)}'] = histogram.quantile(q)
+        row['Max'] = histogram.maximum
+        rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,359 @@
+"""Plotly figure builders that work from precomputed results"""
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from .schema import performance_badge
+
+# Enhanced color palette
+COLORS = {
+    'primary': ['#667eea', '#764ba2', '#f093fb', '#f5576c', '#4facfe', '#00f2fe'],
+    'secondary': ['#a8edea', '#fed6e3', '#d299c2', '#fef9d7', '#eea2a2', '#bbc1bf'],
+    'performance': {
+        'excellent': '#667eea',
+        'good': '#f093fb',
+        'average': '#ffecd2',
+        'needs_improvement': '#ff9a9e'
+    }
+}
+
+
+def timeline_figure(timeline_df):
+    """Output, productivity and team size per report"""
+    fig = make_subplots(
+        rows=3, cols=1,
+        subplot_titles=("📊 Total Output Over Time", "⭐ Average Productivity Over Time", "👥 Team Size Over Time"),
+        vertical_spacing=0.1
+    )
+
+    # Output timeline
+    fig.add_trace(
+        go.Scatter(
+            x=timeline_df['File_Order'],
+            y=timeline_df['Total_Output'],
+            mode='lines+markers',
+            name='Total Output',
+            line=dict(color='#667eea', width=3),
+            marker=dict(size=10),
+            hovertemplate="Report: %{x}<br>Output: %{y}<br>Date: %{customdata}<extra></extra>",
+            customdata=timeline_df['Upload_Date']
+        ),
+        row=1, col=1
+    )
+
+    # Productivity timeline
+    fig.add_trace(
+        go.Scatter(
+            x=timeline_df['File_Order'],
+            y=timeline_df['Avg_Productivity'],
+            mode='lines+markers',
+            name='Avg Productivity',
+            line=dict(color='#f093fb', width=3),
+            marker=dict(size=10),
+            hovertemplate="Report: %{x}<br>Productivity: %{y:.1f}<br>Date: %{customdata}<extra></extra>",
+            customdata=timeline_df['Upload_Date']
+        ),
+        row=2, col=1
+    )
+
+    # Team size timeline
+    fig.add_trace(
+        go.Scatter(
+            x=timeline_df['File_Order'],
+            y=timeline_df['Employees'],
+            mode='lines+markers',
+            name='Team Size',
+            line=dict(color='#4facfe', width=3),
+            marker=dict(size=10),
+            hovertemplate="Report: %{x}<br>Team Size: %{y}<br>Date: %{customdata}<extra></extra>",
+            customdata=timeline_df['Upload_Date']
+        ),
+        row=3, col=1
+    )
+
+    fig.update_layout(
+        height=800,
+        showlegend=False,
+        font=dict(family="Inter, sans-serif"),
+        title_text="Performance Timeline Analysis",
+        title_x=0.5
+    )
+
+    fig.update_xaxes(title_text="Report Number", row=3, col=1)
+
+    return fig
+
+
+def journey_figure(employee_data, journey, name, colors=COLORS):
+    """Output and productivity trends for one employee"""
+    fig = make_subplots(
+        rows=2, cols=1,
+        subplot_titles=(f"📊 {name}'s Output Trends", f"⭐ {name}'s Productivity Trends"),
+        vertical_spacing=0.15
+    )
+
+    output_col = journey['output_col']
+    output_label = journey['output_label']
+
+    # Plot output trends
+    if output_col:
+        fig.add_trace(
+            go.Scatter(
+                x=employee_data['File_Order'],
+                y=employee_data[output_col],
+                mode='lines+markers',
+                name=f'{output_label} Created',
+                line=dict(color='#667eea', width=3),
+                marker=dict(size=10),
+                hovertemplate=f"Report: %{{x}}<br>{output_label}: %{{y}}<extra></extra>"
+            ),
+            row=1, col=1
+        )
+
+        # Add trend line
+        if journey['trend'] is not None:
+            fig.add_trace(
+                go.Scatter(
+                    x=employee_data['File_Order'],
+                    y=journey['trend'],
+                    mode='lines',
+                    name='Trend',
+                    line=dict(color='rgba(102, 126, 234, 0.5)', width=2, dash='dash'),
+                    hoverinfo='skip'
+                ),
+                row=1, col=1
+            )
+
+    # Plot productivity trends
+    for i, col in enumerate(journey['productivity_cols']):
+        productivity_scores = pd.to_numeric(employee_data[col], errors='coerce')
+
+        fig.add_trace(
+            go.Scatter(
+                x=employee_data['File_Order'],
+                y=productivity_scores,
+                mode='lines+markers',
+                name=col.replace('Productivity', '').strip() or 'Productivity',
+                line=dict(color=colors['primary'][i % len(colors['primary'])], width=3),
+                marker=dict(size=10),
+                hovertemplate="Report: %{x}<br>Score: %{y:.1f}<extra></extra>"
+            ),
+            row=2, col=1
+        )
+
+    fig.update_layout(
+        height=700,
+        font=dict(family="Inter, sans-serif"),
+        title_text=f"{name}'s Performance Timeline",
+        title_x=0.5
+    )
+
+    fig.update_xaxes(title_text="Report Number", row=1, col=1)
+    fig.update_xaxes(title_text="Report Number", row=2, col=1)
+    fig.update_yaxes(title_text=output_label, row=1, col=1)
+    fig.update_yaxes(title_text="Productivity Score", row=2, col=1)
+
+    return fig
+
+
+def heatmap_figure(employee_names, file_orders, performance_data):
+    """Employee x report productivity heatmap"""
+    fig = go.Figure(data=go.Heatmap(
+        z=performance_data,
+        x=[f'Report {i}' for i in file_orders],
+        y=employee_names,
+        colorscale='RdYlBu_r',
+        zmid=3,  # Middle value for color scale
+        zmin=1,
+        zmax=5,
+        colorbar=dict(title="Productivity Score"),
+        hoverongaps=False,
+        hovertemplate="Employee: %{y}<br>Report: %{x}<br>Score: %{z:.1f}<extra></extra>"
+    ))
+
+    fig.update_layout(
+        title="Employee Productivity Heatmap Across All Reports",
+        height=max(400, len(employee_names) * 30),
+        font=dict(family="Inter, sans-serif")
+    )
+
+    return fig
+
+
+def rankings_figure(rankings_df, colors=COLORS):
+    """Top 10 long-term performers by comprehensive score"""
+    fig = px.bar(
+        rankings_df.head(10),
+        x='Comprehensive_Score',
+        y='Name',
+        color='Role',
+        orientation='h',
+        title="🏆 Top 10 Long-term Performers",
+        color_discrete_sequence=colors['primary'],
+        hover_data=['Total_Output', 'Avg_Productivity', 'Total_Reports']
+    )
+
+    fig.update_layout(
+        height=600,
+        font=dict(family="Inter, sans-serif"),
+        yaxis={'categoryorder': 'total ascending'}
+    )
+
+    return fig
+
+
+def rankings_table(rankings_df):
+    """Display-ready rankings table with medals"""
+    display_rankings = rankings_df[['Rank', 'Name', 'Role', 'Total_Reports', 'Total_Output', 'Avg_Productivity',
+                                    'Comprehensive_Score']].copy()
+    display_rankings['Avg_Productivity'] = display_rankings['Avg_Productivity'].round(2)
+    display_rankings['Comprehensive_Score'] = display_rankings['Comprehensive_Score'].round(1)
+
+    # Add medals
+    display_rankings['Medal'] = display_rankings['Rank'].map({1: '🥇', 2: '🥈', 3: '🥉'}).fillna('')
+
+    display_rankings = display_rankings[
+        ['Rank', 'Medal', 'Name', 'Role', 'Total_Reports', 'Total_Output', 'Avg_Productivity',
+         'Comprehensive_Score']]
+    display_rankings.columns = ['Rank', 'Medal', 'Employee', 'Role', 'Reports', 'Output', 'Avg Productivity',
+                                'Score']
+    return display_rankings
+
+
+def client_workload_figure(workload, colors=COLORS, top=15):
+    """Employee-weeks per client for the busiest clients, shaded by single-person concentration"""
+    top_clients = workload.head(top)
+    fig = px.bar(
+        top_clients,
+        x='Employee_Weeks',
+        y='Client',
+        orientation='h',
+        color='Concentration',
+        color_continuous_scale=[colors['primary'][4], colors['primary'][3]],
+        range_color=(0, 1),
+        title=f"🤝 Top {len(top_clients)} Clients by Workload",
+        hover_data=['Employees', 'Reports', 'Top_Employee']
+    )
+
+    fig.update_layout(
+        height=max(400, len(top_clients) * 32),
+        font=dict(family="Inter, sans-serif"),
+        yaxis={'categoryorder': 'total ascending'},
+        xaxis_title="Employee-weeks"
+    )
+
+    return fig
+
+
+def client_churn_figure(churn, colors=COLORS):
+    """New and lost clients per report with the number of active clients"""
+    reports = [f'Report {i}' for i in churn['File_Order']]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=reports, y=churn['New'], name='New', marker_color=colors['primary'][4]))
+    fig.add_trace(go.Bar(x=reports, y=-churn['Lost'], name='Lost', marker_color=colors['primary'][3],
+                         customdata=churn['Lost'], hovertemplate="%{x}<br>Lost: %{customdata}<extra></extra>"))
+    fig.add_trace(go.Scatter(x=reports, y=churn['Active'], name='Active', mode='lines+markers',
+                             line=dict(color=colors['primary'][0], width=3)))
+
+    fig.update_layout(
+        title="🔄 Client Churn Over Time",
+        barmode='relative',
+        height=450,
+        font=dict(family="Inter, sans-serif"),
+        yaxis_title="Clients"
+    )
+
+    return fig
+
+def team_output_figure(team_table, colors=COLORS):
+    """Output per period stacked by team"""
+    fig = px.bar(
+        team_table,
+        x='Period',
+        y='Output',
+        color='Team',
+        title="👥 Output by Team",
+        color_discrete_sequence=colors['primary'],
+        hover_data=['Employee_Weeks', 'Avg_Productivity', 'Issues']
+    )
+
+    fig.update_layout(
+        height=450,
+        font=dict(family="Inter, sans-serif"),
+        barmode='stack'
+    )
+
+    return fig
+
+
+def team_rollup_table(table, leading=()):
+    """Display-ready team rollup rows, in the order given"""
+    leading = list(leading)
+    display_table = table[
+        leading + ['Period', 'Employee_Weeks', 'Output', 'Output_per_Employee', 'Avg_Productivity', 'Issues']
+    ].copy()
+    display_table['Period'] = display_table['Period'].dt.strftime('%Y-%m-%d')
+    display_table.columns = leading + ['Period', 'Employee-Weeks', 'Output', 'Output / Employee-Week',
+                                       'Avg Productivity', 'Issues']
+    return display_table
+
+
+def forecast_figure(history, forecast, lower, upper, title, colors=COLORS):
+    """Output per report with the forecast and its 95% band"""
+    past = [f'Report {i}' for i in history.index]
+    future = [f'+{step}' for step in forecast.index]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=future + future[::-1], y=list(upper) + list(lower)[::-1], fill='toself',
+                             fillcolor='rgba(240, 147, 251, 0.2)', line=dict(width=0), name='95% band',
+                             hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=past, y=history, name='Actual', mode='lines+markers',
+                             line=dict(color=colors['primary'][0], width=3)))
+    fig.add_trace(go.Scatter(x=past[-1:] + future, y=list(history.iloc[-1:]) + list(forecast), name='Forecast',
+                             mode='lines+markers', line=dict(color=colors['primary'][3], width=3, dash='dash')))
+
+    fig.update_layout(
+        title=title,
+        height=400,
+        font=dict(family="Inter, sans-serif"),
+        yaxis_title="Output"
+    )
+
+    return fig
+
+
+def capacity_plan_table(capacity):
+    """Display-ready capacity plan per role"""
+    display_capacity = capacity[['Role', 'Recent_Output', 'Forecast_Output', 'Change_Pct', 'Headcount',
+                                 'Output_per_Employee', 'Implied_Headcount']].round(1)
+    display_capacity.columns = ['Role', 'Recent Output / Week', 'Forecast Output / Week', 'Change %', 'Headcount',
+                                'Output / Employee', 'Implied Headcount']
+    return display_capacity
+
+
+def kpi_cards(metrics):
+    """Title, headline and caption for each of the four KPI cards (None when absent)"""
+    cards = []
+    for key, avg_key, title in [('total_videos', 'avg_videos', '🎬 Total Videos'),
+                                ('total_designs', 'avg_designs', '🎨 Total Designs'),
+                                ('total_scripts', 'avg_scripts', '📝 Total Scripts')]:
+        if key in metrics:
+            cards.append({
+                'title': title,
+                'value': f"{int(metrics[key])}",
+                'caption': f"Average: {metrics.get(avg_key, 0):.1f} per report"
+            })
+        else:
+            cards.append(None)
+
+    if 'avg_productivity' in metrics:
+        perf_level, perf_text = performance_badge(metrics['avg_productivity'])
+        cards.append({
+            'title': '⭐ Avg Productivity',
+            'value': f"{metrics['avg_productivity']:.1f}/5",
+            'caption': perf_text
+        })
+    else:
+        cards.append(None)
+
+    return cards
@@ -0,0 +1,216 @@
+"""Output forecasts per role and per employee, fitted for every series at once.
+
+Each report is reduced once to the headline output of every employee
+(videos for Video Editors, designs for Designers, ...). That Series is
+cached per report, like the productivity scores. The employees x reports
+panel and its per-role totals are smoothed with additive Holt-Winters
+(level, trend and a ``SEASON_LENGTH``-report season). All series and all
+candidate smoothing parameters run through one NumPy pass per report, and
+each series keeps the parameters with the lowest one-step-ahead error.
+
+A fitted ``ForecastModel`` is cached on the snapshot and handed to the next
+version. If that version only appends reports, the fitted series are
+advanced through the new reports with their parameters instead of being
+refit. New series are fitted on their own, and everything is refit every
+``REFIT_INTERVAL`` reports.
+
+Windows count reports, which are weekly.
+"""
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from .schema import ROLE_OUTPUT
+
+# Reports per seasonal cycle (weekly reports, so roughly a month)
+SEASON_LENGTH = 4
+ALPHAS = (0.1, 0.3, 0.5, 0.7, 0.9)
+BETAS = (0.0, 0.05, 0.2)
+GAMMAS = (0.0, 0.1, 0.3)
+REFIT_INTERVAL = 4
+FORECAST_HORIZON = 8
+RECENT_WINDOW = 4
+# Two-sided 95% band around a forecast
+BAND_Z = 1.96
+ROLE_LEVEL = 'Role'
+EMPLOYEE_LEVEL = 'Employee'
+
+
+def report_output(report_data):
+    """Headline output of each employee in one report (their role's output column), indexed by Employee_ID"""
+    if report_data.empty or 'Role' not in report_data.columns:
+        return pd.Series(dtype=float)
+
+    output = pd.Series(np.nan, index=report_data.index)
+    for role, (output_col, _) in ROLE_OUTPUT.items():
+        if output_col in report_data.columns:
+            is_role = (report_data['Role'] == role).to_numpy()
+            output[is_role] = pd.to_numeric(report_data.loc[is_role, output_col], errors='coerce')
+    return output.groupby(report_data['Employee_ID']).sum(min_count=1).dropna()
+
+
+def output_panel(report_series, roles):
+    """Series x reports output from ``{file_order: report_output(...)}``, role totals first.
+
+    Rows are indexed by (Level, Series): ``Role`` rows sum the employees of
+    each role in ``roles`` (Employee_ID -> role), ``Employee`` rows are the
+    employees themselves. Missing weeks are NaN.
+    """
+    if not report_series:
+        return pd.DataFrame(index=pd.MultiIndex.from_tuples([], names=['Level', 'Series']))
+    employees = pd.DataFrame(report_series)
+    employees = employees[sorted(employees.columns)]
+    totals = employees.groupby(employees.index.map(roles)).sum(min_count=1)
+    return pd.concat({ROLE_LEVEL: totals, EMPLOYEE_LEVEL: employees}, names=['Level', 'Series'])
+
+
+def _start_state(series, candidates):
+    return {
+        'level': np.full((series, candidates), np.nan),
+        'trend': np.zeros((series, candidates)),
+        'season': np.zeros((series, candidates, SEASON_LENGTH)),
+        'started': np.zeros((series, candidates), dtype=bool),
+        'sse': np.zeros((series, candidates)),
+        'count': np.zeros((series, candidates)),
+        'step': 0,
+    }
+
+
+def _smooth(values, alpha, beta, gamma, state):
+    """Run the Holt-Winters recursions over ``values`` (series x reports) from ``state``.
+
+    ``alpha``, ``beta`` and ``gamma`` broadcast against the (series,
+    candidates) state arrays, so every parameter combination of every series
+    is updated together. A series starts at its first observation; missing
+    reports carry the level along the trend. Returns the new state.
+    """
+    state = {key: value.copy() if isinstance(value, np.ndarray) else value for key, value in state.items()}
+    level, trend, season = state['level'], state['trend'], state['season']
+    started, sse, count = state['started'], state['sse'], state['count']
+
+    with np.errstate(invalid='ignore'):
+        for t in range(values.shape[1]):
+            y = values[:, t][:, None]
+            observed = ~np.isnan(y)
+            slot = (state['step'] + t) % SEASON_LENGTH
+            seasonal = season[:, :, slot]
+
+            update = observed & started
+            error = np.where(update, y - (level + trend + seasonal), 0.0)
+            sse += error ** 2
+            count += update
+
+            new_level = alpha * (y - seasonal) + (1 - alpha) * (level + trend)
+            new_level = np.where(update, new_level, np.where(started, level + trend, np.where(observed, y, level)))
+            trend[:] = np.where(update, beta * (new_level - level) + (1 - beta) * trend, trend)
+            season[:, :, slot] = np.where(update, gamma * (y - new_level) + (1 - gamma) * seasonal, seasonal)
+            level[:] = new_level
+            started |= observed
+
+    state['step'] += values.shape[1]
+    return state
+
+
+def _fit(values):
+    """Best parameters and final state of every series, searched over the whole parameter grid at once"""
+    grid = np.array(list(product(ALPHAS, BETAS, GAMMAS)))
+    alpha, beta, gamma = (grid[:, i][None, :] for i in range(3))
+    state = _smooth(values, alpha, beta, gamma, _start_state(len(values), len(grid)))
+
+    # Mean one-step error; trends and seasons need two full cycles before they can be trusted
+    score = np.where(state['count'] > 0, state['sse'] / np.maximum(state['count'], 1), 0.0)
+    score = np.where(((beta > 0) | (gamma > 0)) & (state['count'] < 2 * SEASON_LENGTH), np.inf, score)
+    best = score.argmin(axis=1)[:, None]
+
+    chosen = {key: np.take_along_axis(value, best if value.ndim == 2 else best[:, :, None], axis=1)
+              for key, value in state.items() if isinstance(value, np.ndarray)}
+    chosen['step'] = state['step']
+    chosen['params'] = grid[best[:, 0]]
+    return chosen
+
+
+def _advance(model_state, values):
+    params = model_state['params']
+    state = _smooth(values, params[:, [0]], params[:, [1]], params[:, [2]],
+                    {key: value for key, value in model_state.items() if key != 'params'})
+    state['params'] = params
+    return state
+
+
+class ForecastModel:
+    """Fitted Holt-Winters state of every series in an output panel"""
+
+    def __init__(self, index, state, sources, refit_at):
+        self.index = index
+        self.state = state
+        # Per-report output Series the model has seen, to tell an append from any other change
+        self.sources = sources
+        self.refit_at = refit_at
+
+    @classmethod
+    def fit(cls, panel, sources, previous=None):
+        """Model of ``panel``, advanced from ``previous`` when the panel only gained reports"""
+        values = panel.to_numpy(dtype=float)
+        seen = len(previous.sources) if previous is not None else 0
+        warm = (previous is not None and 0 < seen <= len(sources)
+                and all(a is b for a, b in zip(previous.sources, sources))
+                and len(sources) - previous.refit_at < REFIT_INTERVAL)
+        if not warm:
+            return cls(panel.index, _fit(values), sources, len(sources))
+
+        known = panel.index.isin(previous.index)
+        positions = previous.index.get_indexer(panel.index[known])
+        state = _advance({key: value[positions] if isinstance(value, np.ndarray) else value
+                          for key, value in previous.state.items()}, values[known, seen:])
+        if not known.all():
+            fresh = _fit(values[~known])
+            order = np.argsort(np.concatenate([np.flatnonzero(known), np.flatnonzero(~known)]))
+            state = {key: np.concatenate([value, fresh[key]])[order] if isinstance(value, np.ndarray) else value
+                     for key, value in state.items()}
+        return cls(panel.index, state, sources, previous.refit_at)
+
+    def params(self):
+        return pd.DataFrame(self.state['params'], index=self.index, columns=['Alpha', 'Beta', 'Gamma'])
+
+    def forecast(self, horizon=FORECAST_HORIZON):
+        """Forecast, lower and upper band for the next ``horizon`` reports, each series x steps"""
+        steps = np.arange(1, horizon + 1)
+        slots = (self.state['step'] + steps - 1) % SEASON_LENGTH
+        level, trend = self.state['level'], self.state['trend']
+        point = level + trend * steps[None, :] + self.state['season'][:, 0, slots]
+
+        count = self.state['count']
+        sigma = np.sqrt(np.where(count > 0, self.state['sse'] / np.maximum(count, 1), np.nan))
+        spread = BAND_Z * sigma * np.sqrt(steps)[None, :]
+
+        frame = lambda values: pd.DataFrame(np.clip(values, 0, None), index=self.index, columns=steps)
+        return {'forecast': frame(point), 'lower': frame(point - spread), 'upper': frame(point + spread)}
+
+
+def capacity_table(panel, forecasts, roles):
+    """Recent and forecast output per role, with the headcount the forecast implies.
+
+    ``Implied_Headcount`` is the number of people needed to produce the
+    forecast at the role's recent output per employee.
+    """
+    levels = panel.index.get_level_values('Level')
+    if ROLE_LEVEL not in levels or EMPLOYEE_LEVEL not in levels:
+        return pd.DataFrame()
+
+    totals = panel.loc[ROLE_LEVEL]
+    employees = panel.loc[EMPLOYEE_LEVEL]
+    # Employees reporting in each role, per report
+    headcounts = employees.notna().groupby(employees.index.map(roles)).sum().reindex(totals.index)
+    recent = totals.iloc[:, -RECENT_WINDOW:]
+
+    table = pd.DataFrame(index=totals.index)
+    table['Recent_Output'] = recent.mean(axis=1)
+    table['Forecast_Output'] = forecasts['forecast'].loc[ROLE_LEVEL].mean(axis=1)
+    recent_output = table['Recent_Output'].where(table['Recent_Output'] > 0)
+    table['Change_Pct'] = (table['Forecast_Output'] / recent_output - 1) * 100
+    table['Headcount'] = headcounts.iloc[:, -1]
+    recent_heads = headcounts.iloc[:, -RECENT_WINDOW:].sum(axis=1)
+    table['Output_per_Employee'] = recent.sum(axis=1) / recent_heads.where(recent_heads > 0)
+    table['Implied_Headcount'] = table['Forecast_Output'] / table['Output_per_Employee']
+    return table.rename_axis('Role').reset_index()
@@ -0,0 +1,271 @@
+"""Employee identity resolution: one timeline per person.
+
+``clean_data`` builds ``Employee_ID`` from the name and role exactly as
+typed, so ``"jane  doe"`` and ``"Jane Doe"`` or a role change split one
+person into several timelines. The ``IdentityIndex`` interns every
+(normalized name, role) alias to an integer person ID and rewrites
+``Employee_ID`` to that person's canonical form, so casing, spacing and
+accent differences resolve on their own. Typos and role changes are
+suggested by ``candidates`` and merged on request; a merge just points the
+aliases at another person. ``merges`` lists the merges made so far and
+``restore_merges`` winds them back or replays them, so a store can undo a
+merge together with its timeline change. Names are compared only within character
+trigram blocks, so thousands of employees never cost n² comparisons.
+
+The alias table can be saved to a JSON file. Later uploads resolve through
+it with one dictionary lookup per distinct name and role.
+"""
+import os
+import threading
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from .jsonio import read_json, write_json
+
+MATCH_THRESHOLD = 0.85
+MIN_WORD_SIMILARITY = 0.75
+NGRAM_SIZE = 3
+# Trigrams shared by more names than this say nothing about a match
+MAX_BLOCK_SIZE = 200
+# Share of trigrams (Dice) two names need in common before they are compared at all
+MIN_SHARED_NGRAMS = 0.5
+ALIAS_FORMAT = 1
+
+
+def normalize_names(names):
+    """Matching key of each name: accents dropped, case-folded, punctuation and extra spaces removed"""
+    return (pd.Series(names, dtype=object).fillna('').astype(str)
+            .str.normalize('NFKD').str.replace(r'[\u0300-\u036f]', '', regex=True)
+            .str.casefold().str.replace(r'[\W_]+', ' ', regex=True).str.strip())
+
+
+def _display(text):
+    return ' '.join(str(text).split())
+
+
+def _ngrams(key):
+    padded = f" {key} "
+    return {padded[i:i + NGRAM_SIZE] for i in range(max(1, len(padded) - NGRAM_SIZE + 1))}
+
+
+def _similarity(a, b):
+    """Edit similarity of two keys, in either word order; 0 when any word is too different"""
+    best = 0.0
+    for words_a, words_b in ((a.split(), b.split()), (sorted(a.split()), sorted(b.split()))):
+        # A shared surname alone doesn't make two people the same
+        if len(words_a) == len(words_b) and any(SequenceMatcher(None, x, y).ratio() < MIN_WORD_SIMILARITY
+                                                for x, y in zip(words_a, words_b)):
+            continue
+        best = max(best, SequenceMatcher(None, ' '.join(words_a), ' '.join(words_b)).ratio())
+    return best
+
+
+class IdentityIndex:
+    """Aliases (normalized name, role) -> integer person ID, with a canonical Employee_ID per person"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._people = []
+        self._aliases = {}
+        self._canonical = {}
+        self._merges = ()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        """Index backed by the alias table at ``path`` (empty if the file doesn't exist yet)"""
+        index = cls(path)
+        if os.path.exists(path):
+            table = read_json(path)
+            for alias in table['aliases']:
+                index._aliases[(alias['alias_name'], alias['alias_role'])] = index._person(alias['name'],
+                                                                                          alias['role'])
+        return index
+
+    def save(self, path=None):
+        path = path or self.path
+        with self._lock:
+            aliases = [{'alias_name': name_key, 'alias_role': role_key,
+                        'name': self._people[person]['name'], 'role': self._people[person]['role']}
+                       for (name_key, role_key), person in self._aliases.items()]
+        with self._save_lock:
+            temp_path = f"{path}.tmp"
+            write_json(temp_path, {'format': ALIAS_FORMAT, 'aliases': aliases})
+            os.replace(temp_path, path)
+
+    def __len__(self):
+        return len(self._people)
+
+    def _person(self, name, role):
+        """ID of the person shown as ``name (role)``, created if needed (lock held by caller)"""
+        key = (name, role)
+        if key not in self._canonical:
+            self._canonical[key] = len(self._people)
+            self._people.append({'name': name, 'role': role, 'employee_id': f"{name} ({role})"})
+        return self._canonical[key]
+
+    def resolve(self, names, roles):
+        """Person ID of every (name, role) pair, adding people for unseen aliases"""
+        names = pd.Series(names, dtype=object).fillna('').astype(str).reset_index(drop=True)
+        roles = pd.Series(roles, dtype=object).fillna('').astype(str).reset_index(drop=True)
+        if names.empty:
+            return np.array([], dtype=np.int64)
+
+        # Only distinct pairs are normalized and looked up
+        codes, distinct = pd.factorize(pd.MultiIndex.from_arrays([names, roles]))
+        distinct_names = pd.Series(distinct.get_level_values(0), dtype=object)
+        distinct_roles = pd.Series(distinct.get_level_values(1), dtype=object)
+        name_keys = normalize_names(distinct_names).to_numpy()
+        role_keys = distinct_roles.str.strip().str.casefold().to_numpy()
+
+        added = False
+        with self._lock:
+            people = np.empty(len(distinct), dtype=np.int64)
+            for i, alias in enumerate(zip(name_keys, role_keys)):
+                person = self._aliases.get(alias)
+                if person is None:
+                    person = self._person(_display(distinct_names[i]), _display(distinct_roles[i]))
+                    self._aliases[alias] = person
+                    added = True
+                people[i] = person
+        if added and self.path:
+            self.save()
+        return people[codes]
+
+    def lookup(self, names, roles):
+        """Employee_ID each (name, role) pair would resolve to, without adding unseen aliases"""
+        names = pd.Series(names, dtype=object).fillna('').astype(str).reset_index(drop=True)
+        roles = pd.Series(roles, dtype=object).fillna('').astype(str).reset_index(drop=True)
+        if names.empty:
+            return np.array([], dtype=object)
+
+        codes, distinct = pd.factorize(pd.MultiIndex.from_arrays([names, roles]))
+        distinct_names = pd.Series(distinct.get_level_values(0), dtype=object)
+        distinct_roles = pd.Series(distinct.get_level_values(1), dtype=object)
+        name_keys = normalize_names(distinct_names).to_numpy()
+        role_keys = distinct_roles.str.strip().str.casefold().to_numpy()
+
+        with self._lock:
+            ids = np.empty(len(distinct), dtype=object)
+            for i, alias in enumerate(zip(name_keys, role_keys)):
+                shown = (_display(distinct_names[i]), _display(distinct_roles[i]))
+                person = self._aliases.get(alias, self._canonical.get(shown))
+                ids[i] = self._people[person]['employee_id'] if person is not None else f"{shown[0]} ({shown[1]})"
+        return ids[codes]
+
+    def employee_ids(self, people):
+        """Canonical Employee_ID of each person ID"""
+        with self._lock:
+            ids = np.array([entry['employee_id'] for entry in self._people], dtype=object)
+        return ids[np.asarray(people, dtype=np.int64)]
+
+    def apply(self, cleaned):
+        """``cleaned`` with Employee_ID, Name and Role set to each row's resolved person"""
+        if cleaned.empty or 'Name' not in cleaned.columns or 'Role' not in cleaned.columns:
+            return cleaned
+        people = self.resolve(cleaned['Name'], cleaned['Role'])
+        with self._lock:
+            names = np.array([entry['name'] for entry in self._people], dtype=object)
+            roles = np.array([entry['role'] for entry in self._people], dtype=object)
+        return cleaned.assign(Employee_ID=self.employee_ids(people), Name=names[people], Role=roles[people])
+
+    def merge(self, source_id, target_id):
+        """Resolve every alias of ``source_id`` to ``target_id`` from now on"""
+        with self._lock:
+            by_id = {entry['employee_id']: person for person, entry in enumerate(self._people)
+                     if 'merged_into' not in entry}
+            if source_id not in by_id or target_id not in by_id:
+                raise KeyError(f"Unknown employee: {source_id if source_id not in by_id else target_id}")
+            source, target = by_id[source_id], by_id[target_id]
+            if source == target:
+                raise ValueError("An employee can't be merged into itself")
+
+            merge = (source, target, tuple(key for key, person in self._aliases.items() if person == source),
+                     tuple(key for key, person in self._canonical.items() if person == source))
+            self._redo(merge)
+            self._merges += (merge,)
+        if self.path:
+            self.save()
+
+    @property
+    def merges(self):
+        """Merges made so far, oldest first; pass to ``restore_merges`` to return to them"""
+        return self._merges
+
+    def restore_merges(self, merges):
+        """Undo the merges made since ``merges`` was taken and replay the ones it has that were undone"""
+        with self._lock:
+            if merges == self._merges:
+                return
+            kept = 0
+            while kept < min(len(merges), len(self._merges)) and merges[kept] is self._merges[kept]:
+                kept += 1
+            for merge in reversed(self._merges[kept:]):
+                self._undo(merge)
+            for merge in merges[kept:]:
+                self._redo(merge)
+            self._merges = tuple(merges)
+        if self.path:
+            self.save()
+
+    def _redo(self, merge):
+        source, target, aliases, canonical = merge
+        for key in aliases:
+            self._aliases[key] = target
+        for key in canonical:
+            self._canonical[key] = target
+        self._people[source]['merged_into'] = target
+
+    def _undo(self, merge):
+        source, _, aliases, canonical = merge
+        for key in aliases:
+            self._aliases[key] = source
+        for key in canonical:
+            self._canonical[key] = source
+        self._people[source].pop('merged_into', None)
+
+    def candidates(self, employee_ids=None, threshold=MATCH_THRESHOLD):
+        """Pairs of people that are probably the same person, best match first.
+
+        Only names sharing a character trigram are compared. Returns
+        Employee_ID, Match, Score and Reason columns.
+        """
+        with self._lock:
+            people = [entry for entry in self._people if 'merged_into' not in entry]
+        if employee_ids is not None:
+            wanted = set(employee_ids)
+            people = [entry for entry in people if entry['employee_id'] in wanted]
+        keys = normalize_names([entry['name'] for entry in people]).tolist()
+
+        grams = [_ngrams(key) for key in keys]
+        blocks = defaultdict(list)
+        for position, key_grams in enumerate(grams):
+            for gram in key_grams:
+                blocks[gram].append(position)
+        shared = Counter()
+        for members in blocks.values():
+            if len(members) <= MAX_BLOCK_SIZE:
+                shared.update(combinations(members, 2))
+
+        matches = []
+        for (a, b), count in shared.items():
+            if 2 * count < MIN_SHARED_NGRAMS * (len(grams[a]) + len(grams[b])):
+                continue
+            score = 1.0 if keys[a] == keys[b] else _similarity(keys[a], keys[b])
+            if score < threshold:
+                continue
+            if keys[a] == keys[b]:
+                reason = "Same name, different role"
+            elif people[a]['role'] == people[b]['role']:
+                reason = "Similar name"
+            else:
+                reason = "Similar name, different role"
+            matches.append((people[a]['employee_id'], people[b]['employee_id'], round(score, 3), reason))
+
+        result = pd.DataFrame(matches, columns=['Employee_ID', 'Match', 'Score', 'Reason'])
+        return result.sort_values(['Score', 'Employee_ID'], ascending=[False, True]).reset_index(drop=True)
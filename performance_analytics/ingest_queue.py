@@ -0,0 +1,145 @@
+"""Background ingestion of uploaded reports.
+
+Uploads are read and cleaned on worker threads, so the script run that
+received the file returns straight away. Each job commits its report to the
+shared store in one step and in submission order, so viewers keep the last
+committed snapshot until the new report is complete.
+"""
+import io
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from .cleaning import clean_data
+from .schema import ROLES
+from .shared import content_hash
+from .validation import Quarantine, number_rows, report_warnings, validate_report, warning_counts
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+DUPLICATE = 'duplicate'
+EMPTY = 'empty'
+FAILED = 'failed'
+QUARANTINED = 'quarantined'
+FINISHED = (DONE, DUPLICATE, EMPTY, FAILED, QUARANTINED)
+
+
+class IngestQueue:
+    """Job queue that cleans uploads off the UI thread for every session"""
+
+    def __init__(self, shared, workers=2, keep=200, quarantine=None, roles=ROLES):
+        self.shared = shared
+        self.quarantine = quarantine if quarantine is not None else Quarantine()
+        self.keep = keep
+        # Roles loaded without a warning (None for any)
+        self.roles = roles
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ingest')
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._last_commit = threading.Event()
+        self._last_commit.set()
+
+    def submit(self, payload, name=None, digest=None):
+        """Queue the bytes of a CSV upload; returns the job id"""
+        digest = digest or content_hash(payload)
+        committed = threading.Event()
+
+        with self._lock:
+            job = {
+                'id': next(self._ids),
+                'name': name,
+                'digest': digest,
+                'status': QUEUED,
+                'message': "Waiting for a worker",
+                'rows': 0,
+                'employees': 0,
+                'quarantined': 0,
+                'warnings': [],
+                'submitted': datetime.now(),
+                'finished': None,
+            }
+            self._jobs[job['id']] = job
+            previous_commit, self._last_commit = self._last_commit, committed
+            self._prune()
+
+        self._pool.submit(self._run, job, payload, previous_commit, committed)
+        return job['id']
+
+    def jobs(self, job_ids):
+        """Copies of the given jobs (unknown or pruned ids are skipped)"""
+        with self._lock:
+            return [dict(self._jobs[job_id]) for job_id in job_ids if job_id in self._jobs]
+
+    def _run(self, job, payload, previous_commit, committed):
+        try:
+            job.update(status=RUNNING, message="Cleaning")
+            if self.shared.has_content(job['digest']):
+                job.update(status=DUPLICATE, message="This report is already loaded on the server")
+                return
+
+            job['message'] = "Validating"
+            snapshot = self.shared.snapshot()
+            valid, rejected = validate_report(number_rows(pd.read_csv(io.BytesIO(payload))),
+                                              snapshot.employee_weeks(), self.shared.identities)
+            if valid.empty:
+                self._reject(job, rejected)
+                return
+
+            job['message'] = "Cleaning"
+            new_data = clean_data(valid.reset_index(drop=True), 0, job['submitted'])
+
+            # Clean in parallel, but append in the order files were uploaded
+            job['message'] = "Waiting for earlier uploads"
+            previous_commit.wait()
+
+            # Uploads committed in the meantime may already cover some of these weeks
+            latest = self.shared.snapshot()
+            if latest.version != snapshot.version:
+                kept, repeated = validate_report(valid, latest.employee_weeks(), self.shared.identities)
+                if not repeated.empty:
+                    new_data = new_data[valid.index.isin(kept.index)].reset_index(drop=True)
+                    rejected = pd.concat([rejected, repeated]).sort_index()
+                    if kept.empty:
+                        self._reject(job, rejected)
+                        return
+                    valid = kept
+
+            job['quarantined'] = len(rejected)
+            job['warnings'] = warning_counts(report_warnings(valid, self.roles))
+            label = f"Uploaded {job['name']}" if job['name'] else None
+            new_data = self.shared.commit(new_data, job['digest'], job['submitted'], label)
+            if new_data is None:
+                job.update(status=DUPLICATE, message="This report is already loaded on the server")
+                return
+
+            self.quarantine.add(job['name'], rejected, int(new_data['File_Order'].iat[0]))
+            employees = new_data['Employee_ID'].nunique()
+            job.update(status=DONE, rows=len(new_data), employees=employees,
+                       message=f"New data added: {len(new_data)} records from {employees} employees")
+        except Exception as e:
+            job.update(status=FAILED, message=f"Error processing file: {str(e)}")
+        finally:
+            job['finished'] = datetime.now()
+            previous_commit.wait()
+            committed.set()
+
+    def _reject(self, job, rejected):
+        """Finish a job none of whose rows passed validation"""
+        job['quarantined'] = len(rejected)
+        if rejected.empty:
+            job.update(status=EMPTY, message="No valid data found in the uploaded file")
+        else:
+            self.quarantine.add(job['name'], rejected)
+            job.update(status=QUARANTINED,
+                       message=f"All {len(rejected)} rows failed validation and were quarantined")
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in FINISHED]
+        for job_id in finished[:max(0, len(self._jobs) - self.keep)]:
+            del self._jobs[job_id]
+
@@ -0,0 +1,27 @@
+"""JSON files written by the engine: snapshot manifests, KPIs and alias tables"""
+import json
+
+import numpy as np
+
+
+def to_builtin(value):
+    """Convert NumPy scalars/arrays inside metric dicts to JSON types"""
+    if isinstance(value, dict):
+        return {key: to_builtin(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_builtin(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def write_json(path, payload):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(to_builtin(payload), handle, indent=2, default=str)
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
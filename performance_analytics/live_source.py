@@ -0,0 +1,291 @@
+"""Incremental sync from a live, sheet-like CSV source.
+
+    DASHBOARD_LIVE_SOURCE="https://docs.google.com/spreadsheets/d/<id>/export?format=csv" \\
+        streamlit run performance_dashboard.py
+
+A source is any object with ``fetch()`` returning the sheet as a raw
+DataFrame, or None when it has not changed since the previous fetch, and
+``reset()`` to forget what it has seen. ``LiveSync`` diffs each fetch
+against the previous one by row hash, cleans only the new or edited rows and
+applies them to the shared store as one report per week, so weeks that did
+not change keep their reports and cached aggregates.
+"""
+import io
+import os
+import threading
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .cleaning import clean_data
+from .shared import content_hash
+
+UNDATED_WEEK = 'undated'
+
+
+def google_sheet_csv_url(sheet_id, gid=0):
+    """CSV export URL of one tab of a Google Sheet shared by link"""
+    return f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
+
+
+class CsvFileSource:
+    """A CSV file on disk; the file is only re-read when its size or mtime changes"""
+
+    def __init__(self, path):
+        self.path = path
+        self.reset()
+
+    def __str__(self):
+        return self.path
+
+    def reset(self):
+        self._signature = None
+        self._digest = None
+
+    def fetch(self):
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return None
+
+        with open(self.path, 'rb') as handle:
+            payload = handle.read()
+        self._signature = signature
+
+        digest = content_hash(payload)
+        if digest == self._digest:
+            return None
+        self._digest = digest
+        return pd.read_csv(io.BytesIO(payload))
+
+
+class HttpCsvSource:
+    """A CSV served over HTTP, polled with conditional requests (ETag / Last-Modified)"""
+
+    def __init__(self, url, timeout=30):
+        self.url = url
+        self.timeout = timeout
+        self.reset()
+
+    def __str__(self):
+        return self.url
+
+    def reset(self):
+        self._validators = {}
+        self._digest = None
+
+    def fetch(self):
+        request = urllib.request.Request(self.url, headers=self._validators)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = response.read()
+                headers = response.headers
+        except urllib.error.HTTPError as error:
+            if error.code == 304:
+                return None
+            raise
+
+        self._validators = {}
+        if headers.get('ETag'):
+            self._validators['If-None-Match'] = headers['ETag']
+        if headers.get('Last-Modified'):
+            self._validators['If-Modified-Since'] = headers['Last-Modified']
+
+        # Not every server honours the validators, so compare the bytes too
+        digest = content_hash(payload)
+        if digest == self._digest:
+            return None
+        self._digest = digest
+        return pd.read_csv(io.BytesIO(payload))
+
+
+def open_source(spec):
+    """Source for a URL or a local path"""
+    if spec.startswith(('http://', 'https://')):
+        return HttpCsvSource(spec)
+    return CsvFileSource(spec)
+
+
+def row_keys(raw):
+    """Identity of each raw row: its content hash plus its occurrence among identical rows"""
+    hashes = pd.util.hash_pandas_object(raw, index=False)
+    occurrence = hashes.groupby(hashes).cumcount()
+    return list(zip(hashes.to_numpy().tolist(), occurrence.to_numpy().tolist()))
+
+
+def week_keys(cleaned):
+    """The week each cleaned row belongs to, as YYYY-MM-DD of its week start"""
+    if 'Week Start Date' not in cleaned.columns:
+        return np.full(len(cleaned), UNDATED_WEEK, dtype=object)
+    return cleaned['Week Start Date'].dt.strftime('%Y-%m-%d').fillna(UNDATED_WEEK).to_numpy()
+
+
+class LiveSync:
+    """Keeps a ``SharedDataStore`` in step with a live source, one report per week.
+
+    Cleaning is row-local, so cleaning only the changed rows gives the same
+    result as re-cleaning the whole sheet. An edited row shows up as one
+    removed and one added row. ``start`` polls on one background thread;
+    sessions only read the status, so the source is fetched once per
+    interval however many pages are open.
+    """
+
+    def __init__(self, source, shared, interval=60):
+        self.source = source
+        self.shared = shared
+        self.interval = interval
+        self.last_sync = None
+        self.last_result = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._owned = set()  # file orders this sync ever created
+        self._stale = []
+        self._reset()
+
+    def _reset(self):
+        # After a rollback some of our reports may be back (or still there):
+        # drop them with the next change and rebuild from the sheet
+        present = {report['file_order'] for report in self.shared.snapshot().reports}
+        self._stale = sorted(self._owned & present)
+        self._columns = None
+        self._row_weeks = {}  # row key -> week
+        self._weeks = {}  # week -> {'file_order', 'data', 'keys'}
+        self._generation = self.shared.generation
+        self.source.reset()
+
+    def is_due(self, now=None):
+        now = now or datetime.now()
+        return self.last_sync is None or (now - self.last_sync).total_seconds() >= self.interval
+
+    def poll(self, force=False):
+        """Sync when the interval has elapsed (or ``force``); errors are kept in ``last_error``"""
+        if not force and not self.is_due():
+            return None
+        try:
+            return self.sync(only_if_due=not force)
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            return None
+
+    def start(self):
+        """Poll on a background thread every ``interval`` seconds"""
+        self._thread = threading.Thread(target=self._run, name='live-sync', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(self.interval)
+
+    def sync(self, upload_time=None, only_if_due=False):
+        """Poll the source once and apply the rows that changed since the last sync.
+
+        With ``only_if_due``, returns None when another caller synced within
+        the interval while this one waited for the lock.
+        """
+        with self._lock:
+            if only_if_due and not self.is_due():
+                return None
+            # Start over if someone cleared or rolled back the store since the last sync
+            if self.shared.generation != self._generation:
+                self._reset()
+
+            self.last_sync = datetime.now()
+            raw = self.source.fetch()
+            result = self._apply(raw, upload_time or self.last_sync) if raw is not None else _empty_result()
+            self.last_result = result
+            self.last_error = None
+            return result
+
+    def _apply(self, raw, upload_time):
+        result = _empty_result()
+        keys = row_keys(raw)
+
+        if self._columns is not None and list(raw.columns) != self._columns:
+            # New headers change how every row cleans: replace everything
+            removed = set(self._row_weeks)
+            is_new = np.ones(len(raw), dtype=bool)
+        else:
+            current = set(keys)
+            removed = {key for key in self._row_weeks if key not in current}
+            is_new = np.fromiter((key not in self._row_weeks for key in keys), dtype=bool, count=len(keys))
+        self._columns = list(raw.columns)
+
+        if not removed and not is_new.any() and not self._stale:
+            return result
+
+        new_keys = [key for key, new in zip(keys, is_new) if new]
+        cleaned = clean_data(raw[is_new], 0, upload_time).reset_index(drop=True) if is_new.any() else None
+        if cleaned is not None and 'Employee_ID' not in cleaned.columns:
+            raise ValueError("Live source has no Name and Role columns")
+        new_weeks = week_keys(cleaned) if cleaned is not None else np.array([], dtype=object)
+
+        affected = {self._row_weeks[key] for key in removed} | set(new_weeks)
+        replaced, added, added_weeks, removed_orders = {}, [], [], list(self._stale)
+        updated = {}
+
+        for week in sorted(affected):
+            entry = self._weeks.get(week)
+            frames, keys_in_week = [], []
+
+            if entry is not None:
+                keep = np.fromiter((key not in removed for key in entry['keys']), dtype=bool,
+                                   count=len(entry['keys']))
+                frames.append(entry['data'][keep])
+                keys_in_week.extend(key for key, kept in zip(entry['keys'], keep) if kept)
+
+            in_week = new_weeks == week
+            if in_week.any():
+                frames.append(cleaned[in_week])
+                keys_in_week.extend(key for key, new in zip(new_keys, in_week) if new)
+
+            data = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0].reset_index(drop=True)
+            updated[week] = (data, keys_in_week)
+
+            if entry is None:
+                added.append(data)
+                added_weeks.append(week)
+            elif data.empty:
+                removed_orders.append(entry['file_order'])
+            else:
+                replaced[entry['file_order']] = data
+
+        added_orders = self.shared.apply_delta(replaced, added, removed_orders, upload_time,
+                                               f"Live sync from {self.source}")
+        file_orders = dict(zip(added_weeks, added_orders))
+        self._owned.update(added_orders)
+        self._stale = []
+
+        for week, (data, keys_in_week) in updated.items():
+            if data.empty:
+                self._weeks.pop(week, None)
+            else:
+                file_order = file_orders.get(week) or self._weeks[week]['file_order']
+                self._weeks[week] = {'file_order': file_order, 'data': data, 'keys': keys_in_week}
+        for key in removed:
+            del self._row_weeks[key]
+        self._row_weeks.update(zip(new_keys, new_weeks))
+
+        result.update({
+            'added_rows': len(new_keys),
+            'removed_rows': len(removed),
+            'new_reports': len(added_orders),
+            'updated_reports': len(replaced),
+            'removed_reports': len(removed_orders),
+        })
+        return result
+
+
+def _empty_result():
+    return {'added_rows': 0, 'removed_rows': 0, 'new_reports': 0, 'updated_reports': 0, 'removed_reports': 0}
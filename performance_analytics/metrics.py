@@ -0,0 +1,323 @@
+"""KPI, timeline, heatmap, ranking and journey computations.
+
+Every function takes plain DataFrames (or the store's report list) and
+returns plain data, so results can be cached, benchmarked or served
+without a Streamlit run.
+"""
+import numpy as np
+import pandas as pd
+
+from .distributions import metrics_from_distribution, report_distribution
+from .schema import (EMPTY_ANSWERS, OUTPUT_COLUMNS, problem_columns, productivity_columns,
+                     role_output_column)
+from .spans import profile_section
+
+
+def _productivity_scores(df):
+    """All productivity answers in ``df`` flattened into one list"""
+    all_scores = []
+    for col in productivity_columns(df):
+        scores = pd.to_numeric(df[col], errors='coerce').dropna()
+        all_scores.extend(scores.tolist())
+    return all_scores
+
+
+def calculate_enhanced_metrics(df, role=None):
+    """Enhanced metrics calculation with productivity analysis"""
+    if df.empty:
+        return {}
+
+    return metrics_from_distribution(report_distribution(df), role)
+
+
+def report_summary(report):
+    """Headline numbers for a single uploaded report"""
+    df = report['data']
+    summary = {
+        'File_Order': report['file_order'],
+        'Upload_Date': report['upload_time'].strftime('%Y-%m-%d %H:%M'),
+        'Records': len(df),
+        'Employees': len(df['Employee_ID'].unique()),
+        'Total_Output': 0,
+        'Avg_Productivity': 0
+    }
+
+    # Calculate total output
+    for col in OUTPUT_COLUMNS:
+        if col in df.columns:
+            summary['Total_Output'] += df[col].sum()
+
+    # Calculate average productivity
+    all_productivity = _productivity_scores(df)
+    if all_productivity:
+        summary['Avg_Productivity'] = np.mean(all_productivity)
+
+    return summary
+
+
+def timeline_summary(reports):
+    """One row of headline numbers per uploaded report"""
+    return pd.DataFrame([report_summary(report) for report in reports])
+
+
+def timeline_trends(timeline_df):
+    """Change between the two most recent reports, or None with fewer than two"""
+    if len(timeline_df) < 2:
+        return None
+
+    latest_output = timeline_df.iloc[-1]['Total_Output']
+    previous_output = timeline_df.iloc[-2]['Total_Output']
+    output_change = ((latest_output - previous_output) / previous_output * 100) if previous_output > 0 else 0
+
+    latest_productivity = timeline_df.iloc[-1]['Avg_Productivity']
+    previous_productivity = timeline_df.iloc[-2]['Avg_Productivity']
+    productivity_change = ((latest_productivity - previous_productivity) / previous_productivity * 100) \
+        if previous_productivity > 0 else 0
+
+    return {
+        'output_change': output_change,
+        'productivity_change': productivity_change,
+        'active_employees': timeline_df.iloc[-1]['Employees']
+    }
+
+
+def heatmap_matrix(consolidated_df, file_orders=None):
+    """Employee x report productivity matrix: (employees, file_orders, rows)"""
+    with profile_section('heatmap:matrix_loop', kind="loop"):
+        performance_matrix = []
+        if file_orders is None:
+            file_orders = sorted(consolidated_df['File_Order'].unique())
+
+        for employee_id in consolidated_df['Employee_ID'].unique():
+            employee_data = consolidated_df[consolidated_df['Employee_ID'] == employee_id]
+            employee_performance = []
+
+            # Get performance for each report
+            for file_order in file_orders:
+                file_data = employee_data[employee_data['File_Order'] == file_order]
+
+                if not file_data.empty:
+                    # Calculate average productivity for this report
+                    all_scores = _productivity_scores(file_data)
+                    employee_performance.append(np.mean(all_scores) if all_scores else 0)
+                else:
+                    employee_performance.append(0)  # No data for this report
+
+            performance_matrix.append({
+                'Employee': employee_id,
+                'Performance': employee_performance
+            })
+
+    employee_names = [item['Employee'] for item in performance_matrix]
+    performance_data = [item['Performance'] for item in performance_matrix]
+
+    return employee_names, file_orders, performance_data
+
+
+def long_term_rankings(consolidated_df, employee_timeline):
+    """Score every employee across all reports and rank them"""
+    with profile_section('rankings:score_loop', kind="loop"):
+        employee_rankings = []
+
+        for employee_id in consolidated_df['Employee_ID'].unique():
+            employee_data = consolidated_df[consolidated_df['Employee_ID'] == employee_id]
+            employee_info = employee_timeline[employee_id]
+
+            # Calculate metrics
+            total_reports = len(employee_data)
+
+            # Total output
+            role = employee_info['role']
+            output_col, _ = role_output_column(role, employee_data.columns)
+            total_output = employee_data[output_col].sum() if output_col else 0
+
+            # Average productivity
+            productivity_cols = productivity_columns(employee_data)
+            avg_productivity = 0
+            productivity_consistency = 0
+
+            all_scores = _productivity_scores(employee_data)
+            if all_scores:
+                avg_productivity = np.mean(all_scores)
+                productivity_consistency = 1 / (np.std(all_scores) + 0.1)  # Higher = more consistent
+
+            # Improvement trend (if multiple reports)
+            improvement_score = 0
+            if total_reports > 1 and productivity_cols:
+                first_productivity = []
+                last_productivity = []
+
+                first_report = employee_data[employee_data['File_Order'] == employee_data['File_Order'].min()]
+                last_report = employee_data[employee_data['File_Order'] == employee_data['File_Order'].max()]
+
+                for col in productivity_cols:
+                    first_score = pd.to_numeric(first_report[col].iloc[0], errors='coerce')
+                    last_score = pd.to_numeric(last_report[col].iloc[0], errors='coerce')
+
+                    if pd.notna(first_score) and pd.notna(last_score):
+                        first_productivity.append(first_score)
+                        last_productivity.append(last_score)
+
+                if first_productivity and last_productivity:
+                    first_avg = np.mean(first_productivity)
+                    last_avg = np.mean(last_productivity)
+                    improvement_score = (last_avg - first_avg) * 10  # Scale for ranking
+
+            # Comprehensive score
+            comprehensive_score = (
+                    (total_output * 0.3) +
+                    (avg_productivity * 20 * 0.4) +
+                    (productivity_consistency * 10 * 0.2) +
+                    (improvement_score * 0.1)
+            )
+
+            employee_rankings.append({
+                'Employee_ID': employee_id,
+                'Name': employee_info['name'],
+                'Role': role,
+                'Total_Reports': total_reports,
+                'Total_Output': total_output,
+                'Avg_Productivity': avg_productivity,
+                'Consistency_Score': productivity_consistency,
+                'Improvement_Score': improvement_score,
+                'Comprehensive_Score': comprehensive_score
+            })
+
+    rankings_df = pd.DataFrame(employee_rankings)
+
+    if not rankings_df.empty:
+        rankings_df = rankings_df.sort_values('Comprehensive_Score', ascending=False).reset_index(drop=True)
+        rankings_df['Rank'] = range(1, len(rankings_df) + 1)
+
+    return rankings_df
+
+
+def patch_heatmap(previous, changed_rows, file_orders, employee_order):
+    """``heatmap_matrix`` of a new version, recomputing only the employees in ``changed_rows``.
+
+    Every other employee keeps their row from ``previous``, moved onto the
+    new report columns (0 for reports they aren't in).
+    """
+    old_employees, old_orders, old_values = previous
+    if changed_rows.empty:
+        changed_employees, changed_values = [], []
+    else:
+        changed_employees, _, changed_values = heatmap_matrix(changed_rows, file_orders)
+
+    old_positions = {file_order: position for position, file_order in enumerate(old_orders)}
+    kept = [position for position, file_order in enumerate(file_orders) if file_order in old_positions]
+    matrix = np.zeros((len(old_employees), len(file_orders)))
+    if len(old_employees) and kept:
+        matrix[:, kept] = np.asarray(old_values, dtype=float)[:, [old_positions[file_orders[i]] for i in kept]]
+
+    rows = dict(zip(old_employees, matrix.tolist()))
+    rows.update(zip(changed_employees, changed_values))
+    return list(employee_order), list(file_orders), [rows[employee_id] for employee_id in employee_order]
+
+
+def patch_rankings(previous, changed_rows, employee_timeline, employee_order):
+    """``long_term_rankings`` of a new version, scoring only the employees in ``changed_rows``"""
+    changed = long_term_rankings(changed_rows, employee_timeline) if not changed_rows.empty else pd.DataFrame()
+    parts = [frame.drop(columns='Rank') for frame in (previous, changed) if not frame.empty]
+    if not parts:
+        return pd.DataFrame()
+
+    rankings = pd.concat(parts, ignore_index=True).drop_duplicates('Employee_ID', keep='last')
+    position = {employee_id: i for i, employee_id in enumerate(employee_order)}
+    rankings = rankings[rankings['Employee_ID'].isin(position)]
+    if rankings.empty:
+        return pd.DataFrame()
+    # First-appearance order before scoring, as in the full computation
+    rankings = rankings.sort_values('Employee_ID', key=lambda ids: ids.map(position))
+    rankings = rankings.sort_values('Comprehensive_Score', ascending=False).reset_index(drop=True)
+    rankings['Rank'] = range(1, len(rankings) + 1)
+    return rankings
+
+
+def _is_answered(value):
+    return pd.notna(value) and str(value).strip().lower() not in EMPTY_ANSWERS
+
+
+def employee_journey(employee_data, role):
+    """Statistics, improvement and feedback timelines for one employee's history"""
+    output_col, output_label = role_output_column(role, employee_data.columns)
+    productivity_cols = productivity_columns(employee_data)
+
+    journey = {
+        'output_col': output_col,
+        'output_label': output_label,
+        'productivity_cols': productivity_cols,
+        'reports': len(employee_data),
+        'first_report': employee_data['Upload_Time'].min(),
+        'trend': None,
+        'avg_output': None,
+        'max_output': None,
+        'avg_productivity': None,
+        'output_improvement': None,
+        'productivity_growth': None,
+        'issues': [],
+        'comments': []
+    }
+
+    if output_col:
+        journey['avg_output'] = employee_data[output_col].mean()
+        journey['max_output'] = employee_data[output_col].max()
+
+        # Linear trend line over report numbers
+        if len(employee_data) > 2:
+            z = np.polyfit(employee_data['File_Order'], employee_data[output_col], 1)
+            journey['trend'] = np.poly1d(z)(employee_data['File_Order'])
+
+    all_productivity = _productivity_scores(employee_data)
+    if all_productivity:
+        journey['avg_productivity'] = np.mean(all_productivity)
+
+    # Improvement from first to latest report
+    if len(employee_data) > 1:
+        if output_col:
+            first_output = employee_data[output_col].iloc[0]
+            last_output = employee_data[output_col].iloc[-1]
+            journey['output_improvement'] = {
+                'first': first_output,
+                'last': last_output,
+                'change_pct': ((last_output - first_output) / first_output * 100) if first_output > 0 else 0
+            }
+
+        first_productivity = []
+        last_productivity = []
+        for col in productivity_cols:
+            first_score = pd.to_numeric(employee_data[col].iloc[0], errors='coerce')
+            last_score = pd.to_numeric(employee_data[col].iloc[-1], errors='coerce')
+
+            if pd.notna(first_score) and pd.notna(last_score):
+                first_productivity.append(first_score)
+                last_productivity.append(last_score)
+
+        if first_productivity and last_productivity:
+            first_avg = np.mean(first_productivity)
+            last_avg = np.mean(last_productivity)
+            journey['productivity_growth'] = {
+                'first': first_avg,
+                'last': last_avg,
+                'change_pct': ((last_avg - first_avg) / first_avg * 100) if first_avg > 0 else 0
+            }
+
+    # Historical issues and comments
+    issue_cols = problem_columns(employee_data)
+    for _, row in employee_data.iterrows():
+        for col in issue_cols:
+            if _is_answered(row[col]):
+                journey['issues'].append({
+                    'Report': row['File_Order'],
+                    'Issue': str(row[col]),
+                    'Date': row['Upload_Time'].strftime('%Y-%m-%d')
+                })
+
+        if 'Other Comments' in employee_data.columns and _is_answered(row['Other Comments']):
+            journey['comments'].append({
+                'Report': row['File_Order'],
+                'Comment': str(row['Other Comments']),
+                'Date': row['Upload_Time'].strftime('%Y-%m-%d')
+            })
+
+    return journey
@@ -0,0 +1,40 @@
+"""Server-side paging, sorting and search for large tables.
+
+``st.dataframe`` serializes every row it is given on every rerun, so
+tables with thousands of employees or years of history are cut down on the
+server first. The sort order of a table is computed once per column and
+direction (and cached per snapshot by the caller). Searching is one
+vectorized ``str.contains`` per searched column. Only the rows of the
+requested page are then taken from the table, formatted and sent.
+"""
+import numpy as np
+
+PAGE_SIZE = 20
+
+
+def sort_order(frame, column=None, descending=False):
+    """Row positions of ``frame`` sorted by ``column`` (stable, blanks last)"""
+    if column is None:
+        return np.arange(len(frame))
+    values = frame[column].reset_index(drop=True)
+    return values.sort_values(ascending=not descending, kind='stable', na_position='last').index.to_numpy()
+
+
+def search_mask(frame, query, columns):
+    """Rows where any of ``columns`` contains ``query``, ignoring case"""
+    mask = np.zeros(len(frame), dtype=bool)
+    for col in columns:
+        mask |= frame[col].astype(str).str.contains(query, case=False, regex=False).to_numpy()
+    return mask
+
+
+def page_count(rows, page_size=PAGE_SIZE):
+    return max(1, -(-rows // page_size))
+
+
+def page_positions(order, page_number, page_size=PAGE_SIZE, mask=None):
+    """Positions of the rows on page ``page_number`` (from 1), and how many rows there are in all"""
+    if mask is not None:
+        order = order[mask[order]]
+    start = (page_number - 1) * page_size
+    return order[start:start + page_size], len(order)
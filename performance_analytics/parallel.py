@@ -0,0 +1,135 @@
+"""Process-pool execution of the heavy per-employee and per-report phases.
+
+The consolidated frame is written once as an Arrow IPC stream into a
+``SharedMemory`` block. Workers map that block without copying it and take
+only the rows of their partition, so a task pickles a shared memory name
+and an array of row offsets instead of a DataFrame. Each worker returns a
+partial result (part of the heatmap, part of the rankings, one report's
+histograms) and the parent merges them.
+
+Employees are spread over shards by row count, so each shard's share of
+the heatmap and ranking loops is about the same size.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .distributions import report_distribution
+from .metrics import heatmap_matrix, long_term_rankings
+
+# Below this many rows the pool's startup and transfer cost more than the work
+MIN_PARALLEL_ROWS = 50_000
+SHARDS_PER_WORKER = 2
+
+
+def _frame_bytes(frame):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _read_partition(name, size, rows):
+    block = SharedMemory(name=name)
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(block.buf[:size])).read_all()
+        # take() copies just this partition, so nothing points into the block afterwards
+        partition = table.take(pa.array(rows)).to_pandas()
+        del table
+        return partition
+    finally:
+        block.close()
+
+
+def _run_partition(name, size, rows, func, args):
+    return func(_read_partition(name, size, rows), *args)
+
+
+class ProcessPoolRunner:
+    """Persistent process pool that runs a function on row partitions of a shared frame"""
+
+    def __init__(self, workers=None, min_rows=MIN_PARALLEL_ROWS):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_rows = min_rows
+        # Spawned, not forked: the Streamlit server has threads running
+        self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def worth_it(self, rows):
+        """Whether ``rows`` rows are enough to pay for the pool"""
+        return self.workers > 1 and rows >= self.min_rows
+
+    def map(self, func, tasks):
+        """``func(*args)`` for every ``args`` in ``tasks`` on the pool, in order"""
+        futures = [self._pool.submit(func, *args) for args in tasks]
+        return [future.result() for future in futures]
+
+    def map_partitions(self, frame, tasks, func):
+        """``func(frame.take(rows), *args)`` for every ``(rows, args)`` in ``tasks``, in order"""
+        payload = _frame_bytes(frame)
+        block = SharedMemory(create=True, size=max(payload.size, 1))
+        try:
+            block.buf[:payload.size] = memoryview(payload).cast('B')
+            futures = [self._pool.submit(_run_partition, block.name, payload.size, np.asarray(rows), func, args)
+                       for rows, args in tasks]
+            return [future.result() for future in futures]
+        finally:
+            block.close()
+            block.unlink()
+
+    def shutdown(self):
+        self._pool.shutdown(cancel_futures=True)
+
+
+def employee_shards(employee_rows, shards):
+    """Split ``{employee_id: row offsets}`` into at most ``shards`` groups of similar row counts"""
+    loads = np.zeros(max(1, min(shards, len(employee_rows))))
+    groups = [[] for _ in loads]
+    # Largest first onto the lightest shard
+    for employee_id, rows in sorted(employee_rows.items(), key=lambda item: -len(item[1])):
+        shard = int(loads.argmin())
+        groups[shard].append(employee_id)
+        loads[shard] += len(rows)
+    return [group for group in groups if group]
+
+
+def _employee_shard(shard, file_orders, employee_info):
+    return heatmap_matrix(shard, file_orders), long_term_rankings(shard, employee_info)
+
+
+def parallel_heatmap_and_rankings(runner, consolidated, employee_rows, employee_timeline):
+    """``heatmap_matrix`` and ``long_term_rankings`` of ``consolidated``, computed per employee shard"""
+    file_orders = sorted(consolidated['File_Order'].unique())
+    tasks = []
+    for group in employee_shards(employee_rows, runner.workers * SHARDS_PER_WORKER):
+        rows = np.sort(np.concatenate([employee_rows[employee_id] for employee_id in group]))
+        info = {employee_id: {'name': employee_timeline[employee_id]['name'],
+                              'role': employee_timeline[employee_id]['role']} for employee_id in group}
+        tasks.append((rows, (file_orders, info)))
+    results = runner.map_partitions(consolidated, tasks, _employee_shard)
+
+    # Merge in first-appearance order, the order the serial loops use
+    order = {employee_id: position for position, employee_id in enumerate(consolidated['Employee_ID'].unique())}
+    heatmap_rows = sorted((row for (employees, _, values), _ in results for row in zip(employees, values)),
+                          key=lambda row: order[row[0]])
+    heatmap = ([employee_id for employee_id, _ in heatmap_rows], file_orders,
+               [values for _, values in heatmap_rows])
+
+    parts = [shard_rankings for _, shard_rankings in results if not shard_rankings.empty]
+    rankings = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    if not rankings.empty:
+        rankings = rankings.drop(columns='Rank').sort_values('Employee_ID', key=lambda ids: ids.map(order))
+        rankings = rankings.sort_values('Comprehensive_Score', ascending=False).reset_index(drop=True)
+        rankings['Rank'] = range(1, len(rankings) + 1)
+    return heatmap, rankings
+
+
+def parallel_report_distributions(runner, consolidated, row_ranges):
+    """``report_distribution`` of each ``(start, stop)`` row range of ``consolidated``"""
+    tasks = [(np.arange(start, stop), ()) for start, stop in row_ranges]
+    return runner.map_partitions(consolidated, tasks, report_distribution)
@@ -0,0 +1,135 @@
+"""Indexed filtering of the consolidated data by week, role and employee.
+
+``RowIndex`` is built once per snapshot. A date-sorted permutation answers
+week ranges with a binary search, and per-role and per-employee row offsets
+answer subset filters, so a filtered view only touches the rows it returns.
+
+Filters are plain dicts with any of ``start``/``end`` (inclusive week start
+dates), ``roles`` and ``employees`` (Employee_IDs). The filter bar's choices
+come from ``report_extent``, kept per report, so offering them never needs
+the consolidated rows.
+"""
+import numpy as np
+import pandas as pd
+
+EMPTY_ROWS = np.array([], dtype=np.intp)
+
+
+def filter_key(filters):
+    """Hashable, order-insensitive form of ``filters``; None when nothing is filtered"""
+    if not filters:
+        return None
+
+    def day(value):
+        return pd.Timestamp(value).normalize() if value is not None else None
+
+    def members(values):
+        return tuple(sorted(set(values))) if values is not None else None
+
+    key = (day(filters.get('start')), day(filters.get('end')),
+           members(filters.get('roles')), members(filters.get('employees')))
+    return key if any(part is not None for part in key) else None
+
+
+def report_extent(report_data):
+    """First and last week start date and the roles of one report"""
+    if 'Week Start Date' in report_data.columns:
+        dates = pd.to_datetime(report_data['Week Start Date'], errors='coerce').dropna()
+    else:
+        dates = pd.Series(dtype='datetime64[ns]')
+    roles = report_data['Role'].unique() if 'Role' in report_data.columns else []
+    return {'first_week': dates.min() if len(dates) else None, 'last_week': dates.max() if len(dates) else None,
+            'roles': tuple(role for role in roles if role)}
+
+
+def filter_options(extents):
+    """Date range (None when nothing is dated) and sorted roles across ``report_extent`` results"""
+    firsts = [extent['first_week'] for extent in extents if extent['first_week'] is not None]
+    lasts = [extent['last_week'] for extent in extents if extent['last_week'] is not None]
+    return {'date_range': (min(firsts), max(lasts)) if firsts else None,
+            'roles': sorted({role for extent in extents for role in extent['roles']})}
+
+
+def search_employees(employee_ids, text):
+    """Employee_IDs containing ``text`` (case-insensitive)"""
+    employee_ids = pd.Index(list(employee_ids))
+    return employee_ids[employee_ids.str.contains(text, case=False, regex=False)].tolist()
+
+
+def _offsets(df, column):
+    """Ascending row offsets of every value of ``column``"""
+    if column not in df.columns or df.empty:
+        return {}
+    return df.groupby(column, sort=False).indices
+
+
+def _union(offsets, keys):
+    arrays = [offsets[key] for key in keys if key in offsets]
+    if not arrays:
+        return EMPTY_ROWS
+    return np.sort(np.concatenate(arrays)) if len(arrays) > 1 else arrays[0]
+
+
+class RowIndex:
+    """Row offsets into one consolidated frame by week start date, role and employee"""
+
+    def __init__(self, consolidated):
+        if 'Week Start Date' in consolidated.columns:
+            dates = consolidated['Week Start Date'].to_numpy(dtype='datetime64[ns]')
+        else:
+            dates = np.full(len(consolidated), np.datetime64('NaT'), dtype='datetime64[ns]')
+
+        # NaT sorts last, so dated rows are the prefix of the permutation
+        self.date_order = np.argsort(dates, kind='stable')
+        self.sorted_dates = dates[self.date_order][:int((~np.isnat(dates)).sum())]
+        self.by_role = _offsets(consolidated, 'Role')
+        self.by_employee = _offsets(consolidated, 'Employee_ID')
+
+    @property
+    def nbytes(self):
+        return (self.date_order.nbytes + self.sorted_dates.nbytes
+                + sum(offsets.nbytes for table in (self.by_role, self.by_employee) for offsets in table.values()))
+
+    @property
+    def date_range(self):
+        """First and last week start date, or None when no row is dated"""
+        if not len(self.sorted_dates):
+            return None
+        return pd.Timestamp(self.sorted_dates[0]), pd.Timestamp(self.sorted_dates[-1])
+
+    def date_rows(self, start=None, end=None):
+        """Ascending offsets of rows whose week starts between ``start`` and ``end`` (inclusive days)"""
+        lo = 0
+        hi = len(self.sorted_dates)
+        if start is not None:
+            lo = np.searchsorted(self.sorted_dates, pd.Timestamp(start).normalize().to_datetime64(), side='left')
+        if end is not None:
+            next_day = (pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_datetime64()
+            hi = np.searchsorted(self.sorted_dates, next_day, side='left')
+        return np.sort(self.date_order[lo:max(lo, hi)])
+
+    def rows(self, filters):
+        """Ascending offsets of rows matching every condition in ``filters``; None when unfiltered"""
+        key = filter_key(filters)
+        if key is None:
+            return None
+
+        start, end, roles, employees = key
+        selections = []
+        if start is not None or end is not None:
+            selections.append(self.date_rows(start, end))
+        if roles is not None:
+            selections.append(_union(self.by_role, roles))
+        if employees is not None:
+            selections.append(_union(self.by_employee, employees))
+
+        # Intersect from the smallest selection so the work tracks the result size
+        selections.sort(key=len)
+        rows = selections[0]
+        for other in selections[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def search_employees(self, text):
+        """Employee_IDs containing ``text`` (case-insensitive)"""
+        return search_employees(self.by_employee, text)
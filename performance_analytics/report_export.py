@@ -0,0 +1,302 @@
+"""Static HTML and PDF reports rendered from cached aggregates.
+
+    python -m performance_analytics.report_export snapshot/ report.html --month 2025-01 --pdf report.pdf
+
+The HTML report embeds the interactive Plotly figures (plotly.js inlined
+by default, so the file works offline); the PDF report redraws the same
+aggregates with Matplotlib so no browser or image-export engine is needed.
+
+Building and serializing the Plotly figures is CPU-bound Python, so with a
+``ProcessPoolRunner`` each figure is drawn in its own worker process. A
+worker is sent only the aggregate its figure is drawn from and returns
+the HTML fragment. The heatmap is most of the work, so this only pays off
+once it is large; smaller reports are drawn in the calling process.
+"""
+import argparse
+import html
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import plotly.offline
+
+from .figures import COLORS, heatmap_figure, kpi_cards, rankings_figure, rankings_table, timeline_figure
+from .parallel import ProcessPoolRunner
+from .snapshot import compute_aggregates, load_snapshot
+from .store import PerformanceStore
+
+PLOTLY_CDN = "https://cdn.plot.ly/plotly-latest.min.js"
+# Heatmap cells (employees x reports) below which sending figures to worker processes costs more than it saves
+MIN_PARALLEL_CELLS = 50_000
+
+REPORT_CSS = """
+body { font-family: 'Inter', 'Segoe UI', sans-serif; margin: 2rem auto; max-width: 1200px; color: #2d3748; }
+h1 { text-align: center; color: #667eea; font-size: 2.2rem; margin-bottom: 0.25rem; }
+.subtitle { text-align: center; color: #718096; margin-bottom: 2rem; }
+.kpi-row { display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem; margin-bottom: 2rem; }
+.metric-card { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 1.5rem;
+               border-radius: 15px; color: white; box-shadow: 0 10px 25px rgba(102, 126, 234, 0.1); }
+.metric-card h3 { margin: 0; font-size: 1rem; font-weight: 600; }
+.metric-card h1 { margin: 0.5rem 0; color: white; font-size: 2rem; text-align: left; }
+.metric-card p { margin: 0; opacity: 0.9; }
+h2 { color: #764ba2; margin-top: 2.5rem; }
+table.rankings { border-collapse: collapse; width: 100%; font-size: 0.9rem; }
+table.rankings th { background: #667eea; color: white; padding: 0.5rem; text-align: left; }
+table.rankings td { padding: 0.4rem 0.5rem; border-bottom: 1px solid #e2e8f0; }
+footer { text-align: center; color: #a0aec0; margin-top: 3rem; font-size: 0.85rem; }
+"""
+
+
+def aggregates_from_snapshot(snapshot):
+    """The aggregates a report needs, read through the snapshot's cache"""
+    aggregates = {
+        'overall_metrics': snapshot.overall_metrics(),
+        'timeline_summary': snapshot.timeline_summary(),
+    }
+    if len(snapshot):
+        aggregates['heatmap_matrix'] = snapshot.heatmap_matrix()
+        aggregates['rankings'] = snapshot.rankings()
+    return aggregates
+
+
+def _report_month(report):
+    week_starts = report['data'].get('Week Start Date')
+    if week_starts is None or week_starts.dropna().empty:
+        return None
+    return week_starts.min().strftime('%Y-%m')
+
+
+def month_store(store, month):
+    """A store holding only the reports whose weeks start in ``month`` (YYYY-MM)"""
+    monthly = PerformanceStore()
+    for report in store.reports:
+        if _report_month(report) == month:
+            data = report['data'].copy()
+            data['File_Order'] = monthly.next_file_order
+            monthly.add_report(data, report['upload_time'])
+    return monthly
+
+
+def report_title(month=None):
+    if month:
+        return f"Performance Report – {pd.Period(month, freq='M').strftime('%B %Y')}"
+    return "Performance Report – All Reports"
+
+
+# The aggregate each figure is drawn from
+FIGURE_INPUTS = {'timeline': 'timeline_summary', 'heatmap': 'heatmap_matrix', 'rankings': 'rankings'}
+
+
+def figure_names(aggregates):
+    """The figures ``aggregates`` has data for, in report order"""
+    names = []
+    if not aggregates['timeline_summary'].empty:
+        names.append('timeline')
+    if aggregates.get('heatmap_matrix') and aggregates['heatmap_matrix'][0]:
+        names.append('heatmap')
+    rankings = aggregates.get('rankings')
+    if rankings is not None and not rankings.empty:
+        names.append('rankings')
+    return names
+
+
+def _figure(name, aggregates):
+    if name == 'timeline':
+        return timeline_figure(aggregates['timeline_summary'])
+    if name == 'heatmap':
+        return heatmap_figure(*aggregates['heatmap_matrix'])
+    return rankings_figure(aggregates['rankings'], COLORS)
+
+
+def report_figures(aggregates):
+    """Plotly figures for every section present in ``aggregates``"""
+    return {name: _figure(name, aggregates) for name in figure_names(aggregates)}
+
+
+def _render_figure(name, aggregates):
+    return _figure(name, aggregates).to_html(full_html=False, include_plotlyjs=False, div_id=f"figure-{name}")
+
+
+def render_figures(aggregates, runner=None):
+    """HTML fragments (without plotly.js) of every figure, one worker process per figure with a ``runner``"""
+    names = figure_names(aggregates)
+    heatmap = aggregates.get('heatmap_matrix')
+    cells = len(heatmap[0]) * len(heatmap[1]) if heatmap else 0
+    if runner is None or runner.workers < 2 or len(names) < 2 or cells < MIN_PARALLEL_CELLS:
+        return {name: _render_figure(name, aggregates) for name in names}
+    tasks = [(name, {FIGURE_INPUTS[name]: aggregates[FIGURE_INPUTS[name]]}) for name in names]
+    return dict(zip(names, runner.map(_render_figure, tasks)))
+
+
+def _kpi_html(metrics):
+    cards = []
+    for card in kpi_cards(metrics):
+        if card:
+            cards.append(f"""<div class="metric-card"><h3>{html.escape(card['title'])}</h3>
+<h1>{html.escape(card['value'])}</h1><p>{html.escape(card['caption'])}</p></div>""")
+        else:
+            cards.append("<div></div>")
+    return f'<div class="kpi-row">{"".join(cards)}</div>'
+
+
+def render_html(aggregates, title="Monthly Performance Report", subtitle="", inline_plotlyjs=True, runner=None):
+    """Self-contained HTML report for the given aggregates"""
+    fragments = render_figures(aggregates, runner)
+
+    if inline_plotlyjs:
+        plotly_script = f'<script type="text/javascript">{plotly.offline.get_plotlyjs()}</script>'
+    else:
+        plotly_script = f'<script src="{PLOTLY_CDN}"></script>'
+
+    sections = [f"<h2>📊 Performance Overview</h2>{_kpi_html(aggregates['overall_metrics'])}"]
+    if 'timeline' in fragments:
+        sections.append(f"<h2>📈 Timeline</h2>{fragments['timeline']}")
+    if 'heatmap' in fragments:
+        sections.append(f"<h2>🔥 Performance Heatmap</h2>{fragments['heatmap']}")
+    if 'rankings' in fragments:
+        table_html = rankings_table(aggregates['rankings']).to_html(index=False, classes='rankings', border=0)
+        sections.append(f"<h2>🏆 Long-term Rankings</h2>{fragments['rankings']}{table_html}")
+
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>{REPORT_CSS}</style>
+{plotly_script}
+</head>
+<body>
+<h1>{html.escape(title)}</h1>
+<p class="subtitle">{html.escape(subtitle)}</p>
+{''.join(sections)}
+<footer>Generated {datetime.now().strftime('%Y-%m-%d %H:%M')} · Continuous Performance Analytics Dashboard</footer>
+</body>
+</html>
+"""
+
+
+def _plain(text):
+    """Drop emoji and symbols, which the default PDF fonts cannot draw"""
+    return ''.join(ch for ch in text if ord(ch) < 0x2000).strip()
+
+
+def _pdf_kpi_page(pdf_figure, aggregates, title, subtitle):
+    pdf_figure.text(0.5, 0.92, _plain(title), ha='center', fontsize=22, color='#667eea', weight='bold')
+    pdf_figure.text(0.5, 0.87, _plain(subtitle), ha='center', fontsize=11, color='#718096')
+
+    cards = [card for card in kpi_cards(aggregates['overall_metrics']) if card]
+    for i, card in enumerate(cards):
+        left = 0.06 + i * (0.88 / max(len(cards), 1))
+        ax = pdf_figure.add_axes([left, 0.55, 0.88 / max(len(cards), 1) - 0.02, 0.22])
+        ax.set_facecolor('#667eea')
+        ax.set_xticks([])
+        ax.set_yticks([])
+        ax.text(0.08, 0.75, _plain(card['title']), color='white', fontsize=11, weight='bold', transform=ax.transAxes)
+        ax.text(0.08, 0.4, card['value'], color='white', fontsize=22, weight='bold', transform=ax.transAxes)
+        ax.text(0.08, 0.12, _plain(card['caption']), color='white', fontsize=9, transform=ax.transAxes)
+
+
+def _pdf_timeline_page(pdf_figure, timeline_df):
+    axes = pdf_figure.subplots(3, 1, sharex=True)
+    for ax, column, color, label in zip(axes, ['Total_Output', 'Avg_Productivity', 'Employees'],
+                                        ['#667eea', '#f093fb', '#4facfe'],
+                                        ['Total Output', 'Average Productivity', 'Team Size']):
+        ax.plot(timeline_df['File_Order'], timeline_df[column], marker='o', color=color, linewidth=2.5)
+        ax.set_title(f"{label} Over Time", fontsize=11)
+        ax.grid(alpha=0.3)
+    axes[-1].set_xlabel("Report Number")
+    pdf_figure.suptitle("Performance Timeline Analysis", fontsize=14)
+
+
+def _pdf_heatmap_page(pdf_figure, heatmap):
+    employees, file_orders, values = heatmap
+    ax = pdf_figure.add_subplot(1, 1, 1)
+    image = ax.imshow(np.asarray(values, dtype=float), cmap='RdYlBu', vmin=1, vmax=5, aspect='auto')
+    ax.set_xticks(range(len(file_orders)), [f"Report {i}" for i in file_orders], rotation=45, ha='right',
+                  fontsize=7)
+    ax.set_yticks(range(len(employees)), employees, fontsize=max(3, min(8, 400 // max(len(employees), 1))))
+    pdf_figure.colorbar(image, ax=ax, label="Productivity Score")
+    ax.set_title("Employee Productivity Heatmap Across All Reports")
+
+
+def _pdf_rankings_page(pdf_figure, rankings):
+    top = rankings.head(10).iloc[::-1]
+    roles = list(dict.fromkeys(rankings['Role']))
+    palette = {role: COLORS['primary'][i % len(COLORS['primary'])] for i, role in enumerate(roles)}
+
+    ax = pdf_figure.add_axes([0.3, 0.55, 0.65, 0.38])
+    ax.barh(top['Name'], top['Comprehensive_Score'], color=[palette[role] for role in top['Role']])
+    ax.set_title("Top 10 Long-term Performers")
+    ax.set_xlabel("Comprehensive Score")
+
+    table = rankings_table(rankings).head(25).drop(columns=['Medal'])
+    table_ax = pdf_figure.add_axes([0.05, 0.03, 0.9, 0.45])
+    table_ax.axis('off')
+    cell_table = table_ax.table(cellText=table.astype(str).values, colLabels=list(table.columns),
+                                loc='upper center', cellLoc='left')
+    cell_table.auto_set_font_size(False)
+    cell_table.set_fontsize(7)
+
+
+def render_pdf(aggregates, path, title="Monthly Performance Report", subtitle=""):
+    """Write a PDF version of the report with Matplotlib (one section per page) to a path or binary file"""
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+
+    pages = [lambda fig: _pdf_kpi_page(fig, aggregates, title, subtitle)]
+    if not aggregates['timeline_summary'].empty:
+        pages.append(lambda fig: _pdf_timeline_page(fig, aggregates['timeline_summary']))
+    if aggregates.get('heatmap_matrix') and aggregates['heatmap_matrix'][0]:
+        pages.append(lambda fig: _pdf_heatmap_page(fig, aggregates['heatmap_matrix']))
+    rankings = aggregates.get('rankings')
+    if rankings is not None and not rankings.empty:
+        pages.append(lambda fig: _pdf_rankings_page(fig, rankings))
+
+    with PdfPages(path) as pdf:
+        for draw in pages:
+            page = Figure(figsize=(11.69, 8.27))  # A4 landscape
+            draw(page)
+            pdf.savefig(page)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a static performance report from a snapshot")
+    parser.add_argument('snapshot_dir', help="Snapshot written by performance_analytics.batch")
+    parser.add_argument('output', help="HTML file to write")
+    parser.add_argument('--month', help="Only include reports whose weeks start in this month (YYYY-MM)")
+    parser.add_argument('--pdf', help="Also write a PDF version to this path")
+    parser.add_argument('--title', default=None)
+    parser.add_argument('--cdn', action='store_true', help="Load plotly.js from the CDN instead of inlining it")
+    parser.add_argument('--workers', type=int, default=0, help="Draw the figures in this many worker processes")
+    args = parser.parse_args(argv)
+
+    store, aggregates, _ = load_snapshot(args.snapshot_dir)
+
+    if args.month:
+        store = month_store(store, args.month)
+        if not store.reports:
+            print(f"No reports start in {args.month}", file=sys.stderr)
+            return 1
+        aggregates = compute_aggregates(store)
+    title = args.title or report_title(args.month)
+    subtitle = f"{len(store.reports)} reports · {len(store.employee_timeline)} employees"
+
+    runner = ProcessPoolRunner(args.workers) if args.workers > 1 else None
+    try:
+        report_html = render_html(aggregates, title, subtitle, not args.cdn, runner)
+    finally:
+        if runner is not None:
+            runner.shutdown()
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        handle.write(report_html)
+    print(f"HTML report written to {args.output}")
+
+    if args.pdf:
+        render_pdf(aggregates, args.pdf, title, subtitle)
+        print(f"PDF report written to {args.pdf}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""Column names, role definitions and scoring bands shared across the engine"""
+import re
+
+COLUMN_MAPPING = {
+    # Basic info
+    'Name': ['Name', 'name', 'Employee Name', 'employee_name'],
+    'Role': ['Role', 'role', 'Position', 'position'],
+    'Week Start Date': ['Week Start Date', 'week_start', 'start_date', 'Week Start'],
+    'Week End Date': ['Week End Date', 'week_end', 'end_date', 'Week End'],
+
+    # Video Editor
+    'Videos Created': ['How many videos did you create this week?', 'videos_created', 'videos'],
+    'Video Clients': ['Which clients did you work for this week?', 'video_clients'],
+    'Video Problems': ['Did you face any problems this week?', 'video_problems'],
+    'Video Productivity': ['Overall productivity this week', 'video_productivity'],
+
+    # Designer
+    'Designs Created': ['How many designs did you create this week?', 'designs_created', 'designs'],
+    'Design Types': ['What types of designs did you make?', 'design_types'],
+    'Design Clients': ['Which clients did you work for this week?', 'design_clients'],
+    'Design Problems': ['Did you face any problems this week?', 'design_problems'],
+    'Design Productivity': ['Overall productivity this week', 'design_productivity'],
+
+    # Account Manager
+    'Scripts Produced': ['How many scripts did you produce this week?', 'scripts_produced', 'scripts'],
+    'Posts Published': ['How many posts were published this week?', 'posts_published', 'posts'],
+    'Client Meetings': ['How many client meetings did you attend this week?', 'client_meetings', 'meetings'],
+    'Meeting Takeaways': ['Main takeaway from this week\'s client meetings', 'meeting_takeaways'],
+    'AM Problems': ['Did you face any problems this week?', 'am_problems'],
+    'AM Productivity': ['Overall productivity this week', 'am_productivity'],
+
+    # Filmmaker
+    'Projects Worked': ['How many projects did you work on this week?', 'projects_worked', 'projects'],
+    'Filmmaker Clients Count': ['How many clients did you work with this week?', 'filmmaker_clients_count'],
+    'Filmmaker Clients': ['Who were the clients?', 'filmmaker_clients'],
+    'Filmmaker Problems': ['Did you face any problems this week?', 'filmmaker_problems'],
+    'Filmmaker Productivity': ['Overall productivity this week', 'filmmaker_productivity'],
+
+    # Team Leader
+    'Leader Meetings': ['How many client meetings did you have this week?', 'leader_meetings'],
+    'Week Review': ['Review of this week overall', 'week_review'],
+    'Leader Problems': ['Did you face any problems this week?', 'leader_problems'],
+    'Leader Productivity': ['Overall productivity this week', 'leader_productivity'],
+
+    # Common
+    'Other Comments': ['Any other comments?', 'other_comments', 'additional_comments']
+}
+
+ROLES = ['Video Editor', 'Designer', 'Account Manager', 'Filmmaker', 'Team Leader']
+
+NUMERIC_COLUMNS = ['Videos Created', 'Designs Created', 'Scripts Produced', 'Posts Published',
+                   'Client Meetings', 'Projects Worked', 'Filmmaker Clients Count', 'Leader Meetings']
+
+DATE_COLUMNS = ['Week Start Date', 'Week End Date']
+
+# Columns summed into a report's total output
+OUTPUT_COLUMNS = ['Videos Created', 'Designs Created', 'Scripts Produced', 'Projects Worked']
+
+# Headline output column and its short label for each role
+ROLE_OUTPUT = {
+    'Video Editor': ('Videos Created', 'Videos'),
+    'Designer': ('Designs Created', 'Designs'),
+    'Account Manager': ('Scripts Produced', 'Scripts'),
+    'Filmmaker': ('Projects Worked', 'Projects'),
+}
+
+# KPI columns per role: (role, column, metric suffix, whether max/min are reported)
+ROLE_METRICS = [
+    ('Video Editor', 'Videos Created', 'videos', True),
+    ('Designer', 'Designs Created', 'designs', True),
+    ('Account Manager', 'Scripts Produced', 'scripts', False),
+    ('Account Manager', 'Posts Published', 'posts', False),
+    ('Account Manager', 'Client Meetings', 'meetings', False),
+    ('Filmmaker', 'Projects Worked', 'projects', False),
+]
+
+# Productivity bands as [lower, upper) score ranges
+PRODUCTIVITY_BANDS = [
+    ('excellent', 4.5, None),
+    ('good', 3.5, 4.5),
+    ('average', 2.5, 3.5),
+    ('needs_improvement', None, 2.5),
+]
+
+# Free-text client lists, one per role section of the form
+CLIENT_COLUMNS = ['Video Clients', 'Design Clients', 'Filmmaker Clients']
+
+# Free-text answers that mean "nothing to report"
+EMPTY_ANSWERS = ['no', 'none', 'n/a', '']
+
+
+def productivity_columns(df):
+    return [col for col in df.columns if 'Productivity' in col]
+
+
+def client_columns(df):
+    """Client list columns, including repeats of the same question that pandas suffixed with .1, .2, ..."""
+    questions = {alias for name in CLIENT_COLUMNS for alias in COLUMN_MAPPING[name]}
+    return [col for col in df.columns
+            if col in CLIENT_COLUMNS or re.sub(r'\.\d+$', '', col) in questions]
+
+
+def problem_columns(df):
+    return [col for col in df.columns if 'Problems' in col]
+
+
+def role_output_column(role, columns):
+    """Output column and label for a role, if the data has that column"""
+    output_col, output_label = ROLE_OUTPUT.get(role, (None, "Output"))
+    if output_col in columns:
+        return output_col, output_label
+    return None, "Output"
+
+
+def performance_badge(score):
+    """Performance band key and display text for a 1-5 score"""
+    if score >= 4.5:
+        return "excellent", "🌟 Excellent"
+    elif score >= 3.5:
+        return "good", "✨ Good"
+    elif score >= 2.5:
+        return "average", "📊 Average"
+    else:
+        return "needs_improvement", "⚡ Needs Focus"
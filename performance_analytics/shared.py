@@ -0,0 +1,721 @@
+"""Process-wide data layer shared by every dashboard session.
+
+One ``SharedDataStore`` per server holds the cleaned reports. Sessions read
+through immutable ``StoreSnapshot`` objects, and derived results (the
+consolidated frame, heatmap matrix, rankings, ...) are computed once per
+snapshot and reused by every viewer of that version.
+"""
+import hashlib
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .cleaning import clean_data
+from .clients import ClientDimension, client_churn, client_workload, empty_facts
+from .derived import EMPLOYEE_SET, PREVIOUS, TEAMS, Change, carry_over
+from .distributions import merge_distributions, metrics_from_distribution, report_distribution
+from .forecasting import FORECAST_HORIZON, ForecastModel, capacity_table, output_panel, report_output
+from .identity import IdentityIndex
+from .metrics import heatmap_matrix, long_term_rankings, patch_heatmap, patch_rankings, report_summary
+from .parallel import parallel_heatmap_and_rankings, parallel_report_distributions
+from .query import RowIndex, filter_key, filter_options, report_extent, search_employees
+from .snapshot import load_snapshot
+from .store import PerformanceStore, employee_history, employees_by_name
+from .teams import (company_table, monthly_team_table, report_team_facts, team_leaders, team_members, team_rollup,
+                    weekly_team_table)
+from .trends import (latest_trends, patch_panel, patch_trends, productivity_alerts, productivity_panel,
+                     report_productivity, rolling_trends, unchanged_columns)
+from .validation import employee_weeks
+
+MAX_CACHED_VIEWS = 32
+MAX_HISTORY = 50
+# Past this share of touched employees, heatmap and rankings are rebuilt rather than patched
+MAX_PATCH_SHARE = 0.5
+
+
+def content_hash(payload):
+    """Stable identifier for an uploaded file's bytes"""
+    return hashlib.sha256(payload).hexdigest()
+
+
+class StoreSnapshot:
+    """Read-only view of the shared store at one version.
+
+    DataFrames returned from a snapshot are shared between sessions and
+    must not be modified in place. Summaries that every page shows (row
+    counts, date ranges, roles) come from per-report aggregates; the
+    consolidated frame is only built for views that need every row, and
+    ``track(frame, size)`` is told about each such frame so a memory budget
+    can count it.
+    """
+
+    def __init__(self, version, reports, employee_timeline, file_counter, clients=None, runner=None, teams=None,
+                 track=None):
+        self.version = version
+        self.reports = reports
+        self.employee_timeline = employee_timeline
+        self.file_counter = file_counter
+        self.clients = clients or ClientDimension()
+        self.runner = runner
+        self.teams = teams
+        self.track = track
+        self._aggregates = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.reports)
+
+    def cached(self, key, func, *args, **kwargs):
+        """Compute ``func`` once for this snapshot and share the result"""
+        if key in self._aggregates:
+            return self._aggregates[key]
+
+        with self._lock:
+            if key not in self._aggregates:
+                self._aggregates[key] = func(*args, **kwargs)
+            return self._aggregates[key]
+
+    def _tracked(self, frame, size):
+        if self.track is not None:
+            self.track(frame, size)
+        return frame
+
+    def consolidated(self):
+        """Get all uploaded data consolidated into a single DataFrame"""
+        def build():
+            if not self.reports:
+                return pd.DataFrame()
+            frame = pd.concat([item['data'] for item in self.reports], ignore_index=True)
+            return self._tracked(frame, int(frame.memory_usage(deep=True).sum()))
+
+        return self.cached('consolidated', build)
+
+    def report_distribution(self, report):
+        return self.cached(('report_distribution', report['file_order']), lambda: report_distribution(report['data']))
+
+    def distribution(self):
+        """Histograms for all reports, merged from the per-report summaries"""
+        def build():
+            self._prefetch_report_distributions()
+            return merge_distributions([self.report_distribution(report) for report in self.reports])
+
+        return self.cached('distribution', build)
+
+    def _use_pool(self):
+        return self.runner is not None and self.runner.worth_it(self.record_count())
+
+    def _prefetch_report_distributions(self):
+        """Compute the missing per-report histograms on the process pool, one task per report"""
+        missing = [index for index, report in enumerate(self.reports)
+                   if ('report_distribution', report['file_order']) not in self._aggregates]
+        if len(missing) < 2 or not self._use_pool():
+            return
+
+        report_starts = np.cumsum([0] + [len(report['data']) for report in self.reports])
+        distributions = parallel_report_distributions(
+            self.runner, self.consolidated(), [(report_starts[index], report_starts[index + 1]) for index in missing])
+        with self._lock:
+            for index, distribution in zip(missing, distributions):
+                self._aggregates.setdefault(('report_distribution', self.reports[index]['file_order']), distribution)
+
+    def overall_metrics(self):
+        return self.cached('overall_metrics', metrics_from_distribution, self.distribution())
+
+    def role_metrics(self, role):
+        return self.cached(('role_metrics', role), metrics_from_distribution, self.distribution(), role)
+
+    def report_metrics(self, report):
+        return self.cached(('report_metrics', report['file_order']), metrics_from_distribution,
+                           self.report_distribution(report))
+
+    def report_summary(self, report):
+        return self.cached(('report_summary', report['file_order']), report_summary, report)
+
+    def timeline_summary(self):
+        return self.cached('timeline_summary', lambda: pd.DataFrame(
+            [self.report_summary(report) for report in self.reports]))
+
+    def record_count(self):
+        return sum(self.report_summary(report)['Records'] for report in self.reports)
+
+    def report_extent(self, report):
+        return self.cached(('report_extent', report['file_order']), lambda: report_extent(report['data']))
+
+    def filter_options(self):
+        """Week range and roles offered by the filter bar"""
+        return self.cached('filter_options', lambda: filter_options(
+            [self.report_extent(report) for report in self.reports]))
+
+    def search_employees(self, text):
+        return search_employees(self.employee_timeline, text)
+
+    def previous(self, kind):
+        """An earlier version's value of a patchable dataset and the ``Change`` since, or None"""
+        return self._aggregates.get((PREVIOUS, kind))
+
+    def report_employees(self, report):
+        return self.cached(('report_employees', report['file_order']), lambda: report['data']['Employee_ID'].unique())
+
+    def employee_order(self):
+        """Employee IDs in order of first appearance, the row order of the heatmap"""
+        return self.cached('employee_order', lambda: list(dict.fromkeys(
+            employee_id for report in self.reports for employee_id in self.report_employees(report))))
+
+    def report_employee_weeks(self, report):
+        return self.cached(('report_employee_weeks', report['file_order']), lambda: employee_weeks(report['data']))
+
+    def employee_weeks(self):
+        """Every loaded (employee, week) entry, for the repeated-entry check on uploads"""
+        def build():
+            if not self.reports:
+                return employee_weeks(pd.DataFrame())
+            return pd.concat([self.report_employee_weeks(report) for report in self.reports], ignore_index=True)
+
+        return self.cached('employee_weeks', build)
+
+    def file_orders(self):
+        return sorted(report['file_order'] for report in self.reports)
+
+    def employee_rows(self, employee_ids):
+        """Rows of ``employee_ids`` in consolidated order, read through their histories"""
+        picks = {}
+        for employee_id in employee_ids:
+            for entry in self.employee_timeline[employee_id]['history']:
+                picks.setdefault(id(entry.report), []).append(entry.row)
+        parts = [report['data'].take(np.sort(picks[id(report)])) for report in self.reports if id(report) in picks]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+    def _changed_employees(self, kind):
+        """Employees to recompute when patching ``kind`` from an earlier version; None to rebuild instead"""
+        previous = self.previous(kind)
+        if previous is None:
+            return None
+        changed = [employee_id for employee_id in previous[1].employee_ids if employee_id in self.employee_timeline]
+        if len(changed) > MAX_PATCH_SHARE * len(self.employee_timeline):
+            return None
+        return changed
+
+    def heatmap_matrix(self):
+        def build():
+            changed = self._changed_employees('heatmap_matrix')
+            if changed is not None:
+                return patch_heatmap(self.previous('heatmap_matrix')[0], self.employee_rows(changed),
+                                     self.file_orders(), self.employee_order())
+            if self._use_pool():
+                return self._employee_shards()[0]
+            return heatmap_matrix(self.consolidated())
+
+        return self.cached('heatmap_matrix', build)
+
+    def rankings(self):
+        def build():
+            changed = self._changed_employees('rankings')
+            if changed is not None:
+                return patch_rankings(self.previous('rankings')[0], self.employee_rows(changed),
+                                      self.employee_timeline, self.employee_order())
+            if self._use_pool():
+                return self._employee_shards()[1]
+            return long_term_rankings(self.consolidated(), self.employee_timeline)
+
+        return self.cached('rankings', build)
+
+    def _employee_shards(self):
+        """Heatmap and rankings from one pass of the process pool over employee shards"""
+        return self.cached('employee_shards', parallel_heatmap_and_rankings, self.runner, self.consolidated(),
+                           self.row_index().by_employee, self.employee_timeline)
+
+    def report_productivity(self, report):
+        return self.cached(('report_productivity', report['file_order']), lambda: report_productivity(report['data']))
+
+    def productivity_panel(self):
+        """Employees x reports mean productivity, patched from the previous version's panel when there is one"""
+        def build():
+            series = {report['file_order']: self.report_productivity(report) for report in self.reports}
+            previous = self.previous('productivity_panel')
+            if previous is None:
+                return productivity_panel(series)
+            return patch_panel(previous[0], series, previous[1].file_orders)
+
+        return self.cached('productivity_panel', build)
+
+    def productivity_trends(self):
+        """Rolling statistics of the panel, recomputed only from the first changed report on"""
+        def build():
+            panel = self.productivity_panel()
+            previous = self.previous('productivity_trends')
+            if previous is None or not previous[0]:
+                return rolling_trends(panel)
+            old = previous[0]['ewma'].columns
+            return patch_trends(previous[0], panel, unchanged_columns(old, panel.columns, previous[1].file_orders))
+
+        return self.cached('productivity_trends', build)
+
+    def latest_trends(self):
+        return self.cached('latest_trends', latest_trends, self.productivity_panel(), self.productivity_trends())
+
+    def productivity_alerts(self):
+        return self.cached('productivity_alerts', productivity_alerts, self.productivity_panel(),
+                           self.productivity_trends())
+
+    def report_output(self, report):
+        return self.cached(('report_output', report['file_order']), lambda: report_output(report['data']))
+
+    def output_panel(self):
+        """Role and employee output x reports, assembled from per-report Series"""
+        roles = {employee_id: info['role'] for employee_id, info in self.employee_timeline.items()}
+        return self.cached('output_panel', lambda: output_panel(
+            {report['file_order']: self.report_output(report) for report in self.reports}, roles))
+
+    def forecast_model(self):
+        """Holt-Winters fit of every output series, warm-started from the previous version's model"""
+        def build():
+            reports = sorted(self.reports, key=lambda report: report['file_order'])
+            sources = tuple(self.report_output(report) for report in reports)
+            previous = self.previous('forecast_model')
+            return ForecastModel.fit(self.output_panel(), sources, previous[0] if previous else None)
+
+        return self.cached('forecast_model', build)
+
+    def forecasts(self, horizon=FORECAST_HORIZON):
+        return self.cached(('forecasts', horizon), self.forecast_model().forecast, horizon)
+
+    def capacity(self, horizon=FORECAST_HORIZON):
+        roles = {employee_id: info['role'] for employee_id, info in self.employee_timeline.items()}
+        return self.cached(('capacity', horizon), capacity_table, self.output_panel(), self.forecasts(horizon), roles)
+
+    def report_client_facts(self, report):
+        return self.cached(('report_client_facts', report['file_order']), lambda: self.clients.report_facts(
+            report['data'], report['file_order']))
+
+    def client_facts(self):
+        """Employee-client-week facts for all reports, on interned integer IDs"""
+        def build():
+            if not self.reports:
+                return empty_facts()
+            return pd.concat([self.report_client_facts(report) for report in self.reports], ignore_index=True)
+
+        return self.cached('client_facts', build)
+
+    def client_workload(self):
+        return self.cached('client_workload', client_workload, self.client_facts(), self.clients)
+
+    def client_churn(self):
+        return self.cached('client_churn', client_churn, self.client_facts(),
+                           [report['file_order'] for report in self.reports])
+
+    def report_team_facts(self, report):
+        return self.cached(('report_team_facts', report['file_order']), lambda: report_team_facts(
+            report['data'], self.teams, report['upload_time']))
+
+    def report_team_rollup(self, report):
+        return self.cached(('report_team_rollup', report['file_order']), team_rollup, self.report_team_facts(report))
+
+    def team_facts(self):
+        """Employee-week facts tagged with each employee's team, for all reports"""
+        def build():
+            if not self.reports:
+                return report_team_facts(pd.DataFrame(), None)
+            return pd.concat([self.report_team_facts(report) for report in self.reports], ignore_index=True)
+
+        return self.cached('team_facts', build)
+
+    def team_table(self, period='week'):
+        """Team x period totals: weeks merge the per-report rollups, months merge the weeks"""
+        if period == 'month':
+            return self.cached(('team_table', period), monthly_team_table, self.team_table('week'))
+        return self.cached(('team_table', period), lambda: weekly_team_table(
+            [self.report_team_rollup(report) for report in self.reports]))
+
+    def company_table(self, period='week'):
+        return self.cached(('company_table', period), company_table, self.team_table(period))
+
+    def team_members(self, team, period='week'):
+        return self.cached(('team_members', (team, period)), team_members, self.team_facts(), team, period)
+
+    def team_leaders(self):
+        return self.cached('team_leaders', team_leaders, self.team_facts())
+
+    def row_index(self):
+        def build():
+            index = RowIndex(self.consolidated())
+            return self._tracked(index, index.nbytes)
+
+        return self.cached('row_index', build)
+
+    def view(self, filters):
+        """This snapshot restricted to ``filters``, shared by every session using the same filters"""
+        key = filter_key(filters)
+        if key is None:
+            return self
+
+        view = self.cached(('view', key), self._build_view, key)
+        with self._lock:
+            view_keys = [cached_key for cached_key in self._aggregates
+                         if isinstance(cached_key, tuple) and cached_key[0] == 'view']
+            for cached_key in view_keys[:-MAX_CACHED_VIEWS]:
+                del self._aggregates[cached_key]
+        return view
+
+    def _build_view(self, key):
+        start, end, _, _ = key
+        rows = self.row_index().rows(dict(zip(('start', 'end', 'roles', 'employees'), key)))
+
+        # Reports are stacked in order in the consolidated frame, so split
+        # the matching offsets at report boundaries
+        report_starts = np.cumsum([0] + [len(report['data']) for report in self.reports])
+        reports = []
+        for report, start_row, report_rows in zip(self.reports, report_starts,
+                                                  np.split(rows, np.searchsorted(rows, report_starts[1:-1]))):
+            if len(report_rows) == len(report['data']):
+                reports.append(report)
+            elif len(report_rows):
+                data = report['data'].take(report_rows - start_row).reset_index(drop=True)
+                reports.append({
+                    'data': self._tracked(data, int(data.memory_usage(deep=True).sum())),
+                    'upload_time': report['upload_time'],
+                    'file_order': report['file_order']
+                })
+
+        file_orders = {report['file_order'] for report in reports}
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) + pd.Timedelta(days=1) if end is not None else None
+
+        def in_view(entry):
+            if entry['file_order'] not in file_orders:
+                return False
+            if start is None and end is None:
+                return True
+            week_start = entry['week_start']
+            if week_start is None or pd.isna(week_start):
+                return False
+            return (start is None or week_start >= start) and (end is None or week_start < end)
+
+        timeline = {}
+        if len(rows):
+            consolidated = self.consolidated()
+            for employee_id in consolidated['Employee_ID'].take(rows).unique():
+                info = self.employee_timeline[employee_id]
+                timeline[employee_id] = {'name': info['name'], 'role': info['role'],
+                                         'history': tuple(entry for entry in info['history'] if in_view(entry))}
+
+        return StoreSnapshot(self.version, tuple(reports), timeline, self.file_counter, self.clients, self.runner,
+                             self.teams, self.track)
+
+    def employee_history(self, employee_id):
+        """Get historical data for a specific employee"""
+        return self.cached(('employee_history', employee_id), employee_history, self.employee_timeline, employee_id)
+
+    def employees_by_name(self):
+        """Employee IDs sorted by display name"""
+        return self.cached('employees_by_name', employees_by_name, self.employee_timeline)
+
+
+class SharedDataStore:
+    """Thread-safe owner of the server's reports.
+
+    Writers go through ``ingest``/``clear`` under a lock; readers take a
+    ``snapshot`` that never changes underneath them.
+
+    Every version is recorded in a bounded history. A report's rows never
+    change once it is added (a replaced report is a new dict), so a version
+    is just the tuple of its reports and consecutive versions share all but
+    the reports that changed. Rolling back swaps only those reports.
+
+    With a ``spiller``, the rows of the oldest reports move to disk once
+    they, plus the full frames snapshots have cached, exceed its memory
+    budget. Spilling is the one in-place change to a report, in any
+    version: its ``data`` is dropped, ``spilled`` is set to a loader and the
+    rows are dropped from its timeline entries. Reading ``report['data']``
+    or an entry's ``data`` then pages the same rows back in from disk, so
+    readers of older versions see the same values, only slower. ``teams``
+    is the optional ``TeamMap`` behind the team rollups.
+    """
+
+    def __init__(self, store=None, runner=None, identities=None, spiller=None, teams=None):
+        self._store = store or PerformanceStore()
+        self.runner = runner
+        self.spiller = spiller
+        self.teams = teams
+        self.identities = identities if identities is not None else IdentityIndex()
+        # Register people already loaded, so they can be matched and merged
+        for report in self._store.reports:
+            if {'Name', 'Role'} <= set(report['data'].columns):
+                self.identities.resolve(report['data']['Name'], report['data']['Role'])
+        self._lock = threading.RLock()
+        self._version = 0
+        self._generation = 0
+        self._hashes = set()
+        self._snapshot = None
+        self._clients = ClientDimension()
+        self._history = []
+        self._record("Loaded reports" if self._store.reports else "Started empty")
+        self._spill()
+
+    @classmethod
+    def from_snapshot(cls, directory, runner=None, identities=None, spiller=None, teams=None):
+        """Open on a batch-built snapshot, with its aggregates already cached"""
+        store, aggregates, manifest = load_snapshot(directory)
+        digests = {entry['file_order']: entry.get('hash') for entry in manifest['reports']}
+        for report in store.reports:
+            report['digest'] = digests.get(report['file_order'])
+        shared = cls(store, runner, identities, spiller, teams)
+        shared._hashes = {digest for digest in digests.values() if digest}
+        shared.snapshot()._aggregates.update(aggregates)
+        return shared
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def generation(self):
+        """Bumped by ``clear``, ``rollback``, ``remove_report`` and ``merge_employees``.
+
+        Incremental writers resync when it changes.
+        """
+        return self._generation
+
+    def snapshot(self):
+        """Current read-only snapshot (the same object until the next write)"""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != self._version:
+                self._snapshot = self._new_snapshot()
+            return self._snapshot
+
+    def _new_snapshot(self):
+        # Copy the containers, not the rows: histories are append-only
+        # lists, so a tuple of the current entries is a stable view.
+        timeline = {
+            employee_id: {'name': info['name'], 'role': info['role'], 'history': tuple(info['history'])}
+            for employee_id, info in self._store.employee_timeline.items()
+        }
+        track = self._track_frame if self.spiller is not None else None
+        return StoreSnapshot(self._version, tuple(self._store.reports), timeline, self._store.file_counter,
+                             self._clients, self.runner, self.teams, track)
+
+    def _track_frame(self, frame, size):
+        """Count a frame a snapshot caches against the memory budget, spilling reports to make room"""
+        self.spiller.track(frame, size)
+        with self._lock:
+            self._spill()
+
+    def has_content(self, digest):
+        return digest in self._hashes
+
+    def history(self):
+        """Recorded versions, oldest first, with their label, time and report count"""
+        with self._lock:
+            return [{'version': entry['version'], 'label': entry['label'], 'time': entry['time'],
+                     'reports': len(entry['reports'])} for entry in self._history]
+
+    def _record(self, label):
+        self._history.append({'version': self._version, 'label': label, 'time': datetime.now(),
+                              'reports': self.snapshot().reports, 'merges': self.identities.merges})
+        del self._history[:-MAX_HISTORY]
+
+    def ingest(self, raw_df, digest=None, upload_time=None):
+        """Clean and append a raw report once per server.
+
+        Returns the cleaned report, or None when the same file was already
+        ingested or it contained no usable rows.
+        """
+        if digest is not None and digest in self._hashes:
+            return None
+
+        new_data = clean_data(raw_df, 0, upload_time)
+        if new_data.empty:
+            return None
+        return self.commit(new_data, digest, upload_time)
+
+    def commit(self, new_data, digest=None, upload_time=None, label=None):
+        """Append an already cleaned report as the next version.
+
+        Cleaning happens outside the lock, so readers and other writers are
+        only held up for the append itself. Returns the report's rows, or
+        None when a report with the same digest got in first.
+        """
+        if 'Employee_ID' not in new_data.columns:
+            raise ValueError("Report has no Name and Role columns")
+        new_data = self.identities.apply(new_data)
+
+        with self._lock:
+            if digest is not None and digest in self._hashes:
+                return None
+
+            previous = self._snapshot
+            file_order = self._store.next_file_order
+            new_data['File_Order'] = file_order
+            self._store.add_report(new_data, upload_time, digest)
+            if digest is not None:
+                self._hashes.add(digest)
+            self._publish(previous, {file_order}, set(new_data['Employee_ID']), label or f"Added report {file_order}")
+            return new_data
+
+    def apply_delta(self, replaced=None, added=(), removed=(), upload_time=None, label="Updated reports"):
+        """Apply several report changes as one new version.
+
+        ``replaced`` maps file orders to their new rows, ``added`` lists new
+        reports in order and ``removed`` lists file orders to drop. Cached
+        aggregates that only depend on untouched reports or employees carry
+        over to the new snapshot. Returns the file orders given to ``added``.
+        """
+        replaced = {file_order: self.identities.apply(new_data) for file_order, new_data in (replaced or {}).items()}
+        added = [self.identities.apply(new_data) for new_data in added]
+        with self._lock:
+            previous = self._snapshot
+            touched_orders = set(replaced) | set(removed)
+            touched_employees = set()
+            for report in self._store.reports:
+                if report['file_order'] in touched_orders:
+                    touched_employees.update(report['data']['Employee_ID'])
+                if report['file_order'] in removed:
+                    self._hashes.discard(report.get('digest'))
+
+            for file_order, new_data in replaced.items():
+                self._store.replace_report(file_order, new_data.assign(File_Order=file_order), upload_time)
+                touched_employees.update(new_data['Employee_ID'])
+
+            for file_order in removed:
+                self._store.remove_report(file_order)
+
+            added_orders = []
+            for new_data in added:
+                report = self._store.add_report(new_data.assign(File_Order=self._store.next_file_order), upload_time)
+                added_orders.append(report['file_order'])
+                touched_employees.update(new_data['Employee_ID'])
+
+            self._publish(previous, touched_orders | set(added_orders), touched_employees, label)
+            return added_orders
+
+    def append_rows(self, file_order, new_data, upload_time=None, label=None):
+        """Add cleaned rows to an existing report as a new version"""
+        with self._lock:
+            report = self._store.reports[self._store._report_index(file_order)]
+            rows = pd.concat([report['data'], new_data.assign(File_Order=file_order)], ignore_index=True)
+            self.apply_delta(replaced={file_order: rows}, upload_time=upload_time or report['upload_time'],
+                             label=label or f"Added rows to report {file_order}")
+
+    def merge_employees(self, source_id, target_id):
+        """Fold one employee's timeline into another's as a new version.
+
+        The merge is kept in the identity index, so later uploads resolve
+        the source's name and role to the target as well, until the version
+        is undone or rolled back. Raises KeyError for an unknown employee
+        and ValueError for a merge into itself.
+        """
+        with self._lock:
+            self.identities.merge(source_id, target_id)
+            replaced = {report['file_order']: report['data'] for report in self._store.reports
+                        if (report['data']['Employee_ID'] == source_id).any()}
+            self.apply_delta(replaced=replaced, label=f"Merged {source_id} into {target_id}")
+            self._generation += 1
+
+    def set_teams(self, teams):
+        """Use a new team membership from the next snapshot on.
+
+        Only the team aggregates are rebuilt. Membership isn't part of the
+        report history, so the change isn't recorded as an undoable version.
+        """
+        with self._lock:
+            previous = self._snapshot
+            current = previous is not None and previous.version == self._version
+            self.teams = teams
+            self._version += 1
+            self._snapshot = self._new_snapshot()
+            if current:
+                self._snapshot._aggregates.update(_carry_over(previous, self._snapshot, set(), set()))
+
+    def remove_report(self, file_order):
+        """Drop one report as a new version; it can be brought back with ``rollback``"""
+        with self._lock:
+            self.apply_delta(removed=[file_order], label=f"Removed report {file_order}")
+            self._generation += 1
+
+    def rollback(self, version):
+        """Return to the reports of an earlier recorded ``version``, as a new version.
+
+        Only reports that differ between the two versions are dropped or put
+        back, and cached aggregates of every other report carry over.
+        Returns the new version number.
+        """
+        with self._lock:
+            target = next((entry for entry in self._history if entry['version'] == version), None)
+            if target is None:
+                raise ValueError(f"Version {version} is no longer in the history")
+
+            wanted = {id(report) for report in target['reports']}
+            current = {id(report) for report in self._store.reports}
+            dropped = [report for report in self._store.reports if id(report) not in wanted]
+            restored = [report for report in target['reports'] if id(report) not in current]
+
+            previous = self._snapshot
+            self.identities.restore_merges(target['merges'])
+            for report in dropped:
+                self._store.remove_report(report['file_order'])
+                self._hashes.discard(report.get('digest'))
+            for report in restored:
+                self._store.restore_report(report)
+                if report.get('digest') is not None:
+                    self._hashes.add(report['digest'])
+
+            changed = dropped + restored
+            employee_ids = set()
+            for report in changed:
+                employee_ids.update(report['data']['Employee_ID'])
+            self._generation += 1
+            self._publish(previous, {report['file_order'] for report in changed}, employee_ids,
+                          f"Rolled back to version {version}")
+            return self._version
+
+    def undo(self):
+        """Roll back the latest change; returns the new version, or None when there is nothing to undo"""
+        with self._lock:
+            if len(self._history) < 2:
+                return None
+            return self.rollback(self._history[-2]['version'])
+
+    def _publish(self, previous, file_orders, employee_ids, label):
+        """Bump the version, keeping the aggregates the change left valid"""
+        current = previous is not None and previous.version == self._version
+        self._version += 1
+        self._snapshot = self._new_snapshot()
+        if current:
+            self._snapshot._aggregates.update(_carry_over(previous, self._snapshot, file_orders, employee_ids))
+        self._record(label)
+        self._spill()
+
+    def _spill(self):
+        """Move the oldest reports' rows to disk while they exceed the memory budget"""
+        if self.spiller is not None:
+            older = [report for entry in self._history for report in entry['reports']]
+            self.spiller.enforce(self._store.reports, older)
+
+    def clear(self):
+        with self._lock:
+            # File orders keep counting so a rollback past the clear can't collide with new reports
+            file_counter = self._store.file_counter
+            self._store.clear()
+            self._store.file_counter = file_counter
+            self._hashes.clear()
+            self._clients = ClientDimension()
+            self._version += 1
+            self._generation += 1
+            self._snapshot = self._new_snapshot()
+            self._record("Cleared all data")
+            self._spill()
+
+
+def _carry_over(previous, snapshot, file_orders, employee_ids):
+    """Aggregates cached on ``previous`` that changes to ``file_orders`` and ``employee_ids`` leave valid"""
+    sources = set()
+    if previous.employee_timeline.keys() != snapshot.employee_timeline.keys():
+        sources.add(EMPLOYEE_SET)
+    if previous.teams is not snapshot.teams:
+        sources.add(TEAMS)
+    return carry_over(previous._aggregates, Change(file_orders, employee_ids, sources))
@@ -0,0 +1,133 @@
+"""On-disk snapshots of the store plus its precomputed aggregates.
+
+Layout of a snapshot directory::
+
+    manifest.json            report order, upload times, source files, hashes
+    reports/report_0001.parquet ...   one cleaned report per file
+    timeline_summary.parquet one row per report
+    rankings.parquet         long-term rankings
+    heatmap.json             employee x report productivity matrix
+    kpis.json                overall, per-role and per-report KPIs
+
+Rows are only stored once, in the report files. The consolidated frame is
+rebuilt from the loaded reports when a view first needs it.
+"""
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from .jsonio import read_json, write_json
+from .metrics import calculate_enhanced_metrics, heatmap_matrix, long_term_rankings, timeline_summary
+from .schema import ROLES
+from .store import PerformanceStore
+
+SNAPSHOT_FORMAT = 1
+
+
+def compute_aggregates(store):
+    """Every precomputed aggregate the dashboard reads, keyed like the snapshot cache"""
+    consolidated = store.consolidated()
+    aggregates = {
+        'consolidated': consolidated,
+        'overall_metrics': calculate_enhanced_metrics(consolidated),
+        'timeline_summary': timeline_summary(store.reports),
+    }
+    if consolidated.empty:
+        return aggregates
+
+    aggregates['heatmap_matrix'] = heatmap_matrix(consolidated)
+    aggregates['rankings'] = long_term_rankings(consolidated, store.employee_timeline)
+    for role in ROLES:
+        aggregates[('role_metrics', role)] = calculate_enhanced_metrics(consolidated, role)
+    for report in store.reports:
+        aggregates[('report_metrics', report['file_order'])] = calculate_enhanced_metrics(report['data'])
+    return aggregates
+
+
+def write_snapshot(store, directory, aggregates=None, sources=None, hashes=None):
+    """Write the store and its aggregates to ``directory``"""
+    aggregates = aggregates if aggregates is not None else compute_aggregates(store)
+    sources = sources or {}
+    hashes = hashes or {}
+
+    reports_dir = os.path.join(directory, 'reports')
+    os.makedirs(reports_dir, exist_ok=True)
+
+    manifest_reports = []
+    for report in store.reports:
+        file_name = f"report_{report['file_order']:04d}.parquet"
+        report['data'].to_parquet(os.path.join(reports_dir, file_name), index=False)
+        manifest_reports.append({
+            'file_order': report['file_order'],
+            'upload_time': report['upload_time'].isoformat(),
+            'file': f"reports/{file_name}",
+            'rows': len(report['data']),
+            'source': sources.get(report['file_order']),
+            'hash': hashes.get(report['file_order']),
+        })
+
+    aggregates['timeline_summary'].to_parquet(os.path.join(directory, 'timeline_summary.parquet'), index=False)
+
+    if 'rankings' in aggregates:
+        aggregates['rankings'].to_parquet(os.path.join(directory, 'rankings.parquet'), index=False)
+
+    if 'heatmap_matrix' in aggregates:
+        employees, file_orders, values = aggregates['heatmap_matrix']
+        write_json(os.path.join(directory, 'heatmap.json'),
+                    {'employees': employees, 'file_orders': file_orders, 'values': values})
+
+    write_json(os.path.join(directory, 'kpis.json'), {
+        'overall': aggregates['overall_metrics'],
+        'roles': {key[1]: value for key, value in aggregates.items()
+                  if isinstance(key, tuple) and key[0] == 'role_metrics'},
+        'reports': {str(key[1]): value for key, value in aggregates.items()
+                    if isinstance(key, tuple) and key[0] == 'report_metrics'},
+    })
+
+    write_json(os.path.join(directory, 'manifest.json'), {
+        'format': SNAPSHOT_FORMAT,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'file_counter': store.file_counter,
+        'reports': manifest_reports,
+    })
+
+
+def load_snapshot(directory):
+    """Rebuild the store and its aggregates from a snapshot directory.
+
+    Returns ``(store, aggregates, manifest)``; aggregates use the same keys
+    as ``StoreSnapshot.cached`` so they can seed it directly.
+    """
+    manifest = read_json(os.path.join(directory, 'manifest.json'))
+    if manifest.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format')}")
+
+    store = PerformanceStore()
+    for entry in manifest['reports']:
+        data = pd.read_parquet(os.path.join(directory, entry['file']))
+        store.file_counter = entry['file_order'] - 1
+        store.add_report(data, datetime.fromisoformat(entry['upload_time']))
+    store.file_counter = manifest['file_counter']
+
+    aggregates = {
+        'timeline_summary': pd.read_parquet(os.path.join(directory, 'timeline_summary.parquet')),
+    }
+
+    rankings_path = os.path.join(directory, 'rankings.parquet')
+    if os.path.exists(rankings_path):
+        aggregates['rankings'] = pd.read_parquet(rankings_path)
+
+    heatmap_path = os.path.join(directory, 'heatmap.json')
+    if os.path.exists(heatmap_path):
+        heatmap = read_json(heatmap_path)
+        aggregates['heatmap_matrix'] = (heatmap['employees'], heatmap['file_orders'], heatmap['values'])
+
+    kpis = read_json(os.path.join(directory, 'kpis.json'))
+    aggregates['overall_metrics'] = kpis['overall']
+    for role, metrics in kpis['roles'].items():
+        aggregates[('role_metrics', role)] = metrics
+    for file_order, metrics in kpis['reports'].items():
+        aggregates[('report_metrics', int(file_order))] = metrics
+
+    return store, aggregates, manifest
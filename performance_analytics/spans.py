@@ -0,0 +1,33 @@
+"""Timing hooks the engine exposes to an outside profiler.
+
+The engine never imports the dashboard. A profiler (anything with a
+``span(name, kind)`` context manager) is attached to the current run with
+``attach_profiler``, and ``profile_section`` blocks inside the engine are
+timed by it. Without one every hook is a single context lookup.
+"""
+import contextvars
+from contextlib import nullcontext
+
+_active_profiler = contextvars.ContextVar('active_profiler', default=None)
+
+
+def active_profiler():
+    """Return the profiler attached to the current run, if any"""
+    return _active_profiler.get()
+
+
+def attach_profiler(profiler):
+    """Attach ``profiler`` to the current run; returns a token for ``detach_profiler``"""
+    return _active_profiler.set(profiler)
+
+
+def detach_profiler(token):
+    _active_profiler.reset(token)
+
+
+def profile_section(name, kind="section"):
+    """Time a block when profiling is active, otherwise do nothing"""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        return nullcontext()
+    return profiler.span(name, kind)
@@ -0,0 +1,167 @@
+"""Memory budget for report rows, with old reports spilled to Parquet.
+
+Each report's rows are held twice: once as the report's frame and once as
+row dicts in the employee timeline. Both stay in memory for as long as any
+recorded version still holds the report. The ``ReportSpiller`` keeps the
+newest reports that fit a byte budget in memory. Older ones are written to
+compressed Parquet and their rows are released. Aggregates cached per
+report (KPIs, distributions, productivity, client facts, row counts and
+date ranges) stay in memory, so most views never go back to disk. When a
+view does need the rows (an individual journey, a consolidated frame, an
+export), ``report['data']`` reads them from the file. The last few files
+read are kept in a small page cache.
+
+Frames a snapshot builds from many reports' rows (the consolidated frame
+and its row index) are ``track``ed while they are alive. They and the
+cached pages count against the same budget. Cached pages are dropped first,
+then reports are spilled. Tracked frames can't be spilled, so when they
+alone exceed the budget, ``stats()['over_budget_bytes']`` says by how much.
+"""
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from functools import partial
+
+import pandas as pd
+
+PAGE_CACHE_REPORTS = 8
+SPILL_COMPRESSION = 'zstd'
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ReportSpiller:
+    """Keeps report rows within ``budget_bytes`` by spilling the oldest reports to disk"""
+
+    def __init__(self, budget_bytes, directory=None, page_cache=PAGE_CACHE_REPORTS):
+        self.budget_bytes = budget_bytes
+        self.page_cache = page_cache
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix='dashboard-spill-')
+            weakref.finalize(self, shutil.rmtree, directory, True)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.hot_bytes = 0
+        self.spilled = 0
+        self.page_ins = 0
+        self._sizes = {}
+        self._frames = {}
+        self._files = itertools.count(1)
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _size(self, report):
+        # Rows never change once added, so each report is measured once
+        key = id(report)
+        if key not in self._sizes:
+            self._sizes[key] = int(report['data'].memory_usage(deep=True).sum())
+            weakref.finalize(report, self._sizes.pop, key, None)
+        return self._sizes[key]
+
+    def track(self, frame, size):
+        """Count ``size`` bytes against the budget for as long as ``frame`` is alive"""
+        key = id(frame)
+        with self._lock:
+            self._frames[key] = size
+        weakref.finalize(frame, self._untrack, key)
+
+    def _untrack(self, key):
+        with self._lock:
+            self._frames.pop(key, None)
+
+    @property
+    def frame_bytes(self):
+        with self._lock:
+            return sum(self._frames.values())
+
+    @property
+    def page_bytes(self):
+        with self._lock:
+            return sum(size for _, size in self._pages.values())
+
+    @property
+    def over_budget_bytes(self):
+        """How far reports and tracked frames are over the budget, once nothing more can be spilled"""
+        return max(0, self.hot_bytes + self.frame_bytes + self.page_bytes - self.budget_bytes)
+
+    def _trim_pages(self, room):
+        """Drop the least recently read pages until they fit ``room`` bytes and the page count (lock held)"""
+        used = sum(size for _, size in self._pages.values())
+        while self._pages and (len(self._pages) > self.page_cache or used > room):
+            used -= self._pages.popitem(last=False)[1][1]
+
+    def enforce(self, current, older=()):
+        """Drop cached pages, then spill reports, until what is left in memory fits the budget.
+
+        What counts is the reports still in memory, tracked frames and
+        cached pages. Reports only held by ``older`` versions are spilled
+        first, then the current reports by file order. Returns the number of
+        reports spilled.
+        """
+        candidates = {}
+        for rank, reports in enumerate((older, current)):
+            for report in reports:
+                candidates[id(report)] = (rank, report['file_order'], report)
+        in_memory = sorted((rank, file_order, id(report), report)
+                           for rank, file_order, report in candidates.values() if report.spilled is None)
+
+        total = sum(self._size(report) for *_, report in in_memory)
+        frame_bytes = self.frame_bytes
+        with self._lock:
+            self._trim_pages(self.budget_bytes - frame_bytes - total)
+        budget = self.budget_bytes - frame_bytes
+        spilled = 0
+        for *_, report in in_memory:
+            if total <= budget:
+                break
+            total -= self._size(report)
+            self._spill(report)
+            spilled += 1
+        self.hot_bytes = total
+        return spilled
+
+    def _spill(self, report):
+        path = os.path.join(self.directory, f"report-{report['file_order']}-{next(self._files)}.parquet")
+        report['data'].to_parquet(path, compression=SPILL_COMPRESSION)
+        # The loader goes in before the rows come out, so readers always find one of them
+        report.spilled = partial(self.read, path)
+        report.pop('data', None)
+        for entry in report.entries:
+            entry.pop('data', None)
+        weakref.finalize(report, self._discard, path)
+        self.spilled += 1
+
+    def read(self, path):
+        """Rows of a spilled report (shared; don't modify)"""
+        with self._lock:
+            if path in self._pages:
+                self._pages.move_to_end(path)
+                return self._pages[path][0]
+
+        frame = pd.read_parquet(path)
+        size = int(frame.memory_usage(deep=True).sum())
+        with self._lock:
+            self.page_ins += 1
+            self._pages[path] = (frame, size)
+            self._trim_pages(self.budget_bytes - self.hot_bytes - sum(self._frames.values()))
+        return frame
+
+    def _discard(self, path):
+        with self._lock:
+            self._pages.pop(path, None)
+            self.spilled -= 1
+        _remove(path)
+
+    def stats(self):
+        return {'budget_bytes': self.budget_bytes, 'hot_bytes': self.hot_bytes, 'frame_bytes': self.frame_bytes,
+                'page_bytes': self.page_bytes, 'over_budget_bytes': self.over_budget_bytes,
+                'spilled_reports': self.spilled, 'page_ins': self.page_ins}
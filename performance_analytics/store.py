@@ -0,0 +1,216 @@
+"""In-memory storage of uploaded reports and per-employee histories"""
+import bisect
+from datetime import datetime
+
+import pandas as pd
+
+from .cleaning import clean_data
+
+
+class Report(dict):
+    """A report: ``data``, ``upload_time``, ``file_order`` and ``digest``.
+
+    When its rows have been spilled to disk, ``report['data']`` pages them
+    back in through the ``spilled`` loader.
+    """
+    __slots__ = ('spilled', 'entries', '__weakref__')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spilled = None
+        self.entries = ()
+
+    def __missing__(self, key):
+        if key == 'data' and self.spilled is not None:
+            return self.spilled()
+        raise KeyError(key)
+
+
+class HistoryEntry(dict):
+    """One report's row in an employee's timeline; the row is re-read from the report once released"""
+    __slots__ = ('report', 'row')
+
+    def __init__(self, report, row, **fields):
+        super().__init__(**fields)
+        self.report = report
+        self.row = row
+
+    def __missing__(self, key):
+        if key == 'data':
+            return self.report['data'].iloc[[self.row]].to_dict('records')[0]
+        raise KeyError(key)
+
+
+def employee_history(employee_timeline, employee_id):
+    """One employee's timeline entries as a DataFrame"""
+    if employee_id not in employee_timeline:
+        return pd.DataFrame()
+
+    history = employee_timeline[employee_id]['history']
+
+    if not history:
+        return pd.DataFrame()
+
+    # Convert history to DataFrame
+    history_data = []
+    for week in history:
+        week_dict = week['data'].copy()
+        week_dict['File_Order'] = week['file_order']
+        week_dict['Upload_Time'] = week['upload_time']
+        history_data.append(week_dict)
+
+    return pd.DataFrame(history_data)
+
+
+def employees_by_name(employee_timeline):
+    """Employee IDs sorted by display name"""
+    return sorted(employee_timeline, key=lambda x: employee_timeline[x]['name'])
+
+
+class PerformanceStore:
+    """All uploaded reports plus the per-employee timeline built from them"""
+
+    def __init__(self):
+        self.reports = []
+        self.file_counter = 0
+        self.employee_timeline = {}
+
+    def __len__(self):
+        return len(self.reports)
+
+    @property
+    def next_file_order(self):
+        return self.file_counter + 1
+
+    def clean(self, raw_df, upload_time=None):
+        """Clean a raw report as the next report in this store"""
+        return clean_data(raw_df, self.next_file_order, upload_time)
+
+    def add_report(self, new_data, upload_time=None, digest=None):
+        """Add new data to the continuous timeline"""
+        if new_data.empty:
+            return None
+
+        upload_time = upload_time or datetime.now()
+
+        # Increment file counter
+        self.file_counter += 1
+
+        report = Report({
+            'data': new_data,
+            'upload_time': upload_time,
+            'file_order': self.file_counter,
+            'digest': digest
+        })
+        self.reports.append(report)
+        self._add_history(report)
+
+        return report
+
+    def replace_report(self, file_order, new_data, upload_time=None):
+        """Swap in new rows for an existing report, keeping its place in the timeline"""
+        index = self._report_index(file_order)
+        self._drop_history(self.reports[index])
+
+        # A new dict rather than an in-place update: snapshots still hold the old one
+        report = Report({
+            'data': new_data,
+            'upload_time': upload_time or self.reports[index]['upload_time'],
+            'file_order': file_order,
+            'digest': self.reports[index].get('digest')
+        })
+        self.reports[index] = report
+        self._add_history(report)
+        return report
+
+    def remove_report(self, file_order):
+        """Drop a report and its entries from every employee's history"""
+        index = self._report_index(file_order)
+        self._drop_history(self.reports[index])
+        del self.reports[index]
+
+    def restore_report(self, report):
+        """Put back a report dict taken from an earlier version, at its original place"""
+        index = bisect.bisect_left([item['file_order'] for item in self.reports], report['file_order'])
+        if index < len(self.reports) and self.reports[index]['file_order'] == report['file_order']:
+            raise ValueError(f"Report {report['file_order']} is already loaded")
+
+        self.reports.insert(index, report)
+        self.file_counter = max(self.file_counter, report['file_order'])
+        self._add_history(report)
+        return report
+
+    def _report_index(self, file_order):
+        for index, report in enumerate(self.reports):
+            if report['file_order'] == file_order:
+                return index
+        raise KeyError(f"No report with file order {file_order}")
+
+    def _add_history(self, report):
+        first_new_entry = {}
+        entries = []
+
+        # Update employee timeline
+        for position, row in enumerate(report['data'].to_dict('records')):
+            employee_id = row['Employee_ID']
+
+            if employee_id not in self.employee_timeline:
+                self.employee_timeline[employee_id] = {
+                    'name': row['Name'],
+                    'role': row['Role'],
+                    'history': []
+                }
+
+            # Add this week's data to employee history
+            history = self.employee_timeline[employee_id]['history']
+            first_new_entry.setdefault(employee_id, len(history))
+            entry = HistoryEntry(
+                report, position,
+                week_start=row.get('Week Start Date'),
+                week_end=row.get('Week End Date'),
+                file_order=report['file_order'],
+                upload_time=report['upload_time']
+            )
+            # Rows of a spilled report stay on disk until someone reads them
+            if report.spilled is None:
+                entry['data'] = row
+            history.append(entry)
+            entries.append(entry)
+        report.entries = entries
+
+        # Replaced reports land after later ones; keep histories in report order
+        for employee_id, start in first_new_entry.items():
+            history = self.employee_timeline[employee_id]['history']
+            if start and history[start - 1]['file_order'] > report['file_order']:
+                history.sort(key=lambda entry: entry['file_order'])
+
+    def _drop_history(self, report):
+        for employee_id in report['data']['Employee_ID'].unique():
+            if employee_id not in self.employee_timeline:
+                continue
+            history = [entry for entry in self.employee_timeline[employee_id]['history']
+                       if entry['file_order'] != report['file_order']]
+            if history:
+                self.employee_timeline[employee_id]['history'] = history
+            else:
+                del self.employee_timeline[employee_id]
+
+    def consolidated(self):
+        """Get all uploaded data consolidated into a single DataFrame"""
+        if not self.reports:
+            return pd.DataFrame()
+
+        return pd.concat([item['data'] for item in self.reports], ignore_index=True)
+
+    def employee_history(self, employee_id):
+        """Get historical data for a specific employee"""
+        return employee_history(self.employee_timeline, employee_id)
+
+    def employees_by_name(self):
+        """Employee IDs sorted by display name"""
+        return employees_by_name(self.employee_timeline)
+
+    def clear(self):
+        self.reports = []
+        self.file_counter = 0
+        self.employee_timeline = {}
@@ -0,0 +1,180 @@
+"""Team rollups: company -> team -> employee, each level from its own table.
+
+A ``TeamMap`` assigns employees to teams from a membership table with Team,
+Name and optionally Role columns. Names are matched the way the identity
+index matches them, so casing, spacing and accents don't matter. Each
+report is reduced once to employee facts tagged with their team (output,
+productivity, issues), and those facts to a small team x week rollup. Both
+are cached per report and carry over between data versions, so an upload
+only adds its own week. The weekly team table merges the per-report
+rollups, the monthly table merges the weekly one and the company table
+merges the teams. Every column is a sum, so each level is a group-by over
+the level below.
+
+Team Leaders have no output columns of their own; their team's output is
+shown as theirs.
+"""
+import pandas as pd
+
+from .cleaning import column_map
+from .identity import normalize_names
+from .schema import COLUMN_MAPPING, EMPTY_ANSWERS, OUTPUT_COLUMNS, problem_columns, productivity_columns
+
+UNASSIGNED = 'Unassigned'
+LEADER_ROLE = 'Team Leader'
+PERIODS = ('week', 'month')
+TEAM_COLUMN_MAPPING = {
+    'Team': ['Team', 'team', 'Team Name', 'team_name'],
+    'Name': COLUMN_MAPPING['Name'],
+    'Role': COLUMN_MAPPING['Role'],
+}
+# Columns that add up across reports, weeks and teams
+SUM_COLUMNS = ['Employee_Weeks', 'Output', 'Issues', 'Productivity_Sum', 'Productivity_Count']
+FACT_COLUMNS = ['Team', 'Employee_ID', 'Name', 'Role', 'Week', 'File_Order', 'Output', 'Issues',
+                'Productivity_Sum', 'Productivity_Count']
+
+
+def _role_keys(roles):
+    return pd.Series(roles, dtype=object).fillna('').astype(str).str.strip().str.casefold()
+
+
+class TeamMap:
+    """Employee -> team assignments from a membership table"""
+
+    def __init__(self, members):
+        columns = {standard: actual for actual, standard in column_map(members, TEAM_COLUMN_MAPPING).items()}
+        if 'Team' not in columns or 'Name' not in columns:
+            raise ValueError("Team membership needs Team and Name columns")
+
+        teams = members[columns['Team']].fillna('').astype(str).str.strip()
+        name_keys = normalize_names(members[columns['Name']]).to_numpy()
+        role_keys = _role_keys(members[columns['Role']] if 'Role' in columns else [''] * len(members)).to_numpy()
+
+        # Later rows win, so an appended row moves someone to another team
+        self._by_name_role = {}
+        self._by_name = {}
+        for team, name_key, role_key in zip(teams, name_keys, role_keys):
+            if not team or not name_key:
+                continue
+            if role_key:
+                self._by_name_role[(name_key, role_key)] = team
+            else:
+                self._by_name[name_key] = team
+        self.teams = sorted(set(self._by_name_role.values()) | set(self._by_name.values()))
+
+    @classmethod
+    def from_csv(cls, path_or_buffer):
+        return cls(pd.read_csv(path_or_buffer))
+
+    def __len__(self):
+        return len(self._by_name_role) + len(self._by_name)
+
+    def assign(self, data):
+        """Team of every row of cleaned ``data`` (``UNASSIGNED`` when not listed)"""
+        if data.empty:
+            return pd.Series(dtype=object, index=data.index)
+        name_keys = normalize_names(data['Name']).set_axis(data.index)
+        role_keys = _role_keys(data['Role']).set_axis(data.index)
+        by_role = pd.Series([self._by_name_role.get(key) for key in zip(name_keys, role_keys)],
+                            index=data.index, dtype=object)
+        return by_role.fillna(name_keys.map(self._by_name)).fillna(UNASSIGNED)
+
+
+def report_team_facts(report_data, teams, upload_time=None):
+    """One row per employee and week of a report with team, output, issues and productivity totals"""
+    if report_data.empty or 'Employee_ID' not in report_data.columns:
+        return pd.DataFrame(columns=FACT_COLUMNS)
+
+    output = pd.Series(0.0, index=report_data.index)
+    for col in OUTPUT_COLUMNS:
+        if col in report_data.columns:
+            output += pd.to_numeric(report_data[col], errors='coerce').fillna(0)
+
+    issues = pd.Series(0, index=report_data.index)
+    for col in problem_columns(report_data):
+        answers = report_data[col].fillna('').astype(str).str.strip().str.lower()
+        issues += (~answers.isin(EMPTY_ANSWERS)).astype(int)
+
+    scores = report_data[productivity_columns(report_data)].apply(pd.to_numeric, errors='coerce')
+
+    # Reports without dates count as the week they were uploaded
+    fallback = pd.Timestamp(upload_time).normalize() if upload_time is not None else pd.NaT
+    week = report_data['Week Start Date'] if 'Week Start Date' in report_data.columns \
+        else pd.Series(pd.NaT, index=report_data.index)
+    week = pd.to_datetime(week, errors='coerce').dt.normalize().fillna(fallback)
+
+    rows = pd.DataFrame({
+        'Team': teams.assign(report_data) if teams is not None else UNASSIGNED,
+        'Employee_ID': report_data['Employee_ID'],
+        'Name': report_data['Name'],
+        'Role': report_data['Role'],
+        'Week': week,
+        'File_Order': report_data['File_Order'],
+        'Output': output,
+        'Issues': issues,
+        'Productivity_Sum': scores.sum(axis=1),
+        'Productivity_Count': scores.count(axis=1),
+    })
+    keys = ['Team', 'Employee_ID', 'Name', 'Role', 'Week', 'File_Order']
+    return rows.groupby(keys, sort=False, dropna=False).sum().reset_index()[FACT_COLUMNS]
+
+
+def team_rollup(facts):
+    """Team x week totals of employee facts"""
+    grouped = facts.assign(Employee_Weeks=1).groupby(['Team', 'Week'], dropna=False)
+    return grouped[SUM_COLUMNS].sum().reset_index()
+
+
+def _finish(table):
+    """Averages derived from the summed columns"""
+    table = table.copy()
+    table['Avg_Productivity'] = (table['Productivity_Sum'] / table['Productivity_Count'].where(
+        table['Productivity_Count'] > 0)).round(2)
+    table['Output_per_Employee'] = (table['Output'] / table['Employee_Weeks'].where(
+        table['Employee_Weeks'] > 0)).round(2)
+    return table
+
+
+def _period_start(weeks, period):
+    if period == 'month':
+        return weeks.dt.to_period('M').dt.start_time
+    return weeks
+
+
+def _regroup(table, keys):
+    return table.groupby(keys, dropna=False)[SUM_COLUMNS].sum().reset_index()
+
+
+def weekly_team_table(rollups):
+    """Team x week table merged from per-report rollups (two reports can cover the same week)"""
+    rollups = [rollup for rollup in rollups if not rollup.empty]
+    if not rollups:
+        return _finish(pd.DataFrame(columns=['Team', 'Period'] + SUM_COLUMNS))
+    weekly = pd.concat(rollups, ignore_index=True).rename(columns={'Week': 'Period'})
+    return _finish(_regroup(weekly, ['Team', 'Period']))
+
+
+def monthly_team_table(weekly):
+    """Team x month table merged from the weekly one"""
+    return _finish(_regroup(weekly.assign(Period=_period_start(weekly['Period'], 'month')), ['Team', 'Period']))
+
+
+def company_table(team_table):
+    """Company x period table merged from a team table (teams never share employees)"""
+    table = _finish(_regroup(team_table, ['Period']))
+    table['Teams'] = team_table.groupby('Period', dropna=False)['Team'].nunique().to_numpy()
+    return table
+
+
+def team_members(facts, team, period='week'):
+    """Employee x period table for one team"""
+    members = facts[facts['Team'] == team]
+    members = members.assign(Period=_period_start(members['Week'], period), Employee_Weeks=1)
+    table = members.groupby(['Employee_ID', 'Name', 'Role', 'Period'], dropna=False)[SUM_COLUMNS].sum()
+    return _finish(table.reset_index())
+
+
+def team_leaders(facts):
+    """Team -> names of its Team Leaders, from the reports"""
+    leaders = facts[(facts['Role'] == LEADER_ROLE) & (facts['Team'] != UNASSIGNED)]
+    return leaders.groupby('Team')['Name'].agg(lambda names: ', '.join(sorted(set(names)))).to_dict()
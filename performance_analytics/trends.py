@@ -0,0 +1,206 @@
+"""Rolling productivity windows and drop alerts for every employee at once.
+
+Each report is reduced once to a per-employee mean productivity Series.
+Those Series are cached per report and carry over between data versions.
+Moving averages, EWMA and z-scores run down the employees x reports panel
+in vectorized pandas operations instead of one Python loop per employee.
+
+A new version patches the previous panel and its statistics rather than
+rebuilding them. ``patch_panel`` drops and adds only the changed report
+columns. ``patch_trends`` keeps every statistic up to the first changed
+column and recomputes the tail from there, reading back just enough
+earlier columns to fill the rolling windows. EWMA carries on from each
+employee's last smoothed value, so an upload costs a few columns, not the
+whole history.
+
+Windows count reports, which are weekly, so ``ma_8`` is the 8-week average.
+"""
+import numpy as np
+import pandas as pd
+
+from .schema import productivity_columns
+
+ROLLING_WINDOWS = (4, 8, 12)
+EWMA_SPAN = 4
+BASELINE_WINDOW = 8
+MIN_BASELINE_REPORTS = 4
+# Floor for the baseline spread so a run of identical scores doesn't flag tiny dips
+MIN_BASELINE_STD = 0.25
+# Earlier columns the rolling windows and the shifted baseline read back
+TREND_LOOKBACK = max(max(ROLLING_WINDOWS), BASELINE_WINDOW + 1)
+ALERT_ZSCORE = -2.0
+
+
+def report_productivity(report_data):
+    """Mean productivity answer per employee in one report, indexed by Employee_ID"""
+    productivity_cols = productivity_columns(report_data)
+    if not productivity_cols or report_data.empty:
+        return pd.Series(dtype=float)
+
+    scores = report_data[productivity_cols].apply(pd.to_numeric, errors='coerce')
+    employees = report_data['Employee_ID']
+    totals = scores.sum(axis=1).groupby(employees).sum()
+    counts = scores.count(axis=1).groupby(employees).sum()
+    return (totals / counts.where(counts > 0)).dropna()
+
+
+def productivity_panel(report_series):
+    """Employees x reports matrix from ``{file_order: report_productivity(...)}``"""
+    if not report_series:
+        return pd.DataFrame()
+    panel = pd.DataFrame(report_series)
+    return panel[sorted(panel.columns)].sort_index()
+
+
+def patch_panel(previous, report_series, changed_orders):
+    """``productivity_panel`` of a new version, rebuilding only the columns in ``changed_orders``.
+
+    ``report_series`` maps every current file order to its Series; only the
+    ones missing from ``previous`` or changed are read.
+    """
+    kept = [file_order for file_order in previous.columns
+            if file_order in report_series and file_order not in changed_orders]
+    added = {file_order: series for file_order, series in report_series.items() if file_order not in kept}
+    if not kept:
+        return productivity_panel(report_series)
+    panel = previous[kept]
+    if added:
+        panel = pd.concat([panel, pd.DataFrame(added)], axis=1)
+    panel = panel[panel.notna().any(axis=1)]
+    return panel[sorted(panel.columns)].sort_index()
+
+
+def unchanged_columns(previous_columns, columns, changed_orders):
+    """How many leading report columns two versions share, untouched by ``changed_orders``"""
+    count = 0
+    for old, new in zip(previous_columns, columns):
+        if old != new or new in changed_orders:
+            break
+        count += 1
+    return count
+
+
+def rolling_trends(panel):
+    """Moving averages, EWMA and baseline z-scores, each shaped like ``panel``.
+
+    The baseline for a report is the mean and standard deviation of the
+    employee's previous ``BASELINE_WINDOW`` reports, so the report being
+    scored never dilutes its own baseline.
+    """
+    if panel.empty:
+        return {}
+
+    # Reports down the rows, employees across: rolling windows run per column
+    series = panel.T
+    trends = {f'ma_{window}': series.rolling(window, min_periods=1).mean().T for window in ROLLING_WINDOWS}
+    trends['ewma'] = series.ewm(span=EWMA_SPAN, ignore_na=True).mean().T
+
+    previous = series.shift(1).rolling(BASELINE_WINDOW, min_periods=MIN_BASELINE_REPORTS)
+    baseline_mean = previous.mean()
+    baseline_std = previous.std().clip(lower=MIN_BASELINE_STD)
+    trends['baseline_mean'] = baseline_mean.T
+    trends['baseline_std'] = baseline_std.T
+    trends['zscore'] = ((series - baseline_mean) / baseline_std).T
+    return trends
+
+
+def patch_trends(previous, panel, kept):
+    """``rolling_trends`` of ``panel`` reusing ``previous`` for its first ``kept`` columns.
+
+    Only the columns after ``kept`` are computed, from the last
+    ``TREND_LOOKBACK`` columns before them plus each employee's EWMA state.
+    """
+    if panel.empty or not kept:
+        return rolling_trends(panel)
+
+    start = max(0, kept - TREND_LOOKBACK)
+    values = panel.iloc[:, start:].to_numpy(dtype=float)
+    columns = np.arange(kept - start, values.shape[1])
+    tail = {f'ma_{window}': _rolling(values, window, 1, columns)[0] for window in ROLLING_WINDOWS}
+    observations = panel.iloc[:, :kept].notna().sum(axis=1)
+    tail['ewma'] = _continue_ewma(previous['ewma'].iloc[:, kept - 1].reindex(panel.index), observations,
+                                  values[:, columns])
+
+    shifted = np.concatenate([np.full((len(values), 1), np.nan), values[:, :-1]], axis=1)
+    baseline_mean, baseline_std = _rolling(shifted, BASELINE_WINDOW, MIN_BASELINE_REPORTS, columns)
+    baseline_std = np.clip(baseline_std, MIN_BASELINE_STD, None)
+    tail['baseline_mean'] = baseline_mean
+    tail['baseline_std'] = baseline_std
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tail['zscore'] = (values[:, columns] - baseline_mean) / baseline_std
+
+    new_columns = panel.columns[kept:]
+    return {name: pd.concat([previous[name].iloc[:, :kept].reindex(panel.index),
+                             pd.DataFrame(matrix, index=panel.index, columns=new_columns)], axis=1)
+            for name, matrix in tail.items()}
+
+
+def _rolling(values, window, min_periods, columns):
+    """Mean and sample std of the ``window`` columns ending at each of ``columns``, NaN-aware like ``rolling``"""
+    padded = np.concatenate([np.full((len(values), window - 1), np.nan), values], axis=1)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=1)[:, columns]
+    counts = (~np.isnan(windows)).sum(axis=2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nansum(windows, axis=2) / counts
+        std = np.sqrt(np.nansum((windows - mean[..., None]) ** 2, axis=2) / (counts - 1))
+    enough = counts >= min_periods
+    return np.where(enough, mean, np.nan), np.where(enough & (counts > 1), std, np.nan)
+
+
+def _continue_ewma(last, observations, values):
+    """Adjusted EWMA (``ignore_na=True``) of the columns of ``values``, picking up from ``last``.
+
+    ``observations`` counts the scores each employee had before, which
+    fixes the weight ``last`` carries.
+    """
+    decay = 1 - 2 / (EWMA_SPAN + 1)
+    weight = (1 - decay ** observations.to_numpy(dtype=float)) / (1 - decay)
+    total = np.nan_to_num(last.to_numpy(dtype=float)) * weight
+    smoothed = np.full(values.shape, np.nan)
+    for column in range(values.shape[1]):
+        scored = ~np.isnan(values[:, column])
+        total = np.where(scored, decay * total + np.nan_to_num(values[:, column]), total)
+        weight = np.where(scored, decay * weight + 1, weight)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            smoothed[:, column] = np.where(weight > 0, total / weight, np.nan)
+    return smoothed
+
+
+def latest_trends(panel, trends):
+    """One row per employee with their latest score and every rolling statistic"""
+    if panel.empty:
+        return pd.DataFrame()
+
+    # Last report each employee appears in, read from every matrix at once
+    positions = panel.notna().to_numpy().cumsum(axis=1).argmax(axis=1)
+    has_scores = panel.notna().any(axis=1).to_numpy()
+    rows = pd.RangeIndex(len(panel))[has_scores]
+    positions = positions[has_scores]
+
+    latest = pd.DataFrame({
+        'Employee_ID': panel.index[has_scores],
+        'File_Order': panel.columns.to_numpy()[positions],
+        'Latest': panel.to_numpy()[rows, positions],
+    })
+    for name, matrix in trends.items():
+        latest[name] = matrix.to_numpy()[rows, positions]
+    return latest.set_index('Employee_ID')
+
+
+def productivity_alerts(panel, trends, threshold=ALERT_ZSCORE):
+    """Employees in the latest report scoring ``|threshold|`` sigma below their own baseline"""
+    if panel.empty:
+        return pd.DataFrame(columns=['Employee_ID', 'Latest', 'Baseline', 'Z_Score', 'Change'])
+
+    latest_report = panel.columns[-1]
+    zscores = trends['zscore'][latest_report]
+    flagged = zscores[zscores <= threshold].sort_values().index
+
+    alerts = pd.DataFrame({
+        'Employee_ID': flagged,
+        'Latest': panel.loc[flagged, latest_report].to_numpy(),
+        'Baseline': trends['baseline_mean'].loc[flagged, latest_report].to_numpy(),
+        'Z_Score': zscores.loc[flagged].to_numpy(),
+    })
+    alerts['Change'] = alerts['Latest'] - alerts['Baseline']
+    return alerts
@@ -0,0 +1,268 @@
+"""Row-level validation of raw reports, with a quarantine for rejected rows.
+
+``validate_report`` checks every column of an upload at once (missing
+names or roles, counts that aren't whole non-negative numbers,
+productivity outside 1-5, unreadable or inverted dates, repeated
+employees) and splits the frame into rows that pass and rows that don't,
+each with a readable list of issues. Rows that pass are cleaned and
+committed as usual. ``report_warnings`` lists the passing rows that load
+the way they always did but may not show where expected: roles outside
+the configured list and rows without a Week Start Date. Rejected rows wait in the ``Quarantine`` until a
+corrected copy of just those rows is sent back. The fixes are then added
+to the report they came from, without re-reading the rest of the week.
+
+Rows are identified by their line in the uploaded CSV (``Row``), so a
+downloaded quarantine can be edited in a spreadsheet and uploaded as is.
+"""
+import itertools
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .cleaning import clean_data, column_map
+from .identity import normalize_names
+from .schema import COLUMN_MAPPING, NUMERIC_COLUMNS, ROLES
+
+PRODUCTIVITY_RANGE = (1, 5)
+# First data line of a CSV with one header line
+FIRST_CSV_ROW = 2
+
+
+def number_rows(raw):
+    """Index ``raw`` by the CSV line each row came from"""
+    numbered = raw.copy(deep=False)
+    numbered.index = pd.RangeIndex(FIRST_CSV_ROW, FIRST_CSV_ROW + len(raw), name='Row')
+    return numbered
+
+
+def _blank(values):
+    return values.isna() | values.astype(str).str.strip().eq('')
+
+
+class _Issues:
+    """Issue text per row, built up one vectorized check at a time"""
+
+    def __init__(self, index):
+        self.text = pd.Series('', index=index, dtype=object)
+
+    def flag(self, mask, message):
+        mask = np.asarray(mask, dtype=bool)
+        if mask.any():
+            message = message[mask] if isinstance(message, pd.Series) else message
+            self.text[mask] = self.text[mask] + message + '; '
+
+
+def employee_weeks(cleaned):
+    """Distinct Employee_ID, Name, Role and week of cleaned rows, enough to check for repeated entries"""
+    if cleaned.empty or 'Employee_ID' not in cleaned.columns:
+        return pd.DataFrame(columns=['Employee_ID', 'Name', 'Role', 'Week Start Date'])
+    weeks = cleaned.get('Week Start Date', pd.Series(pd.NaT, index=cleaned.index))
+    entries = cleaned[['Employee_ID', 'Name', 'Role']].assign(**{
+        'Week Start Date': pd.to_datetime(weeks, errors='coerce').dt.normalize()})
+    return entries.drop_duplicates(ignore_index=True)
+
+
+def _employee_keys(names, roles, identities):
+    """Who each row is: the Employee_ID it resolves to, or its normalized name and role without an index"""
+    if identities is not None:
+        return identities.lookup(names, roles)
+    role_keys = pd.Series(roles, dtype=object).fillna('').astype(str).str.strip().str.casefold()
+    return (normalize_names(names) + " (" + role_keys.to_numpy() + ")").to_numpy()
+
+
+def validate_report(raw, existing=None, identities=None, column_mapping=COLUMN_MAPPING):
+    """Split a raw report into ``(valid_rows, rejected_rows)``.
+
+    Both keep ``raw``'s index and columns; rejected rows get an ``Issues``
+    column. Blank answers are fine (each role only fills its own section),
+    values that are present have to make sense. ``existing`` is cleaned
+    data (or its ``employee_weeks``) the rows will join, checked for
+    repeated entries too. Employees are matched through the
+    ``identities`` index when one is given, so "jane doe" repeats
+    "Jane Doe" and merged aliases repeat their target.
+    """
+    columns = {standard: actual for actual, standard in column_map(raw, column_mapping).items()}
+    if 'Name' not in columns or 'Role' not in columns:
+        raise ValueError("Report has no Name and Role columns")
+
+    issues = _Issues(raw.index)
+    names = raw[columns['Name']]
+    roles = raw[columns['Role']]
+
+    # Required fields
+    missing_name = _blank(names)
+    issues.flag(missing_name, "Name is missing")
+    missing_role = _blank(roles)
+    issues.flag(missing_role, "Role is missing")
+    role_text = roles.astype(str).str.strip()
+
+    # Counts: whole numbers, not negative
+    for standard in NUMERIC_COLUMNS:
+        if standard not in columns:
+            continue
+        values = raw[columns[standard]]
+        present = ~_blank(values)
+        numbers = pd.to_numeric(values, errors='coerce')
+        text = values.astype(str).str.strip()
+        label = columns[standard]
+        issues.flag(present & numbers.isna(), f"{label}: '" + text + "' is not a number")
+        issues.flag(numbers < 0, f"{label}: " + text + " is negative")
+        issues.flag(numbers.notna() & (numbers % 1 != 0), f"{label}: " + text + " is not a whole number")
+
+    # Productivity scores on the 1-5 scale
+    low, high = PRODUCTIVITY_RANGE
+    for standard in columns:
+        if 'Productivity' not in standard:
+            continue
+        values = raw[columns[standard]]
+        numbers = pd.to_numeric(values, errors='coerce')
+        text = values.astype(str).str.strip()
+        label = columns[standard]
+        issues.flag(~_blank(values) & numbers.isna(), f"{label}: '" + text + "' is not a score")
+        issues.flag((numbers < low) | (numbers > high), f"{label}: " + text + f" is outside {low}-{high}")
+
+    # Dates
+    dates = {}
+    for standard in ('Week Start Date', 'Week End Date'):
+        if standard not in columns:
+            continue
+        values = raw[columns[standard]]
+        present = ~_blank(values)
+        # Parsed the way clean_data will parse them
+        dates[standard] = pd.to_datetime(values, errors='coerce')
+        issues.flag(present & dates[standard].isna(),
+                    f"{columns[standard]}: '" + values.astype(str).str.strip() + "' is not a date")
+    if len(dates) == 2:
+        issues.flag(dates['Week End Date'] < dates['Week Start Date'], "Week End Date is before Week Start Date")
+
+    # One entry per employee and week
+    employee = names.astype(str).str.strip() + " (" + role_text + ")"
+    week = dates.get('Week Start Date', pd.Series(pd.NaT, index=raw.index)).dt.normalize()
+    entries = pd.DataFrame({'employee': _employee_keys(names, role_text, identities), 'week': week.to_numpy()},
+                           index=raw.index)
+    repeated = entries.duplicated(keep='first')
+    if existing is not None and not existing.empty and 'Employee_ID' in existing.columns:
+        loaded = employee_weeks(existing)
+        keys = loaded['Employee_ID'] if identities is not None else _employee_keys(loaded['Name'], loaded['Role'],
+                                                                                    None)
+        loaded = pd.MultiIndex.from_arrays([keys, loaded['Week Start Date']])
+        repeated |= pd.MultiIndex.from_frame(entries).isin(loaded)
+    issues.flag(repeated & ~missing_name & ~missing_role, "Repeats an earlier entry for " + employee + " in the same week")
+
+    rejected = issues.text.ne('').to_numpy()
+    bad_rows = raw[rejected].copy()
+    bad_rows['Issues'] = issues.text[rejected].str.rstrip('; ')
+    return raw[~rejected], bad_rows
+
+
+def report_warnings(rows, roles=ROLES, column_mapping=COLUMN_MAPPING):
+    """Rows of a raw report that load but may need a look, with a ``Warnings`` column.
+
+    A role outside ``roles`` leaves the row out of the per-role views and
+    a blank Week Start Date leaves it out of week-based views. Neither
+    stops the row loading. ``roles=None`` accepts every role.
+    """
+    columns = {standard: actual for actual, standard in column_map(rows, column_mapping).items()}
+    warnings = _Issues(rows.index)
+    if roles is not None and 'Role' in columns:
+        values = rows[columns['Role']]
+        role_text = values.astype(str).str.strip()
+        warnings.flag(~_blank(values) & ~role_text.isin(roles),
+                      "Role '" + role_text + "' is not one of " + ', '.join(roles))
+    if 'Week Start Date' in columns:
+        warnings.flag(_blank(rows[columns['Week Start Date']]), "Week Start Date is missing")
+
+    warned = warnings.text.ne('').to_numpy()
+    warned_rows = rows[warned].copy()
+    warned_rows['Warnings'] = warnings.text[warned].str.rstrip('; ')
+    return warned_rows
+
+
+def warning_counts(warned):
+    """``[(warning, rows), ...]`` from ``report_warnings`` output, most common first"""
+    if warned.empty:
+        return []
+    return list(warned['Warnings'].str.split('; ').explode().value_counts().items())
+
+
+class Quarantine:
+    """Rejected rows of every upload on the server, waiting for corrections"""
+
+    def __init__(self):
+        self._entries = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # One correction at a time, so the same rows can't be added twice
+        self._resubmit_lock = threading.Lock()
+
+    def add(self, name, rows, file_order=None):
+        """Hold ``rows`` (indexed by ``Row``) from upload ``name``; returns the entry id"""
+        if rows.empty:
+            return None
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = {'id': entry_id, 'name': name, 'file_order': file_order,
+                                       'rows': rows, 'created': datetime.now()}
+            return entry_id
+
+    def entries(self):
+        """Copies of every open entry, oldest first"""
+        with self._lock:
+            return [dict(entry) for entry in self._entries.values()]
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(entry['rows']) for entry in self._entries.values())
+
+    def discard(self, entry_id):
+        with self._lock:
+            self._entries.pop(entry_id, None)
+
+    def resubmit(self, entry_id, patch, shared, upload_time=None):
+        """Validate corrected rows and add the ones that pass to their report.
+
+        ``patch`` is the downloaded quarantine with values fixed; rows are
+        matched on ``Row`` and other rows are ignored. Returns
+        ``{'accepted': n, 'rejected': n}``.
+        """
+        with self._resubmit_lock:
+            return self._resubmit(entry_id, patch, shared, upload_time)
+
+    def _resubmit(self, entry_id, patch, shared, upload_time):
+        with self._lock:
+            entry = self._entries.get(entry_id)
+        if entry is None:
+            raise ValueError("These rows are no longer in quarantine")
+        if 'Row' not in patch.columns:
+            raise ValueError("Corrections need the Row column from the quarantine download")
+
+        patch = patch.drop(columns=['Issues'], errors='ignore').set_index('Row')
+        patch = patch[patch.index.isin(entry['rows'].index)]
+        file_order = entry['file_order']
+        snapshot = shared.snapshot()
+        report = next((report for report in snapshot.reports if report['file_order'] == file_order), None)
+        if file_order is not None and report is None:
+            raise ValueError(f"Report {file_order} is no longer loaded")
+        valid, rejected = validate_report(patch, snapshot.employee_weeks(), shared.identities)
+
+        if not valid.empty:
+            upload_time = upload_time or datetime.now()
+            cleaned = clean_data(valid.reset_index(drop=True), 0, upload_time)
+            label = f"Corrected {len(valid)} row(s) of {entry['name'] or 'an upload'}"
+            if file_order is None:
+                committed = shared.commit(cleaned, None, upload_time, label)
+                file_order = int(committed['File_Order'].iat[0])
+            else:
+                shared.append_rows(file_order, cleaned, upload_time, label)
+
+        # Entries are only replaced under the lock, never changed in place
+        with self._lock:
+            rows = entry['rows'].drop(index=valid.index.union(rejected.index))
+            rows = pd.concat([rows, rejected]).sort_index() if not rejected.empty else rows
+            if rows.empty:
+                self._entries.pop(entry_id, None)
+            elif entry_id in self._entries:
+                self._entries[entry_id] = dict(self._entries[entry_id], rows=rows, file_order=file_order)
+        return {'accepted': len(valid), 'rejected': len(rejected)}
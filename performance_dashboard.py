@@ -1,9 +1,5 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
 from datetime import datetime, timedelta
 from collections import Counter
 import re
@@ -11,6 +7,30 @@ from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 from io import BytesIO
 import base64
+import os
+
+from performance_analytics import (COLUMN_MAPPING, ROLES, SharedDataStore, calculate_enhanced_metrics, content_hash,
+                                   employee_journey, find_column, performance_badge, timeline_trends)
+from performance_analytics.api import ApiServer
+from performance_analytics.distributions import distribution_table
+from performance_analytics.figures import (COLORS, capacity_plan_table, client_churn_figure, client_workload_figure,
+                                           forecast_figure, heatmap_figure, journey_figure, kpi_cards, rankings_figure,
+                                           rankings_table, team_output_figure, team_rollup_table, timeline_figure)
+from performance_analytics.forecasting import EMPLOYEE_LEVEL, FORECAST_HORIZON, ROLE_LEVEL, SEASON_LENGTH
+from performance_analytics.identity import IdentityIndex
+from performance_analytics.ingest_queue import DONE, DUPLICATE, EMPTY, FAILED, FINISHED, QUARANTINED, IngestQueue
+from performance_analytics.live_source import LiveSync, open_source
+from performance_analytics.paging import PAGE_SIZE, page_count, page_positions, search_mask, sort_order
+from performance_analytics.parallel import ProcessPoolRunner
+from performance_analytics.trends import ALERT_ZSCORE, BASELINE_WINDOW, ROLLING_WINDOWS
+from performance_analytics.report_export import (aggregates_from_snapshot, month_store, render_html, render_pdf,
+                                                 report_title)
+from performance_analytics.snapshot import compute_aggregates
+from performance_analytics.spans import profile_section
+from performance_analytics.spill import ReportSpiller
+from performance_analytics.teams import TeamMap
+from profiling import (RerunProfiler, is_profiling_requested, profile_methods, profiling_session, record_figure,
+                       store_trace, traces_to_json)
 
 # Page config
 st.set_page_config(
@@ -112,213 +132,189 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+SNAPSHOT_DIR_ENV_VAR = 'DASHBOARD_SNAPSHOT_DIR'
+LIVE_SOURCE_ENV_VAR = 'DASHBOARD_LIVE_SOURCE'
+LIVE_INTERVAL_ENV_VAR = 'DASHBOARD_LIVE_INTERVAL'
+API_PORT_ENV_VAR = 'DASHBOARD_API_PORT'
+API_HOST_ENV_VAR = 'DASHBOARD_API_HOST'
+WORKERS_ENV_VAR = 'DASHBOARD_WORKERS'
+ALIASES_ENV_VAR = 'DASHBOARD_ALIASES'
+MEMORY_BUDGET_ENV_VAR = 'DASHBOARD_MEMORY_MB'
+SPILL_DIR_ENV_VAR = 'DASHBOARD_SPILL_DIR'
+TEAMS_ENV_VAR = 'DASHBOARD_TEAMS'
+ROLES_ENV_VAR = 'DASHBOARD_ROLES'
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_store():
+    """One data store per server process, shared by every session"""
+    # Heatmap, rankings and per-report histograms of large data sets run on a process pool
+    workers = int(os.environ.get(WORKERS_ENV_VAR, 0))
+    runner = ProcessPoolRunner(workers) if workers > 1 else None
+    # Employee aliases and merges persist across restarts when a file is configured
+    aliases = os.environ.get(ALIASES_ENV_VAR)
+    identities = IdentityIndex.load(aliases) if aliases else IdentityIndex()
+    # Past the budget, the oldest reports' rows move to Parquet on disk
+    budget_mb = os.environ.get(MEMORY_BUDGET_ENV_VAR)
+    spiller = ReportSpiller(int(float(budget_mb) * 2 ** 20), os.environ.get(SPILL_DIR_ENV_VAR)) if budget_mb else None
+    # Team membership for the team rollups; can also be uploaded in the Teams tab
+    teams_csv = os.environ.get(TEAMS_ENV_VAR)
+    teams = TeamMap.from_csv(teams_csv) if teams_csv else None
+
+    snapshot_dir = os.environ.get(SNAPSHOT_DIR_ENV_VAR)
+    if snapshot_dir:
+        return SharedDataStore.from_snapshot(snapshot_dir, runner, identities, spiller, teams)
+    return SharedDataStore(runner=runner, identities=identities, spiller=spiller, teams=teams)
+
+
+@st.cache_resource(show_spinner=False)
+def get_ingest_queue():
+    """Background workers that clean uploads for every session"""
+    roles = os.environ.get(ROLES_ENV_VAR)
+    roles = [role.strip() for role in roles.split(',') if role.strip()] if roles else ROLES
+    return IngestQueue(get_shared_store(), roles=roles)
+
+
+@st.cache_resource(show_spinner=False)
+def get_live_sync():
+    """Incremental sync from a live sheet, when one is configured, polled on one server thread"""
+    spec = os.environ.get(LIVE_SOURCE_ENV_VAR)
+    if not spec:
+        return None
+    interval = float(os.environ.get(LIVE_INTERVAL_ENV_VAR, 60))
+    return LiveSync(open_source(spec), get_shared_store(), interval).start()
+
+
+@st.cache_resource(show_spinner=False)
+def get_api_server():
+    """Read-only JSON/Arrow API over the shared store, when a port is configured"""
+    port = os.environ.get(API_PORT_ENV_VAR)
+    if not port:
+        return None
+    return ApiServer(get_shared_store(), os.environ.get(API_HOST_ENV_VAR, '127.0.0.1'), int(port)).start()
+
+
+@profile_methods
 class ContinuousPerformanceDashboard:
     def __init__(self):
-        # Initialize session state for storing all uploaded data
-        if 'all_performance_data' not in st.session_state:
-            st.session_state.all_performance_data = []
-        if 'file_counter' not in st.session_state:
-            st.session_state.file_counter = 0
-        if 'employee_timeline' not in st.session_state:
-            st.session_state.employee_timeline = {}
-
-        # Enhanced color palette
-        self.colors = {
-            'primary': ['#667eea', '#764ba2', '#f093fb', '#f5576c', '#4facfe', '#00f2fe'],
-            'secondary': ['#a8edea', '#fed6e3', '#d299c2', '#fef9d7', '#eea2a2', '#bbc1bf'],
-            'performance': {
-                'excellent': '#667eea',
-                'good': '#f093fb',
-                'average': '#ffecd2',
-                'needs_improvement': '#ff9a9e'
-            }
-        }
-
-        self.column_mapping = {
-            # Basic info
-            'Name': ['Name', 'name', 'Employee Name', 'employee_name'],
-            'Role': ['Role', 'role', 'Position', 'position'],
-            'Week Start Date': ['Week Start Date', 'week_start', 'start_date', 'Week Start'],
-            'Week End Date': ['Week End Date', 'week_end', 'end_date', 'Week End'],
-
-            # Video Editor
-            'Videos Created': ['How many videos did you create this week?', 'videos_created', 'videos'],
-            'Video Clients': ['Which clients did you work for this week?', 'video_clients'],
-            'Video Problems': ['Did you face any problems this week?', 'video_problems'],
-            'Video Productivity': ['Overall productivity this week', 'video_productivity'],
-
-            # Designer
-            'Designs Created': ['How many designs did you create this week?', 'designs_created', 'designs'],
-            'Design Types': ['What types of designs did you make?', 'design_types'],
-            'Design Clients': ['Which clients did you work for this week?', 'design_clients'],
-            'Design Problems': ['Did you face any problems this week?', 'design_problems'],
-            'Design Productivity': ['Overall productivity this week', 'design_productivity'],
-
-            # Account Manager
-            'Scripts Produced': ['How many scripts did you produce this week?', 'scripts_produced', 'scripts'],
-            'Posts Published': ['How many posts were published this week?', 'posts_published', 'posts'],
-            'Client Meetings': ['How many client meetings did you attend this week?', 'client_meetings', 'meetings'],
-            'Meeting Takeaways': ['Main takeaway from this week\'s client meetings', 'meeting_takeaways'],
-            'AM Problems': ['Did you face any problems this week?', 'am_problems'],
-            'AM Productivity': ['Overall productivity this week', 'am_productivity'],
-
-            # Filmmaker
-            'Projects Worked': ['How many projects did you work on this week?', 'projects_worked', 'projects'],
-            'Filmmaker Clients Count': ['How many clients did you work with this week?', 'filmmaker_clients_count'],
-            'Filmmaker Clients': ['Who were the clients?', 'filmmaker_clients'],
-            'Filmmaker Problems': ['Did you face any problems this week?', 'filmmaker_problems'],
-            'Filmmaker Productivity': ['Overall productivity this week', 'filmmaker_productivity'],
-
-            # Team Leader
-            'Leader Meetings': ['How many client meetings did you have this week?', 'leader_meetings'],
-            'Week Review': ['Review of this week overall', 'week_review'],
-            'Leader Problems': ['Did you face any problems this week?', 'leader_problems'],
-            'Leader Productivity': ['Overall productivity this week', 'leader_productivity'],
-
-            # Common
-            'Other Comments': ['Any other comments?', 'other_comments', 'additional_comments']
-        }
+        # All sessions read the server-wide store; each rerun works on one snapshot
+        self.shared = get_shared_store()
+        self.ingest_queue = get_ingest_queue()
+        self.live = get_live_sync()
+        self.api = get_api_server()
+        self.store = self.shared.snapshot()
+        self.colors = COLORS
+        self.column_mapping = COLUMN_MAPPING
 
     def find_column(self, df, target_col):
         """Enhanced column finder with fuzzy matching"""
-        if target_col in df.columns:
-            return target_col
-
-        possible_names = self.column_mapping.get(target_col, [target_col])
-        for col in df.columns:
-            for possible in possible_names:
-                if possible.lower() in col.lower():
-                    return col
-        return None
-
-    def clean_data(self, df):
-        """Enhanced data cleaning with better employee identification"""
-        if df is None or df.empty:
-            return pd.DataFrame()
-
-        # Create a mapping of actual columns to standard names
-        column_map = {}
-        for standard_name in self.column_mapping.keys():
-            actual_col = self.find_column(df, standard_name)
-            if actual_col:
-                column_map[actual_col] = standard_name
-
-        # Rename columns
-        df_clean = df.rename(columns=column_map)
-
-        # Create unique employee identifier (Name + Role)
-        if 'Name' in df_clean.columns and 'Role' in df_clean.columns:
-            df_clean['Employee_ID'] = df_clean['Name'] + " (" + df_clean['Role'] + ")"
-
-        # Fill missing values
-        numeric_cols = ['Videos Created', 'Designs Created', 'Scripts Produced', 'Posts Published',
-                        'Client Meetings', 'Projects Worked', 'Filmmaker Clients Count', 'Leader Meetings']
-
-        for col in numeric_cols:
-            if col in df_clean.columns:
-                df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0)
-
-        # Clean productivity scores (assuming 1-5 scale)
-        productivity_cols = [col for col in df_clean.columns if 'Productivity' in col]
-        for col in productivity_cols:
-            if col in df_clean.columns:
-                df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(3)
-                df_clean[col] = df_clean[col].clip(1, 5)
-
-        # Clean text columns
-        text_cols = [col for col in df_clean.columns if
-                     col not in numeric_cols + productivity_cols + ['Week Start Date', 'Week End Date']]
-        for col in text_cols:
-            if col in df_clean.columns:
-                df_clean[col] = df_clean[col].fillna('').astype(str)
-
-        # Parse dates
-        date_cols = ['Week Start Date', 'Week End Date']
-        for col in date_cols:
-            if col in df_clean.columns:
-                df_clean[col] = pd.to_datetime(df_clean[col], errors='coerce')
-
-        # Add file upload timestamp
-        df_clean['Upload_Timestamp'] = datetime.now()
-        df_clean['File_Order'] = st.session_state.file_counter + 1
-
-        return df_clean
-
-    def add_data_to_timeline(self, new_data):
-        """Add new data to the continuous timeline"""
-        if not new_data.empty:
-            # Increment file counter
-            st.session_state.file_counter += 1
-
-            # Add to all performance data
-            st.session_state.all_performance_data.append({
-                'data': new_data,
-                'upload_time': datetime.now(),
-                'file_order': st.session_state.file_counter
-            })
-
-            # Update employee timeline
-            for _, row in new_data.iterrows():
-                employee_id = row['Employee_ID']
-
-                if employee_id not in st.session_state.employee_timeline:
-                    st.session_state.employee_timeline[employee_id] = {
-                        'name': row['Name'],
-                        'role': row['Role'],
-                        'history': []
-                    }
-
-                # Add this week's data to employee history
-                week_data = {
-                    'week_start': row.get('Week Start Date'),
-                    'week_end': row.get('Week End Date'),
-                    'file_order': st.session_state.file_counter,
-                    'upload_time': datetime.now(),
-                    'data': row.to_dict()
-                }
-
-                st.session_state.employee_timeline[employee_id]['history'].append(week_data)
+        return find_column(df, target_col, self.column_mapping)
 
     def get_consolidated_data(self):
         """Get all uploaded data consolidated into a single DataFrame"""
-        if not st.session_state.all_performance_data:
-            return pd.DataFrame()
-
-        all_dfs = [item['data'] for item in st.session_state.all_performance_data]
-        consolidated_df = pd.concat(all_dfs, ignore_index=True)
-
-        return consolidated_df
+        return self.store.consolidated()
 
     def get_employee_historical_data(self, employee_id):
         """Get historical data for a specific employee"""
-        if employee_id not in st.session_state.employee_timeline:
-            return pd.DataFrame()
+        return self.store.employee_history(employee_id)
+
+    def get_performance_badge(self, score):
+        """Generate performance badge based on score"""
+        return performance_badge(score)
 
-        history = st.session_state.employee_timeline[employee_id]['history']
+    def calculate_enhanced_metrics(self, df, role=None):
+        """Enhanced metrics calculation with productivity analysis"""
+        return calculate_enhanced_metrics(df, role)
+
+    def get_overall_metrics(self):
+        """KPIs over all reports, shared by every viewer of this snapshot"""
+        return self.store.overall_metrics()
+
+    def get_report_metrics(self, report):
+        """KPIs for a single report, shared by every viewer of this snapshot"""
+        return self.store.report_metrics(report)
+
+    def build_heatmap_matrix(self):
+        """Build the employee x report productivity matrix used by the heatmap"""
+        return self.store.heatmap_matrix()
+
+    def compute_long_term_rankings(self):
+        """Score every employee across all reports and rank them"""
+        return self.store.rankings()
+
+    def paged_rows(self, frame, key, cache_key, sort_columns=None, search_columns=(), descending=False):
+        """One page of ``frame`` chosen with search, sort and page controls.
+
+        Only the returned rows need to be formatted and sent to the browser.
+        ``sort_columns`` maps column names to labels; ``cache_key`` names the
+        frame within this snapshot, so its sort orders are computed once.
+        """
+        query = st.text_input("🔎 Search", key=f"{key}_search") if search_columns else ''
+        sort_by = None
+        if sort_columns:
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                sort_by = st.selectbox("Sort by", list(sort_columns), format_func=sort_columns.get, key=f"{key}_sort")
+            with col2:
+                descending = st.toggle("Descending", value=descending, key=f"{key}_descending")
+        order = self.store.cached(('table_order', (cache_key, sort_by, descending)), sort_order, frame, sort_by,
+                                  descending)
+
+        mask = search_mask(frame, query.strip(), search_columns) if query.strip() else None
+        pages = page_count(int(mask.sum()) if mask is not None else len(frame))
+        page_key = f"{key}_page"
+        if st.session_state.get(page_key, 1) > pages:
+            st.session_state[page_key] = pages
+        page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key=page_key)
+
+        positions, total = page_positions(order, page_number, PAGE_SIZE, mask)
+        first = (page_number - 1) * PAGE_SIZE
+        st.caption(f"Rows {first + 1 if total else 0}–{first + len(positions)} of {total}")
+        return frame.take(positions)
+
+    def render_chart(self, fig, name):
+        """Render a Plotly figure, recording its payload when profiling"""
+        record_figure(name, fig)
+        st.plotly_chart(fig, use_container_width=True)
 
-        if not history:
-            return pd.DataFrame()
+    def create_profiling_panel(self, profiler):
+        """Show the per-rerun timing breakdown and trace export"""
+        traces = store_trace(st.session_state.setdefault('profiling_traces', []), profiler)
 
-        # Convert history to DataFrame
-        history_data = []
-        for week in history:
-            week_dict = week['data'].copy()
-            week_dict['File_Order'] = week['file_order']
-            week_dict['Upload_Time'] = week['upload_time']
-            history_data.append(week_dict)
+        with st.expander(f"⏱️ Rerun Profile ({profiler.total_ms:.0f} ms)", expanded=False):
+            st.markdown("#### Timing Breakdown")
+            summary = profiler.summary()
+            summary[['Total ms', 'Mean ms', 'Max ms']] = summary[['Total ms', 'Mean ms', 'Max ms']].round(2)
+            st.dataframe(summary, use_container_width=True, hide_index=True)
 
-        return pd.DataFrame(history_data)
+            col1, col2 = st.columns(2)
 
-    def get_performance_badge(self, score):
-        """Generate performance badge based on score"""
-        if score >= 4.5:
-            return "excellent", "🌟 Excellent"
-        elif score >= 3.5:
-            return "good", "✨ Good"
-        elif score >= 2.5:
-            return "average", "📊 Average"
-        else:
-            return "needs_improvement", "⚡ Needs Focus"
+            with col1:
+                st.markdown("#### DataFrame Operations")
+                if profiler.counters:
+                    st.dataframe(pd.DataFrame(list(profiler.counters.items()), columns=['Operation', 'Count']),
+                                 use_container_width=True, hide_index=True)
+                else:
+                    st.info("No copies or concats recorded")
+
+            with col2:
+                st.markdown("#### Figure Payloads")
+                if profiler.figures:
+                    figures_df = pd.DataFrame(profiler.figures)
+                    figures_df['KB'] = (figures_df['bytes'] / 1024).round(1)
+                    figures_df['serialize_ms'] = figures_df['serialize_ms'].round(2)
+                    st.dataframe(figures_df[['name', 'traces', 'KB', 'serialize_ms']],
+                                 use_container_width=True, hide_index=True)
+                else:
+                    st.info("No figures rendered")
+
+            st.download_button(
+                "📥 Export Traces (JSON)",
+                data=traces_to_json(traces),
+                file_name=f"dashboard_traces_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                mime="application/json",
+                help=f"Last {len(traces)} profiled reruns of this session"
+            )
 
     def create_data_management_section(self):
         """Create the data management section in sidebar"""
@@ -331,194 +327,371 @@ class ContinuousPerformanceDashboard:
         # File upload counter
         st.markdown(f"""
         <div class="file-counter">
-            📈 Files Uploaded: {st.session_state.file_counter}
+            📈 Reports Loaded: {len(self.store.reports)}
         </div>
         """, unsafe_allow_html=True)
 
+        if self.api is not None:
+            st.caption(f"🔌 Data API: {self.api.address}/api/")
+
+        if self.shared.spiller is not None:
+            stats = self.shared.spiller.stats()
+            in_memory = stats['hot_bytes'] + stats['frame_bytes'] + stats['page_bytes']
+            st.caption(f"💾 Rows in memory: {in_memory / 2 ** 20:.1f} of "
+                       f"{stats['budget_bytes'] / 2 ** 20:.0f} MB · {stats['spilled_reports']} report(s) on disk")
+            if stats['over_budget_bytes']:
+                st.warning(f"⚠️ Combined frames are {stats['over_budget_bytes'] / 2 ** 20:.1f} MB over the memory "
+                           f"budget with every report on disk")
+
+        if self.live is not None:
+            self.create_live_source_status()
+
         # Upload new CSV
         st.subheader("📤 Add New Performance Data")
+        upload_nonce = st.session_state.setdefault('upload_nonce', 0)
         new_file = st.file_uploader(
             "Upload New CSV Report",
             type=['csv'],
-            key=f"new_upload_{st.session_state.file_counter}",
+            key=f"new_upload_{self.store.file_counter}_{upload_nonce}",
             help="Upload weekly performance reports to build a comprehensive timeline"
         )
 
         if new_file is not None:
-            try:
-                new_data = self.clean_data(pd.read_csv(new_file))
-                if not new_data.empty:
-                    self.add_data_to_timeline(new_data)
-                    st.success(
-                        f"✅ New data added: {len(new_data)} records from {len(new_data['Employee_ID'].unique())} employees")
-                    st.rerun()
-                else:
-                    st.error("❌ No valid data found in the uploaded file")
-            except Exception as e:
-                st.error(f"Error processing file: {str(e)}")
+            payload = new_file.getvalue()
+            digest = content_hash(payload)
+            if self.shared.has_content(digest):
+                st.info("ℹ️ This report is already loaded on the server")
+            else:
+                # Cleaned in the background; the new uploader key clears the widget
+                job_id = self.ingest_queue.submit(payload, new_file.name, digest)
+                st.session_state.setdefault('ingest_jobs', []).append(job_id)
+                st.session_state['upload_nonce'] = upload_nonce + 1
+                st.rerun()
+
+        self.create_ingest_status()
+        self.create_quarantine_section()
 
         # Data summary
-        if st.session_state.all_performance_data:
-            consolidated_df = self.get_consolidated_data()
+        if self.store.reports:
+            date_range = self.store.filter_options()['date_range']
 
             st.markdown("### 📊 Data Summary")
             col1, col2 = st.columns(2)
 
             with col1:
-                st.metric("Total Records", len(consolidated_df))
-                st.metric("Unique Employees", len(consolidated_df['Employee_ID'].unique()))
+                st.metric("Total Records", self.store.record_count())
+                st.metric("Unique Employees", len(self.store.employee_timeline))
 
             with col2:
-                st.metric("Data Points", f"{len(st.session_state.all_performance_data)} reports")
-                if 'Week Start Date' in consolidated_df.columns:
-                    date_range = consolidated_df['Week Start Date'].max() - consolidated_df['Week Start Date'].min()
-                    st.metric("Time Span", f"{date_range.days} days")
+                st.metric("Data Points", f"{len(self.store.reports)} reports")
+                if date_range is not None:
+                    st.metric("Time Span", f"{(date_range[1] - date_range[0]).days} days")
 
         # Timeline progress
-        if st.session_state.employee_timeline:
+        if self.store.employee_timeline:
             st.markdown("### 👥 Employee Tracking")
-            for employee_id, timeline in st.session_state.employee_timeline.items():
-                weeks_tracked = len(timeline['history'])
+            tracking = self.store.cached('employee_tracking', lambda: pd.DataFrame(
+                [(timeline['name'], timeline['role'], len(timeline['history']))
+                 for timeline in self.store.employee_timeline.values()], columns=['Name', 'Role', 'Reports']))
+            for timeline in self.paged_rows(tracking, 'tracking', 'employee_tracking',
+                                            search_columns=['Name', 'Role']).itertuples():
                 st.markdown(f"""
                 <div class="timeline-progress">
-                    <strong>{timeline['name']} ({timeline['role']})</strong>
-                    <br>📅 {weeks_tracked} report(s) tracked
+                    <strong>{timeline.Name} ({timeline.Role})</strong>
+                    <br>📅 {timeline.Reports} report(s) tracked
                 </div>
                 """, unsafe_allow_html=True)
 
+        # Static report export
+        if self.store.reports:
+            self.create_report_export()
+
+        self.create_version_history()
+        self.create_identity_resolution()
+
         # Clear data option
         st.markdown("---")
-        if st.button("🗑️ Clear All Data", help="Remove all uploaded data and start fresh"):
-            st.session_state.all_performance_data = []
-            st.session_state.file_counter = 0
-            st.session_state.employee_timeline = {}
+        if st.button("🗑️ Clear All Data", help="Remove all uploaded data for every viewer (undo brings it back)"):
+            self.shared.clear()
             st.success("All data cleared!")
             st.rerun()
 
-    def create_comprehensive_timeline_view(self):
-        """Create a comprehensive timeline view of all data"""
-        consolidated_df = self.get_consolidated_data()
+    def create_version_history(self):
+        """Undo, roll back to an earlier version or remove a single report"""
+        history = self.shared.history()
+        if len(history) < 2 and not self.store.reports:
+            return
 
-        if consolidated_df.empty:
-            st.info("📈 Upload performance reports to see timeline analysis")
+        with st.expander("🕘 Version History"):
+            for entry in reversed(history[-10:]):
+                st.caption(f"v{entry['version']} · {entry['time']:%H:%M:%S} · {entry['label']} "
+                           f"({entry['reports']} reports)")
+
+            if st.button("↩️ Undo Last Change", disabled=len(history) < 2,
+                         help=f"Return every viewer to the data before: {history[-1]['label']}"):
+                self.shared.undo()
+                st.rerun()
+
+            earlier = list(reversed(history[:-1]))
+            if earlier:
+                labels = {entry['version']: f"v{entry['version']} · {entry['label']}" for entry in earlier}
+                version = st.selectbox("Roll back to", list(labels), format_func=labels.get, key='rollback_version')
+                if st.button("⏪ Roll Back"):
+                    self.shared.rollback(version)
+                    st.rerun()
+
+            if self.store.reports:
+                file_order = st.selectbox(
+                    "Remove one report",
+                    [report['file_order'] for report in self.store.reports],
+                    format_func=lambda x: f"Report {x}",
+                    key='remove_report'
+                )
+                if st.button("➖ Remove Report"):
+                    self.shared.remove_report(file_order)
+                    st.rerun()
+
+    def create_identity_resolution(self):
+        """Suggested and manual merges of employees that are the same person"""
+        snapshot = self.shared.snapshot()
+        timeline = snapshot.employee_timeline
+        if len(timeline) < 2:
             return
 
-        st.markdown("### 📅 Comprehensive Performance Timeline")
+        candidates = snapshot.cached('identity_candidates', self.shared.identities.candidates, tuple(timeline))
+        title = f"🧬 Duplicate Employees ({len(candidates)})" if len(candidates) else "🧬 Duplicate Employees"
+        with st.expander(title):
+            if len(candidates):
+                st.dataframe(candidates.head(20), use_container_width=True, hide_index=True)
+                pair = st.selectbox(
+                    "Suggested merge",
+                    candidates.index[:20],
+                    format_func=lambda i: f"{candidates.at[i, 'Employee_ID']} ⇄ {candidates.at[i, 'Match']}",
+                    key='identity_pair'
+                )
+                if st.button("🔗 Merge Pair"):
+                    # Into whichever has the longer history
+                    first, second = candidates.at[pair, 'Employee_ID'], candidates.at[pair, 'Match']
+                    source, target = sorted((first, second), key=lambda x: len(timeline[x]['history']))
+                    self.merge_employees(source, target)
+            else:
+                st.caption("No likely duplicates found")
+
+            employee_ids = snapshot.employees_by_name()
+            source = st.selectbox("Merge", employee_ids, key='identity_source')
+            target = st.selectbox("Into", [x for x in employee_ids if x != source], key='identity_target')
+            if st.button("🔗 Merge Employees"):
+                self.merge_employees(source, target)
+
+    def merge_employees(self, source, target):
+        """Merge two employees, showing why when the merge isn't possible"""
+        try:
+            self.shared.merge_employees(source, target)
+        except (KeyError, ValueError) as e:
+            st.error(f"❌ {e.args[0] if e.args else e}")
+        else:
+            st.rerun()
 
-        # Timeline metrics by file upload
-        timeline_metrics = []
-        for i, data_item in enumerate(st.session_state.all_performance_data):
-            df = data_item['data']
-            metrics = {
-                'File_Order': data_item['file_order'],
-                'Upload_Date': data_item['upload_time'].strftime('%Y-%m-%d %H:%M'),
-                'Records': len(df),
-                'Employees': len(df['Employee_ID'].unique()),
-                'Total_Output': 0,
-                'Avg_Productivity': 0
-            }
-
-            # Calculate total output
-            output_cols = ['Videos Created', 'Designs Created', 'Scripts Produced', 'Projects Worked']
-            for col in output_cols:
-                if col in df.columns:
-                    metrics['Total_Output'] += df[col].sum()
-
-            # Calculate average productivity
-            productivity_cols = [col for col in df.columns if 'Productivity' in col]
-            all_productivity = []
-            for col in productivity_cols:
-                scores = pd.to_numeric(df[col], errors='coerce').dropna()
-                all_productivity.extend(scores.tolist())
-
-            if all_productivity:
-                metrics['Avg_Productivity'] = np.mean(all_productivity)
-
-            timeline_metrics.append(metrics)
-
-        timeline_df = pd.DataFrame(timeline_metrics)
-
-        # Create timeline visualization
-        fig = make_subplots(
-            rows=3, cols=1,
-            subplot_titles=("📊 Total Output Over Time", "⭐ Average Productivity Over Time", "👥 Team Size Over Time"),
-            vertical_spacing=0.1
-        )
+    def create_ingest_status(self):
+        """Report finished uploads once and poll the ones still in progress"""
+        jobs = self.ingest_queue.jobs(st.session_state.get('ingest_jobs', []))
+
+        for job in jobs:
+            if job['status'] == DONE:
+                st.success(f"✅ {job['message']}")
+                if job['quarantined']:
+                    st.warning(f"⚠️ {job['quarantined']} row(s) of {job['name']} failed validation and were quarantined")
+                for warning, rows in job['warnings']:
+                    st.info(f"ℹ️ {rows} row(s) of {job['name']} loaded with a warning: {warning}")
+            elif job['status'] == QUARANTINED:
+                st.warning(f"⚠️ {job['message']}")
+            elif job['status'] == DUPLICATE:
+                st.info(f"ℹ️ {job['message']}")
+            elif job['status'] == EMPTY:
+                st.error(f"❌ {job['message']}")
+            elif job['status'] == FAILED:
+                st.error(job['message'])
+
+        pending_ids = [job['id'] for job in jobs if job['status'] not in FINISHED]
+        st.session_state['ingest_jobs'] = pending_ids
+        if not pending_ids:
+            return
 
-        # Output timeline
-        fig.add_trace(
-            go.Scatter(
-                x=timeline_df['File_Order'],
-                y=timeline_df['Total_Output'],
-                mode='lines+markers',
-                name='Total Output',
-                line=dict(color='#667eea', width=3),
-                marker=dict(size=10),
-                hovertemplate="Report: %{x}<br>Output: %{y}<br>Date: %{customdata}<extra></extra>",
-                customdata=timeline_df['Upload_Date']
-            ),
-            row=1, col=1
-        )
+        @st.fragment(run_every=1)
+        def pending_uploads():
+            pending = self.ingest_queue.jobs(pending_ids)
+            if any(job['status'] in FINISHED for job in pending):
+                st.rerun()
+            for job in pending:
+                st.markdown(f"⏳ **{job['name']}**: {job['message']}…")
+
+        pending_uploads()
+
+    def create_quarantine_section(self):
+        """Rejected upload rows: review, download, fix and send back"""
+        quarantine = self.ingest_queue.quarantine
+        entries = quarantine.entries()
+        if not entries:
+            return
 
-        # Productivity timeline
-        fig.add_trace(
-            go.Scatter(
-                x=timeline_df['File_Order'],
-                y=timeline_df['Avg_Productivity'],
-                mode='lines+markers',
-                name='Avg Productivity',
-                line=dict(color='#f093fb', width=3),
-                marker=dict(size=10),
-                hovertemplate="Report: %{x}<br>Productivity: %{y:.1f}<br>Date: %{customdata}<extra></extra>",
-                customdata=timeline_df['Upload_Date']
-            ),
-            row=2, col=1
-        )
+        st.markdown(f"### 🚧 Quarantined Rows ({len(quarantine)})")
+        for entry in entries:
+            report = f"report {entry['file_order']}" if entry['file_order'] is not None else "not loaded yet"
+            with st.expander(f"{entry['name']} · {len(entry['rows'])} row(s) · {report}"):
+                rows = entry['rows']
+                shown = [col for col in ('Name', 'Role', 'Issues') if col in rows.columns]
+                st.dataframe(rows[shown], use_container_width=True)
+                st.download_button(
+                    "📥 Download Rows",
+                    data=rows.reset_index().to_csv(index=False),
+                    file_name=f"quarantine_{entry['id']}_{entry['name']}",
+                    mime="text/csv",
+                    key=f"quarantine_download_{entry['id']}"
+                )
 
-        # Team size timeline
-        fig.add_trace(
-            go.Scatter(
-                x=timeline_df['File_Order'],
-                y=timeline_df['Employees'],
-                mode='lines+markers',
-                name='Team Size',
-                line=dict(color='#4facfe', width=3),
-                marker=dict(size=10),
-                hovertemplate="Report: %{x}<br>Team Size: %{y}<br>Date: %{customdata}<extra></extra>",
-                customdata=timeline_df['Upload_Date']
-            ),
-            row=3, col=1
-        )
+                nonce = st.session_state.setdefault('quarantine_nonce', 0)
+                corrected = st.file_uploader(
+                    "Upload Corrected Rows",
+                    type=['csv'],
+                    key=f"quarantine_upload_{entry['id']}_{nonce}",
+                    help="The downloaded rows with their values fixed; the Row column must be kept"
+                )
+                if corrected is not None:
+                    try:
+                        result = quarantine.resubmit(entry['id'], pd.read_csv(corrected), self.shared)
+                    except Exception as e:
+                        st.error(f"Error processing corrections: {str(e)}")
+                    else:
+                        st.session_state['quarantine_nonce'] = nonce + 1
+                        st.session_state['quarantine_result'] = (
+                            f"{result['accepted']} row(s) accepted, {result['rejected']} still quarantined")
+                        st.rerun()
+
+                if st.button("🗑️ Discard Rows", key=f"quarantine_discard_{entry['id']}"):
+                    quarantine.discard(entry['id'])
+                    st.rerun()
 
-        fig.update_layout(
-            height=800,
-            showlegend=False,
-            font=dict(family="Inter, sans-serif"),
-            title_text="Performance Timeline Analysis",
-            title_x=0.5
-        )
+        if 'quarantine_result' in st.session_state:
+            st.success(f"✅ {st.session_state.pop('quarantine_result')}")
+
+    def create_filter_bar(self):
+        """Sidebar filters for week range, roles and employees; returns the active filters"""
+        options = self.store.filter_options()
+        filters = {}
+
+        st.markdown("### 🔎 Filters")
+
+        date_range = options['date_range']
+        if date_range is not None:
+            first, last = date_range[0].date(), date_range[1].date()
+            selected_dates = st.date_input("Week Start Date", value=(first, last), min_value=first,
+                                           max_value=last, key="filter_dates")
+            if isinstance(selected_dates, (list, tuple)) and len(selected_dates) == 2 and \
+                    tuple(selected_dates) != (first, last):
+                filters['start'], filters['end'] = selected_dates
+
+        selected_roles = st.multiselect("Roles", options['roles'], key="filter_roles")
+        if selected_roles:
+            filters['roles'] = selected_roles
+
+        search = st.text_input("Employee Search", key="filter_employee", placeholder="Name contains...")
+        if search.strip():
+            filters['employees'] = self.store.search_employees(search.strip())
+
+        return filters
+
+    def apply_filters(self, filters):
+        """Point every view at the rows matching ``filters``"""
+        self.store = self.store.view(filters)
+
+    def create_live_source_status(self):
+        """Show the live sheet's sync state, rerunning when the background sync lands a change"""
+        live = self.live
+        shown_version = self.store.version
+
+        @st.fragment(run_every=live.interval)
+        def live_status():
+            st.markdown("### 🔄 Live Source")
+            st.caption(str(live.source))
+            sync_now = st.button("Sync Now", help="Fetch changed rows from the live source now")
+
+            if sync_now:
+                live.poll(force=True)
+            if self.shared.version != shown_version:
+                st.rerun()
+
+            if live.last_error:
+                st.error(f"Last sync failed: {live.last_error}")
+            elif live.last_result:
+                result = live.last_result
+                st.caption(f"Synced {live.last_sync.strftime('%H:%M:%S')}: +{result['added_rows']} / "
+                           f"-{result['removed_rows']} rows, {result['new_reports']} new and "
+                           f"{result['updated_reports']} updated report(s)")
+
+        live_status()
+
+    def create_report_export(self):
+        """Offer a static HTML or PDF report of all reports or of one month"""
+        st.markdown("### 📄 Export Report")
+        months = self.store.cached('report_months', lambda: sorted(
+            {extent['first_week'].strftime('%Y-%m') for extent in map(self.store.report_extent, self.store.reports)
+             if extent['first_week'] is not None}, reverse=True))
+        col1, col2 = st.columns(2)
+        with col1:
+            month = st.selectbox("Period", [None] + months, key='export_period', format_func=lambda m: (
+                "All reports" if m is None else pd.Period(m, freq='M').strftime('%B %Y')))
+        with col2:
+            file_format = st.radio("Format", ["HTML", "PDF"], horizontal=True, key='export_format')
+
+        # The file is several MB, so it is only handed to the browser on the rerun that asked for it;
+        # downloading it doesn't rerun the page
+        if st.button("Prepare Report", help="Render a standalone report of the chosen period"):
+            report = self.store.cached(('report_export', month, file_format), self.build_report, month, file_format)
+            period = month.replace('-', '') if month else datetime.now().strftime('%Y%m%d')
+            st.download_button(
+                f"📥 Download {file_format} Report",
+                data=report,
+                file_name=f"performance_report_{period}.{file_format.lower()}",
+                mime="text/html" if file_format == "HTML" else "application/pdf",
+                on_click='ignore'
+            )
 
-        fig.update_xaxes(title_text="Report Number", row=3, col=1)
+    def build_report(self, month, file_format):
+        """The export file for ``month`` (None for all reports), drawing figures on the worker pool if there is one"""
+        if month is None:
+            store, aggregates = self.store, aggregates_from_snapshot(self.store)
+        else:
+            store = month_store(self.store, month)
+            aggregates = compute_aggregates(store)
+        subtitle = f"{len(store.reports)} reports · {len(store.employee_timeline)} employees"
 
-        st.plotly_chart(fig, use_container_width=True)
+        if file_format == "HTML":
+            return render_html(aggregates, report_title(month), subtitle, runner=self.shared.runner)
+        buffer = BytesIO()
+        render_pdf(aggregates, buffer, report_title(month), subtitle)
+        return buffer.getvalue()
 
-        # Timeline insights
-        if len(timeline_df) > 1:
-            latest_output = timeline_df.iloc[-1]['Total_Output']
-            previous_output = timeline_df.iloc[-2]['Total_Output']
-            output_change = ((latest_output - previous_output) / previous_output * 100) if previous_output > 0 else 0
+    def create_comprehensive_timeline_view(self):
+        """Create a comprehensive timeline view of all data"""
+        if not self.store.reports:
+            st.info("📈 Upload performance reports to see timeline analysis")
+            return
 
-            latest_productivity = timeline_df.iloc[-1]['Avg_Productivity']
-            previous_productivity = timeline_df.iloc[-2]['Avg_Productivity']
-            productivity_change = ((
-                                               latest_productivity - previous_productivity) / previous_productivity * 100) if previous_productivity > 0 else 0
+        st.markdown("### 📅 Comprehensive Performance Timeline")
 
+        # Timeline metrics by file upload
+        timeline_df = self.store.timeline_summary()
+        self.render_chart(timeline_figure(timeline_df), 'timeline')
+
+        # Timeline insights
+        trends = timeline_trends(timeline_df)
+        if trends:
             st.markdown(f"""
             <div class="insight-box">
                 <h4>📈 Latest Performance Trends</h4>
-                <p><strong>Output Change:</strong> {output_change:+.1f}% from previous report</p>
-                <p><strong>Productivity Change:</strong> {productivity_change:+.1f}% from previous report</p>
-                <p><strong>Team Growth:</strong> {timeline_df.iloc[-1]['Employees']} active employees</p>
+                <p><strong>Output Change:</strong> {trends['output_change']:+.1f}% from previous report</p>
+                <p><strong>Productivity Change:</strong> {trends['productivity_change']:+.1f}% from previous report</p>
+                <p><strong>Team Growth:</strong> {trends['active_employees']} active employees</p>
             </div>
             """, unsafe_allow_html=True)
 
@@ -530,9 +703,11 @@ class ContinuousPerformanceDashboard:
             st.warning("No historical data available for this employee")
             return
 
-        employee_info = st.session_state.employee_timeline[employee_id]
+        employee_info = self.store.employee_timeline[employee_id]
         name = employee_info['name']
         role = employee_info['role']
+        journey = employee_journey(employee_data, role)
+        output_label = journey['output_label']
 
         st.markdown(f'<h2 class="dashboard-header">📈 {name}\'s Performance Journey</h2>', unsafe_allow_html=True)
 
@@ -540,174 +715,70 @@ class ContinuousPerformanceDashboard:
         st.markdown(f"""
         <div class="employee-timeline-card">
             <h3>{name} - {role}</h3>
-            <p>📅 {len(employee_data)} reports tracked | 🕐 First report: {employee_data['Upload_Time'].min().strftime('%Y-%m-%d')}</p>
+            <p>📅 {journey['reports']} reports tracked | 🕐 First report: {journey['first_report'].strftime('%Y-%m-%d')}</p>
         </div>
         """, unsafe_allow_html=True)
 
         # Performance trends over time
-        fig = make_subplots(
-            rows=2, cols=1,
-            subplot_titles=(f"📊 {name}'s Output Trends", f"⭐ {name}'s Productivity Trends"),
-            vertical_spacing=0.15
-        )
-
-        # Determine output column based on role
-        output_col = None
-        output_label = "Output"
-
-        if role == 'Video Editor' and 'Videos Created' in employee_data.columns:
-            output_col = 'Videos Created'
-            output_label = 'Videos'
-        elif role == 'Designer' and 'Designs Created' in employee_data.columns:
-            output_col = 'Designs Created'
-            output_label = 'Designs'
-        elif role == 'Account Manager' and 'Scripts Produced' in employee_data.columns:
-            output_col = 'Scripts Produced'
-            output_label = 'Scripts'
-        elif role == 'Filmmaker' and 'Projects Worked' in employee_data.columns:
-            output_col = 'Projects Worked'
-            output_label = 'Projects'
-
-        # Plot output trends
-        if output_col and output_col in employee_data.columns:
-            fig.add_trace(
-                go.Scatter(
-                    x=employee_data['File_Order'],
-                    y=employee_data[output_col],
-                    mode='lines+markers',
-                    name=f'{output_label} Created',
-                    line=dict(color='#667eea', width=3),
-                    marker=dict(size=10),
-                    hovertemplate=f"Report: %{{x}}<br>{output_label}: %{{y}}<extra></extra>"
-                ),
-                row=1, col=1
-            )
-
-            # Add trend line
-            if len(employee_data) > 2:
-                z = np.polyfit(employee_data['File_Order'], employee_data[output_col], 1)
-                p = np.poly1d(z)
-                fig.add_trace(
-                    go.Scatter(
-                        x=employee_data['File_Order'],
-                        y=p(employee_data['File_Order']),
-                        mode='lines',
-                        name='Trend',
-                        line=dict(color='rgba(102, 126, 234, 0.5)', width=2, dash='dash'),
-                        hoverinfo='skip'
-                    ),
-                    row=1, col=1
-                )
-
-        # Plot productivity trends
-        productivity_cols = [col for col in employee_data.columns if 'Productivity' in col]
-        if productivity_cols:
-            for i, col in enumerate(productivity_cols):
-                productivity_scores = pd.to_numeric(employee_data[col], errors='coerce')
-
-                fig.add_trace(
-                    go.Scatter(
-                        x=employee_data['File_Order'],
-                        y=productivity_scores,
-                        mode='lines+markers',
-                        name=col.replace('Productivity', '').strip() or 'Productivity',
-                        line=dict(color=self.colors['primary'][i % len(self.colors['primary'])], width=3),
-                        marker=dict(size=10),
-                        hovertemplate="Report: %{x}<br>Score: %{y:.1f}<extra></extra>"
-                    ),
-                    row=2, col=1
-                )
-
-        fig.update_layout(
-            height=700,
-            font=dict(family="Inter, sans-serif"),
-            title_text=f"{name}'s Performance Timeline",
-            title_x=0.5
-        )
-
-        fig.update_xaxes(title_text="Report Number", row=1, col=1)
-        fig.update_xaxes(title_text="Report Number", row=2, col=1)
-        fig.update_yaxes(title_text=output_label, row=1, col=1)
-        fig.update_yaxes(title_text="Productivity Score", row=2, col=1)
-
-        st.plotly_chart(fig, use_container_width=True)
+        self.render_chart(journey_figure(employee_data, journey, name, self.colors), 'individual_timeline')
 
         # Performance statistics
         col1, col2, col3, col4 = st.columns(4)
 
-        # Calculate statistics
-        if output_col and output_col in employee_data.columns:
-            avg_output = employee_data[output_col].mean()
-            max_output = employee_data[output_col].max()
-
+        if journey['output_col']:
             with col1:
-                st.metric(f"Avg {output_label}", f"{avg_output:.1f}")
+                st.metric(f"Avg {output_label}", f"{journey['avg_output']:.1f}")
             with col2:
-                st.metric(f"Best Week", f"{max_output}")
+                st.metric(f"Best Week", f"{journey['max_output']}")
 
-        if productivity_cols:
-            all_productivity = []
-            for col in productivity_cols:
-                scores = pd.to_numeric(employee_data[col], errors='coerce').dropna()
-                all_productivity.extend(scores.tolist())
-
-            if all_productivity:
-                avg_productivity = np.mean(all_productivity)
-                max_productivity = np.max(all_productivity)
-
-                with col3:
-                    st.metric("Avg Productivity", f"{avg_productivity:.1f}/5")
-                with col4:
-                    perf_level, perf_text = self.get_performance_badge(avg_productivity)
-                    st.metric("Performance Level", perf_text)
+        if journey['avg_productivity'] is not None:
+            with col3:
+                st.metric("Avg Productivity", f"{journey['avg_productivity']:.1f}/5")
+            with col4:
+                perf_level, perf_text = self.get_performance_badge(journey['avg_productivity'])
+                st.metric("Performance Level", perf_text)
 
         # Improvement trends
-        if len(employee_data) > 1:
+        if journey['reports'] > 1:
             st.markdown("### 📊 Performance Analysis")
 
+            latest_trends = self.store.latest_trends()
+            if employee_id in latest_trends.index:
+                trend = latest_trends.loc[employee_id]
+                cols = st.columns(len(ROLLING_WINDOWS) + 2)
+                for col, window in zip(cols, ROLLING_WINDOWS):
+                    with col:
+                        st.metric(f"{window}-Report Avg", f"{trend[f'ma_{window}']:.2f}")
+                with cols[-2]:
+                    st.metric("EWMA Productivity", f"{trend['ewma']:.2f}")
+                with cols[-1]:
+                    st.metric("vs Own Baseline", f"{trend['zscore']:+.1f}σ" if pd.notna(trend['zscore']) else "n/a")
+
             col1, col2 = st.columns(2)
 
             with col1:
                 # Output improvement
-                if output_col and output_col in employee_data.columns:
-                    first_output = employee_data[output_col].iloc[0]
-                    last_output = employee_data[output_col].iloc[-1]
-                    output_improvement = ((last_output - first_output) / first_output * 100) if first_output > 0 else 0
-
+                improvement = journey['output_improvement']
+                if improvement:
                     st.markdown(f"""
                     <div class="insight-box">
                         <h4>📈 Output Improvement</h4>
-                        <p><strong>{output_improvement:+.1f}%</strong> change from first to latest report</p>
-                        <p>From {first_output} to {last_output} {output_label.lower()}</p>
+                        <p><strong>{improvement['change_pct']:+.1f}%</strong> change from first to latest report</p>
+                        <p>From {improvement['first']} to {improvement['last']} {output_label.lower()}</p>
                     </div>
                     """, unsafe_allow_html=True)
 
             with col2:
                 # Productivity improvement
-                if productivity_cols:
-                    first_productivity = []
-                    last_productivity = []
-
-                    for col in productivity_cols:
-                        first_score = pd.to_numeric(employee_data[col].iloc[0], errors='coerce')
-                        last_score = pd.to_numeric(employee_data[col].iloc[-1], errors='coerce')
-
-                        if pd.notna(first_score) and pd.notna(last_score):
-                            first_productivity.append(first_score)
-                            last_productivity.append(last_score)
-
-                    if first_productivity and last_productivity:
-                        first_avg = np.mean(first_productivity)
-                        last_avg = np.mean(last_productivity)
-                        productivity_improvement = ((last_avg - first_avg) / first_avg * 100) if first_avg > 0 else 0
-
-                        st.markdown(f"""
-                        <div class="insight-box">
-                            <h4>⭐ Productivity Growth</h4>
-                            <p><strong>{productivity_improvement:+.1f}%</strong> change in productivity</p>
-                            <p>From {first_avg:.1f} to {last_avg:.1f} average score</p>
-                        </div>
-                        """, unsafe_allow_html=True)
+                growth = journey['productivity_growth']
+                if growth:
+                    st.markdown(f"""
+                    <div class="insight-box">
+                        <h4>⭐ Productivity Growth</h4>
+                        <p><strong>{growth['change_pct']:+.1f}%</strong> change in productivity</p>
+                        <p>From {growth['first']:.1f} to {growth['last']:.1f} average score</p>
+                    </div>
+                    """, unsafe_allow_html=True)
 
         # Historical issues and comments
         st.markdown("### 💬 Historical Feedback")
@@ -716,49 +787,52 @@ class ContinuousPerformanceDashboard:
 
         with col1:
             st.markdown("#### ⚠️ Issues Timeline")
-            problem_cols = [col for col in employee_data.columns if 'Problems' in col]
-
-            issues_timeline = []
-            for idx, row in employee_data.iterrows():
-                for col in problem_cols:
-                    if pd.notna(row[col]) and str(row[col]).strip() and str(row[col]).strip().lower() not in ['no',
-                                                                                                              'none',
-                                                                                                              'n/a',
-                                                                                                              '']:
-                        issues_timeline.append({
-                            'Report': row['File_Order'],
-                            'Issue': str(row[col]),
-                            'Date': row['Upload_Time'].strftime('%Y-%m-%d')
-                        })
-
-            if issues_timeline:
-                for issue in issues_timeline[-5:]:  # Show last 5 issues
+            if journey['issues']:
+                for issue in journey['issues'][-5:]:  # Show last 5 issues
                     st.markdown(f"**Report {issue['Report']}** ({issue['Date']}): {issue['Issue']}")
             else:
                 st.success("🎉 No significant issues reported!")
 
         with col2:
             st.markdown("#### 💭 Comments Timeline")
-
-            if 'Other Comments' in employee_data.columns:
-                comments_timeline = []
-                for idx, row in employee_data.iterrows():
-                    if pd.notna(row['Other Comments']) and str(row['Other Comments']).strip() and str(
-                            row['Other Comments']).strip().lower() not in ['no', 'none', 'n/a', '']:
-                        comments_timeline.append({
-                            'Report': row['File_Order'],
-                            'Comment': str(row['Other Comments']),
-                            'Date': row['Upload_Time'].strftime('%Y-%m-%d')
-                        })
-
-                if comments_timeline:
-                    for comment in comments_timeline[-5:]:  # Show last 5 comments
-                        st.markdown(f"**Report {comment['Report']}** ({comment['Date']}): {comment['Comment']}")
-                else:
-                    st.info("📝 No additional comments provided")
+            if journey['comments']:
+                for comment in journey['comments'][-5:]:  # Show last 5 comments
+                    st.markdown(f"**Report {comment['Report']}** ({comment['Date']}): {comment['Comment']}")
             else:
                 st.info("📝 No additional comments provided")
 
+    def create_distribution_summary(self, metrics):
+        """Productivity bands plus medians and percentiles from the merged report histograms"""
+        with st.expander("📐 Score & Output Distribution", expanded=False):
+            bands = metrics.get('performance_distribution')
+            if bands:
+                cols = st.columns(4)
+                for col, (band, label) in zip(cols, [('excellent', "🌟 Excellent (4.5+)"), ('good', "✨ Good (3.5-4.5)"),
+                                                     ('average', "📊 Average (2.5-3.5)"),
+                                                     ('needs_improvement', "⚡ Needs Focus (<2.5)")]):
+                    with col:
+                        st.metric(label, bands[band])
+
+            table = distribution_table(self.store.distribution())
+            if not table.empty:
+                st.dataframe(table.round(2), use_container_width=True, hide_index=True)
+
+    def create_productivity_alerts(self):
+        """Employees whose latest productivity fell well below their own recent baseline"""
+        st.markdown("### 🚨 Productivity Alerts")
+        alerts = self.store.productivity_alerts()
+
+        if alerts.empty:
+            st.success(f"✅ No employee is more than {abs(ALERT_ZSCORE):.0f}σ below their own "
+                       f"{BASELINE_WINDOW}-report baseline in the latest report")
+            return
+
+        st.warning(f"⚠️ {len(alerts)} employee(s) down {abs(ALERT_ZSCORE):.0f}σ or more vs their own "
+                   f"{BASELINE_WINDOW}-report baseline")
+        display_alerts = alerts.round({'Latest': 2, 'Baseline': 2, 'Z_Score': 1, 'Change': 2})
+        display_alerts.columns = ['Employee', 'Latest Score', f'{BASELINE_WINDOW}-Report Baseline', 'Z-Score', 'Change']
+        st.dataframe(display_alerts, use_container_width=True, hide_index=True)
+
     def create_enhanced_kpi_cards(self, metrics, period="All Time"):
         """Create beautiful KPI cards with enhanced styling"""
         st.markdown(f'<h2 class="dashboard-header">📊 {period} Performance Overview</h2>', unsafe_allow_html=True)
@@ -766,293 +840,184 @@ class ContinuousPerformanceDashboard:
         # Main metrics row
         cols = st.columns(4)
 
-        with cols[0]:
-            if 'total_videos' in metrics:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <h3>🎬 Total Videos</h3>
-                    <h1>{int(metrics['total_videos'])}</h1>
-                    <p>Average: {metrics.get('avg_videos', 0):.1f} per report</p>
-                </div>
-                """, unsafe_allow_html=True)
-
-        with cols[1]:
-            if 'total_designs' in metrics:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <h3>🎨 Total Designs</h3>
-                    <h1>{int(metrics['total_designs'])}</h1>
-                    <p>Average: {metrics.get('avg_designs', 0):.1f} per report</p>
-                </div>
-                """, unsafe_allow_html=True)
-
-        with cols[2]:
-            if 'total_scripts' in metrics:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <h3>📝 Total Scripts</h3>
-                    <h1>{int(metrics['total_scripts'])}</h1>
-                    <p>Average: {metrics.get('avg_scripts', 0):.1f} per report</p>
-                </div>
-                """, unsafe_allow_html=True)
-
-        with cols[3]:
-            if 'avg_productivity' in metrics:
-                perf_level, perf_text = self.get_performance_badge(metrics['avg_productivity'])
-                st.markdown(f"""
-                <div class="metric-card">
-                    <h3>⭐ Avg Productivity</h3>
-                    <h1>{metrics['avg_productivity']:.1f}/5</h1>
-                    <p>{perf_text}</p>
-                </div>
-                """, unsafe_allow_html=True)
-
-    def calculate_enhanced_metrics(self, df, role=None):
-        """Enhanced metrics calculation with productivity analysis"""
-        if df.empty:
-            return {}
-
-        if role:
-            df_role = df[df['Role'] == role]
-        else:
-            df_role = df
-
-        metrics = {}
-
-        # Output metrics by role
-        if role == 'Video Editor' or not role:
-            if 'Videos Created' in df_role.columns:
-                metrics['avg_videos'] = df_role['Videos Created'].mean()
-                metrics['total_videos'] = df_role['Videos Created'].sum()
-                metrics['max_videos'] = df_role['Videos Created'].max()
-                metrics['min_videos'] = df_role['Videos Created'].min()
-
-        if role == 'Designer' or not role:
-            if 'Designs Created' in df_role.columns:
-                metrics['avg_designs'] = df_role['Designs Created'].mean()
-                metrics['total_designs'] = df_role['Designs Created'].sum()
-                metrics['max_designs'] = df_role['Designs Created'].max()
-                metrics['min_designs'] = df_role['Designs Created'].min()
-
-        if role == 'Account Manager' or not role:
-            if 'Scripts Produced' in df_role.columns:
-                metrics['avg_scripts'] = df_role['Scripts Produced'].mean()
-                metrics['total_scripts'] = df_role['Scripts Produced'].sum()
-            if 'Posts Published' in df_role.columns:
-                metrics['avg_posts'] = df_role['Posts Published'].mean()
-                metrics['total_posts'] = df_role['Posts Published'].sum()
-            if 'Client Meetings' in df_role.columns:
-                metrics['avg_meetings'] = df_role['Client Meetings'].mean()
-                metrics['total_meetings'] = df_role['Client Meetings'].sum()
-
-        if role == 'Filmmaker' or not role:
-            if 'Projects Worked' in df_role.columns:
-                metrics['avg_projects'] = df_role['Projects Worked'].mean()
-                metrics['total_projects'] = df_role['Projects Worked'].sum()
-
-        # Enhanced productivity analysis
-        productivity_cols = [col for col in df_role.columns if 'Productivity' in col]
-        if productivity_cols:
-            all_productivity = []
-            for col in productivity_cols:
-                scores = pd.to_numeric(df_role[col], errors='coerce').dropna()
-                all_productivity.extend(scores.tolist())
-
-            if all_productivity:
-                metrics['avg_productivity'] = np.mean(all_productivity)
-                metrics['productivity_std'] = np.std(all_productivity)
-                metrics['productivity_min'] = np.min(all_productivity)
-                metrics['productivity_max'] = np.max(all_productivity)
-
-                # Performance distribution
-                excellent = sum(1 for x in all_productivity if x >= 4.5)
-                good = sum(1 for x in all_productivity if 3.5 <= x < 4.5)
-                average = sum(1 for x in all_productivity if 2.5 <= x < 3.5)
-                needs_improvement = sum(1 for x in all_productivity if x < 2.5)
-
-                metrics['performance_distribution'] = {
-                    'excellent': excellent,
-                    'good': good,
-                    'average': average,
-                    'needs_improvement': needs_improvement
-                }
-
-        return metrics
+        for col, card in zip(cols, kpi_cards(metrics)):
+            if card:
+                with col:
+                    st.markdown(f"""
+                    <div class="metric-card">
+                        <h3>{card['title']}</h3>
+                        <h1>{card['value']}</h1>
+                        <p>{card['caption']}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
 
     def create_employee_comparison_heatmap(self):
         """Create a heatmap showing employee performance across all reports"""
-        consolidated_df = self.get_consolidated_data()
-
-        if consolidated_df.empty:
+        if not self.store.reports:
             return
 
         st.markdown("### 🔥 Employee Performance Heatmap")
 
-        # Create performance matrix
-        performance_matrix = []
-
-        for employee_id in consolidated_df['Employee_ID'].unique():
-            employee_data = consolidated_df[consolidated_df['Employee_ID'] == employee_id]
-            employee_performance = []
+        employee_names, file_orders, performance_data = self.build_heatmap_matrix()
 
-            # Get performance for each report
-            for file_order in sorted(consolidated_df['File_Order'].unique()):
-                file_data = employee_data[employee_data['File_Order'] == file_order]
+        if employee_names:
+            self.render_chart(heatmap_figure(employee_names, file_orders, performance_data), 'heatmap')
 
-                if not file_data.empty:
-                    # Calculate average productivity for this report
-                    productivity_cols = [col for col in file_data.columns if 'Productivity' in col]
-                    avg_productivity = 0
+    def create_client_analytics(self):
+        """Workload, concentration and churn per client named in the reports"""
+        workload = self.store.client_workload()
 
-                    if productivity_cols:
-                        all_scores = []
-                        for col in productivity_cols:
-                            scores = pd.to_numeric(file_data[col], errors='coerce').dropna()
-                            all_scores.extend(scores.tolist())
+        if workload.empty:
+            st.info("🤝 No client names found in the uploaded reports")
+            return
 
-                        if all_scores:
-                            avg_productivity = np.mean(all_scores)
+        st.markdown("### 🤝 Client Workload")
+        churn = self.store.client_churn()
+        latest = churn.iloc[-1]
 
-                    employee_performance.append(avg_productivity)
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Clients", len(workload))
+        with col2:
+            st.metric("Active in Latest Report", int(latest['Active']))
+        with col3:
+            st.metric("New in Latest Report", int(latest['New']))
+        with col4:
+            st.metric("Lost in Latest Report", int(latest['Lost']))
+
+        self.render_chart(client_workload_figure(workload, self.colors), 'client_workload')
+        if len(churn) > 1:
+            self.render_chart(client_churn_figure(churn, self.colors), 'client_churn')
+
+        st.markdown("#### 🎯 Team Concentration")
+        st.markdown("*Share of each client's employee-weeks carried by its most involved employee*")
+        display_workload = workload[['Client', 'Employee_Weeks', 'Workload_Share', 'Employees', 'Reports',
+                                     'Top_Employee', 'Top_Employee_Share', 'Concentration']].copy()
+        display_workload['Workload_Share'] = (display_workload['Workload_Share'] * 100).round(1)
+        display_workload['Top_Employee_Share'] = (display_workload['Top_Employee_Share'] * 100).round(1)
+        display_workload['Concentration'] = display_workload['Concentration'].round(2)
+        display_workload.columns = ['Client', 'Employee-Weeks', 'Workload %', 'Employees', 'Reports',
+                                    'Top Employee', 'Top Employee %', 'Concentration (HHI)']
+        st.dataframe(display_workload, use_container_width=True, hide_index=True)
+
+    def create_team_rollups(self):
+        """Company -> team -> employee drill-down, each level read from its own rollup table"""
+        st.markdown("### 👥 Team Rollups")
+        teams = self.store.teams
+
+        with st.expander("📋 Team Membership", expanded=teams is None):
+            if teams is not None:
+                st.caption(f"{len(teams.teams)} team(s), {len(teams)} member(s) listed")
+            nonce = st.session_state.setdefault('team_upload_nonce', 0)
+            membership = st.file_uploader("Upload team membership CSV (Team, Name and optionally Role)",
+                                          type=['csv'], key=f"team_upload_{nonce}")
+            if membership is not None:
+                try:
+                    self.shared.set_teams(TeamMap.from_csv(membership))
+                except ValueError as e:
+                    st.error(f"❌ {e}")
                 else:
-                    employee_performance.append(0)  # No data for this report
-
-            performance_matrix.append({
-                'Employee': employee_id,
-                'Performance': employee_performance
-            })
-
-        # Create heatmap data
-        if performance_matrix:
-            employee_names = [item['Employee'] for item in performance_matrix]
-            performance_data = [item['Performance'] for item in performance_matrix]
-            file_orders = sorted(consolidated_df['File_Order'].unique())
-
-            # Pad performance data to same length
-            max_reports = len(file_orders)
-            for i, perf in enumerate(performance_data):
-                while len(perf) < max_reports:
-                    perf.append(0)
-
-            fig = go.Figure(data=go.Heatmap(
-                z=performance_data,
-                x=[f'Report {i}' for i in file_orders],
-                y=employee_names,
-                colorscale='RdYlBu_r',
-                zmid=3,  # Middle value for color scale
-                zmin=1,
-                zmax=5,
-                colorbar=dict(title="Productivity Score"),
-                hoverongaps=False,
-                hovertemplate="Employee: %{y}<br>Report: %{x}<br>Score: %{z:.1f}<extra></extra>"
-            ))
-
-            fig.update_layout(
-                title="Employee Productivity Heatmap Across All Reports",
-                height=max(400, len(employee_names) * 30),
-                font=dict(family="Inter, sans-serif")
-            )
+                    st.session_state['team_upload_nonce'] = nonce + 1
+                    st.rerun()
+
+        if teams is None:
+            st.info("👥 Upload a team membership to roll employees up into teams")
+            return
+
+        period = st.radio("Period", ['week', 'month'], format_func=lambda x: f"{x.title()}ly", horizontal=True,
+                          key='team_period')
+        team_table = self.store.team_table(period)
+        if team_table.empty:
+            st.info("👥 No reports in the current view")
+            return
+
+        # Company level
+        company = self.store.company_table(period)
+        latest = company.iloc[-1]
+        previous = company.iloc[-2] if len(company) > 1 else None
+        st.markdown(f"#### 🏢 Company · {latest['Period']:%Y-%m-%d}")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Output", f"{latest['Output']:.0f}",
+                      delta=f"{latest['Output'] - previous['Output']:+.0f}" if previous is not None else None)
+        with col2:
+            st.metric("Avg Productivity", f"{latest['Avg_Productivity']:.1f}/5",
+                      delta=f"{latest['Avg_Productivity'] - previous['Avg_Productivity']:+.1f}"
+                      if previous is not None else None)
+        with col3:
+            st.metric("Issues Raised", int(latest['Issues']))
+        with col4:
+            st.metric("Teams", int(latest['Teams']))
+        self.render_chart(team_output_figure(team_table, self.colors), 'team_output')
+
+        # Team level
+        leaders = self.store.team_leaders()
+        team = st.selectbox("🔍 Select Team", sorted(team_table['Team'].unique()), key='team_select',
+                            format_func=lambda x: f"{x} (led by {leaders[x]})" if x in leaders else x)
+        rows = team_table[team_table['Team'] == team]
+        st.markdown(f"#### 👥 {team}")
+        if team in leaders:
+            st.caption(f"Team Leader output for {leaders[team]}: {rows['Output'].sum():.0f} from the team "
+                       f"across {len(rows)} {period}(s)")
+        st.dataframe(team_rollup_table(rows.sort_values('Period', ascending=False)), use_container_width=True,
+                     hide_index=True)
+
+        # Employee level
+        st.markdown("#### 👤 Team Members")
+        members = self.store.team_members(team, period)
+        rows = self.paged_rows(members, 'team_members', ('team_members', team, period),
+                               sort_columns={'Period': 'Period', 'Name': 'Name', 'Output': 'Output',
+                                             'Avg_Productivity': 'Avg Productivity', 'Issues': 'Issues'},
+                               search_columns=['Name', 'Role'], descending=True)
+        st.dataframe(team_rollup_table(rows, ['Name', 'Role']), use_container_width=True, hide_index=True)
+
+    def create_output_forecast(self):
+        """Output forecasts per role and per employee, with the headcount they imply"""
+        panel = self.store.output_panel()
+        if ROLE_LEVEL not in panel.index.get_level_values('Level'):
+            st.info("🔮 No output columns found in the uploaded reports")
+            return
 
-            st.plotly_chart(fig, use_container_width=True)
+        st.markdown("### 🔮 Output Forecast")
+        st.markdown(f"*Holt-Winters level, trend and {SEASON_LENGTH}-week season fitted per series, "
+                    "with a 95% band*")
+        horizon = st.slider("Weeks ahead", 2, 16, FORECAST_HORIZON, key='forecast_horizon')
+        forecasts = self.store.forecasts(horizon)
+
+        st.markdown("#### 📋 Capacity Plan")
+        st.markdown("*Implied headcount: people needed for the forecast at the recent output per employee*")
+        st.dataframe(capacity_plan_table(self.store.capacity(horizon)), use_container_width=True, hide_index=True)
+
+        role = st.selectbox("🔍 Select Role", list(panel.loc[ROLE_LEVEL].index), key='forecast_role')
+        key = (ROLE_LEVEL, role)
+        self.render_chart(forecast_figure(panel.loc[key], forecasts['forecast'].loc[key], forecasts['lower'].loc[key],
+                                          forecasts['upper'].loc[key], f"🔮 {role} Output", self.colors),
+                          'forecast_role')
+
+        timeline = self.store.employee_timeline
+        employees = [employee_id for employee_id in self.store.employees_by_name()
+                     if timeline[employee_id]['role'] == role and (EMPLOYEE_LEVEL, employee_id) in panel.index]
+        if employees:
+            employee_id = st.selectbox("🔍 Select Employee", employees, key='forecast_employee',
+                                       format_func=lambda x: timeline[x]['name'])
+            key = (EMPLOYEE_LEVEL, employee_id)
+            self.render_chart(forecast_figure(panel.loc[key], forecasts['forecast'].loc[key],
+                                              forecasts['lower'].loc[key], forecasts['upper'].loc[key],
+                                              f"🔮 {timeline[employee_id]['name']} Output", self.colors),
+                              'forecast_employee')
 
     def create_long_term_rankings(self):
         """Create comprehensive long-term performance rankings"""
-        consolidated_df = self.get_consolidated_data()
-
-        if consolidated_df.empty:
+        if not self.store.reports:
             st.info("Upload performance data to view long-term rankings")
             return
 
         st.markdown("### 🏆 Long-term Performance Rankings")
         st.markdown("*Based on all uploaded reports*")
 
-        # Calculate comprehensive rankings
-        employee_rankings = []
-
-        for employee_id in consolidated_df['Employee_ID'].unique():
-            employee_data = consolidated_df[consolidated_df['Employee_ID'] == employee_id]
-            employee_info = st.session_state.employee_timeline[employee_id]
-
-            # Calculate metrics
-            total_reports = len(employee_data)
-
-            # Total output
-            total_output = 0
-            role = employee_info['role']
-
-            if role == 'Video Editor' and 'Videos Created' in employee_data.columns:
-                total_output = employee_data['Videos Created'].sum()
-            elif role == 'Designer' and 'Designs Created' in employee_data.columns:
-                total_output = employee_data['Designs Created'].sum()
-            elif role == 'Account Manager' and 'Scripts Produced' in employee_data.columns:
-                total_output = employee_data['Scripts Produced'].sum()
-            elif role == 'Filmmaker' and 'Projects Worked' in employee_data.columns:
-                total_output = employee_data['Projects Worked'].sum()
-
-            # Average productivity
-            productivity_cols = [col for col in employee_data.columns if 'Productivity' in col]
-            avg_productivity = 0
-            productivity_consistency = 0
-
-            if productivity_cols:
-                all_scores = []
-                for col in productivity_cols:
-                    scores = pd.to_numeric(employee_data[col], errors='coerce').dropna()
-                    all_scores.extend(scores.tolist())
-
-                if all_scores:
-                    avg_productivity = np.mean(all_scores)
-                    productivity_consistency = 1 / (np.std(all_scores) + 0.1)  # Higher = more consistent
-
-            # Improvement trend (if multiple reports)
-            improvement_score = 0
-            if total_reports > 1 and productivity_cols:
-                first_productivity = []
-                last_productivity = []
-
-                first_report = employee_data[employee_data['File_Order'] == employee_data['File_Order'].min()]
-                last_report = employee_data[employee_data['File_Order'] == employee_data['File_Order'].max()]
-
-                for col in productivity_cols:
-                    if col in first_report.columns and col in last_report.columns:
-                        first_score = pd.to_numeric(first_report[col].iloc[0], errors='coerce')
-                        last_score = pd.to_numeric(last_report[col].iloc[0], errors='coerce')
-
-                        if pd.notna(first_score) and pd.notna(last_score):
-                            first_productivity.append(first_score)
-                            last_productivity.append(last_score)
-
-                if first_productivity and last_productivity:
-                    first_avg = np.mean(first_productivity)
-                    last_avg = np.mean(last_productivity)
-                    improvement_score = (last_avg - first_avg) * 10  # Scale for ranking
-
-            # Comprehensive score
-            comprehensive_score = (
-                    (total_output * 0.3) +
-                    (avg_productivity * 20 * 0.4) +
-                    (productivity_consistency * 10 * 0.2) +
-                    (improvement_score * 0.1)
-            )
-
-            employee_rankings.append({
-                'Employee_ID': employee_id,
-                'Name': employee_info['name'],
-                'Role': role,
-                'Total_Reports': total_reports,
-                'Total_Output': total_output,
-                'Avg_Productivity': avg_productivity,
-                'Consistency_Score': productivity_consistency,
-                'Improvement_Score': improvement_score,
-                'Comprehensive_Score': comprehensive_score
-            })
-
-        rankings_df = pd.DataFrame(employee_rankings)
+        rankings_df = self.compute_long_term_rankings()
 
         if not rankings_df.empty:
-            rankings_df = rankings_df.sort_values('Comprehensive_Score', ascending=False).reset_index(drop=True)
-            rankings_df['Rank'] = range(1, len(rankings_df) + 1)
-
             # Top performer spotlight
             top_performer = rankings_df.iloc[0]
             st.markdown(f"""
@@ -1068,63 +1033,36 @@ class ContinuousPerformanceDashboard:
             """, unsafe_allow_html=True)
 
             # Rankings visualization
-            fig = px.bar(
-                rankings_df.head(10),
-                x='Comprehensive_Score',
-                y='Name',
-                color='Role',
-                orientation='h',
-                title="🏆 Top 10 Long-term Performers",
-                color_discrete_sequence=self.colors['primary'],
-                hover_data=['Total_Output', 'Avg_Productivity', 'Total_Reports']
-            )
-
-            fig.update_layout(
-                height=600,
-                font=dict(family="Inter, sans-serif"),
-                yaxis={'categoryorder': 'total ascending'}
-            )
-
-            st.plotly_chart(fig, use_container_width=True)
+            self.render_chart(rankings_figure(rankings_df, self.colors), 'rankings')
 
             # Detailed rankings table
             st.markdown("#### 📊 Complete Long-term Rankings")
+            rows = self.paged_rows(rankings_df, 'rankings', 'rankings',
+                                   sort_columns={'Rank': 'Rank', 'Name': 'Employee', 'Role': 'Role',
+                                                 'Total_Reports': 'Reports', 'Total_Output': 'Output',
+                                                 'Avg_Productivity': 'Avg Productivity'},
+                                   search_columns=['Name', 'Role'])
+            st.dataframe(rankings_table(rows), use_container_width=True, hide_index=True)
 
-            display_rankings = rankings_df[['Rank', 'Name', 'Role', 'Total_Reports', 'Total_Output', 'Avg_Productivity',
-                                            'Comprehensive_Score']].copy()
-            display_rankings['Avg_Productivity'] = display_rankings['Avg_Productivity'].round(2)
-            display_rankings['Comprehensive_Score'] = display_rankings['Comprehensive_Score'].round(1)
 
-            # Add medals
-            display_rankings['Medal'] = display_rankings['Rank'].apply(
-                lambda x: '🥇' if x == 1 else '🥈' if x == 2 else '🥉' if x == 3 else ''
-            )
-
-            display_rankings = display_rankings[
-                ['Rank', 'Medal', 'Name', 'Role', 'Total_Reports', 'Total_Output', 'Avg_Productivity',
-                 'Comprehensive_Score']]
-            display_rankings.columns = ['Rank', 'Medal', 'Employee', 'Role', 'Reports', 'Output', 'Avg Productivity',
-                                        'Score']
-
-            st.dataframe(display_rankings, use_container_width=True, hide_index=True)
-
-
-def main():
+def render_dashboard(dashboard):
     st.markdown('<h1 class="dashboard-header">🚀 Continuous Performance Analytics Dashboard</h1>',
                 unsafe_allow_html=True)
     st.markdown("---")
 
-    dashboard = ContinuousPerformanceDashboard()
-
     # Enhanced sidebar with continuous data management
     with st.sidebar:
         dashboard.create_data_management_section()
+        filters = dashboard.create_filter_bar() if dashboard.store.reports else {}
 
-    # Get consolidated data
-    consolidated_df = dashboard.get_consolidated_data()
+    dashboard.apply_filters(filters)
 
     # Main content area
-    if consolidated_df.empty:
+    if not dashboard.store.reports and filters:
+        st.warning("🔎 No records match the current filters")
+        return
+
+    if not dashboard.store.reports:
         st.markdown("""
         <div style="text-align: center; padding: 3rem; background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); 
                     color: white; border-radius: 15px; margin: 2rem 0;">
@@ -1148,54 +1086,60 @@ def main():
 
     # Enhanced view selection
     view_tabs = st.tabs(
-        ["📊 Overview", "📈 Timeline Analysis", "👤 Individual Journey", "🔥 Performance Heatmap", "🏆 Long-term Rankings"])
+        ["📊 Overview", "📈 Timeline Analysis", "👤 Individual Journey", "🔥 Performance Heatmap", "🏆 Long-term Rankings",
+         "🤝 Clients", "👥 Teams", "🔮 Forecast"])
 
-    with view_tabs[0]:  # Overview
-        metrics = dashboard.calculate_enhanced_metrics(consolidated_df)
-        dashboard.create_enhanced_kpi_cards(metrics, f"All Time ({st.session_state.file_counter} reports)")
+    with view_tabs[0], profile_section('tab:Overview', kind="tab"):  # Overview
+        metrics = dashboard.get_overall_metrics()
+        period = f"Filtered ({len(dashboard.store.reports)} reports)" if filters \
+            else f"All Time ({len(dashboard.store.reports)} reports)"
+        dashboard.create_enhanced_kpi_cards(metrics, period)
+        dashboard.create_distribution_summary(metrics)
 
         st.markdown("---")
 
         # Latest vs First comparison
-        if len(st.session_state.all_performance_data) > 1:
-            first_data = st.session_state.all_performance_data[0]['data']
-            latest_data = st.session_state.all_performance_data[-1]['data']
+        if len(dashboard.store.reports) > 1:
+            first_report = dashboard.store.reports[0]
+            latest_report = dashboard.store.reports[-1]
+            first_size = len(dashboard.store.report_employees(first_report))
+            latest_size = len(dashboard.store.report_employees(latest_report))
 
             col1, col2 = st.columns(2)
 
             with col1:
                 st.markdown("#### 📅 First Report Summary")
-                first_metrics = dashboard.calculate_enhanced_metrics(first_data)
+                first_metrics = dashboard.get_report_metrics(first_report)
                 if 'avg_productivity' in first_metrics:
                     st.metric("Team Productivity", f"{first_metrics['avg_productivity']:.1f}/5")
-                st.metric("Team Size", len(first_data['Employee_ID'].unique()))
+                st.metric("Team Size", first_size)
 
             with col2:
                 st.markdown("#### 📅 Latest Report Summary")
-                latest_metrics = dashboard.calculate_enhanced_metrics(latest_data)
+                latest_metrics = dashboard.get_report_metrics(latest_report)
                 if 'avg_productivity' in latest_metrics and 'avg_productivity' in first_metrics:
                     productivity_change = latest_metrics['avg_productivity'] - first_metrics['avg_productivity']
                     st.metric("Team Productivity", f"{latest_metrics['avg_productivity']:.1f}/5",
                               delta=f"{productivity_change:+.1f}")
 
-                size_change = len(latest_data['Employee_ID'].unique()) - len(first_data['Employee_ID'].unique())
-                st.metric("Team Size", len(latest_data['Employee_ID'].unique()), delta=f"{size_change:+d}")
+                st.metric("Team Size", latest_size, delta=f"{latest_size - first_size:+d}")
 
-    with view_tabs[1]:  # Timeline Analysis
+        dashboard.create_productivity_alerts()
+
+    with view_tabs[1], profile_section('tab:Timeline Analysis', kind="tab"):  # Timeline Analysis
         dashboard.create_comprehensive_timeline_view()
 
-    with view_tabs[2]:  # Individual Journey
-        available_employees = list(st.session_state.employee_timeline.keys())
+    with view_tabs[2], profile_section('tab:Individual Journey', kind="tab"):  # Individual Journey
+        # Sort employees by name for better UX
+        available_employees = dashboard.store.employees_by_name()
+        employee_timeline = dashboard.store.employee_timeline
 
         if available_employees:
-            # Sort employees by name for better UX
-            available_employees.sort(key=lambda x: st.session_state.employee_timeline[x]['name'])
-
             selected_employee = st.selectbox(
                 "🔍 Select Employee for Journey Analysis",
                 available_employees,
                 format_func=lambda
-                    x: f"{st.session_state.employee_timeline[x]['name']} ({st.session_state.employee_timeline[x]['role']}) - {len(st.session_state.employee_timeline[x]['history'])} reports"
+                    x: f"{employee_timeline[x]['name']} ({employee_timeline[x]['role']}) - {len(employee_timeline[x]['history'])} reports"
             )
 
             if selected_employee:
@@ -1203,12 +1147,21 @@ def main():
         else:
             st.info("👤 Upload performance data to view individual employee journeys")
 
-    with view_tabs[3]:  # Performance Heatmap
+    with view_tabs[3], profile_section('tab:Performance Heatmap', kind="tab"):  # Performance Heatmap
         dashboard.create_employee_comparison_heatmap()
 
-    with view_tabs[4]:  # Long-term Rankings
+    with view_tabs[4], profile_section('tab:Long-term Rankings', kind="tab"):  # Long-term Rankings
         dashboard.create_long_term_rankings()
 
+    with view_tabs[5], profile_section('tab:Clients', kind="tab"):  # Clients
+        dashboard.create_client_analytics()
+
+    with view_tabs[6], profile_section('tab:Teams', kind="tab"):  # Teams
+        dashboard.create_team_rollups()
+
+    with view_tabs[7], profile_section('tab:Forecast', kind="tab"):  # Forecast
+        dashboard.create_output_forecast()
+
     # Footer
     st.markdown("---")
     st.markdown("""
@@ -1220,5 +1173,18 @@ def main():
     """, unsafe_allow_html=True)
 
 
+def main():
+    dashboard = ContinuousPerformanceDashboard()
+
+    # Opt-in instrumentation (?profile=1 or DASHBOARD_PROFILE=1)
+    profiler = RerunProfiler() if is_profiling_requested(st.query_params) else None
+
+    with profiling_session(profiler):
+        render_dashboard(dashboard)
+
+    if profiler is not None:
+        dashboard.create_profiling_panel(profiler)
+
+
 if __name__ == "__main__":
     main()
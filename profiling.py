@@ -0,0 +1,197 @@
+"""Opt-in per-rerun instrumentation for the performance dashboard.
+
+Enable with the ``?profile=1`` query parameter or ``DASHBOARD_PROFILE=1``.
+When no profiler is active every hook below is a single context lookup.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from performance_analytics.spans import active_profiler, attach_profiler, detach_profiler
+
+PROFILE_ENV_VAR = 'DASHBOARD_PROFILE'
+PROFILE_QUERY_PARAM = 'profile'
+MAX_STORED_TRACES = 50
+
+_hooks_lock = threading.Lock()
+_hooks_installed = False
+
+
+def _is_truthy(value):
+    if isinstance(value, (list, tuple)):
+        value = value[0] if value else ''
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def is_profiling_requested(query_params=None):
+    """Check the environment variable and the page query params"""
+    if _is_truthy(os.environ.get(PROFILE_ENV_VAR, '')):
+        return True
+    if query_params is not None:
+        return _is_truthy(query_params.get(PROFILE_QUERY_PARAM, ''))
+    return False
+
+
+class RerunProfiler:
+    """Collects timings, counters and figure sizes for a single rerun"""
+
+    def __init__(self, label="rerun"):
+        self.label = label
+        self.started_at = datetime.now()
+        self.spans = []
+        self.counters = Counter()
+        self.figures = []
+        self._origin = time.perf_counter()
+        self._stack = []
+        self.total_ms = None
+
+    @contextmanager
+    def span(self, name, kind="section"):
+        """Time a block of code, recording its nesting depth"""
+        start = time.perf_counter()
+        parent = self._stack[-1] if self._stack else None
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            end = time.perf_counter()
+            self.spans.append({
+                'name': name,
+                'kind': kind,
+                'parent': parent,
+                'depth': len(self._stack),
+                'start_ms': (start - self._origin) * 1000,
+                'duration_ms': (end - start) * 1000
+            })
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def record_figure(self, name, fig):
+        """Serialize a Plotly figure once to measure its payload"""
+        start = time.perf_counter()
+        payload = fig.to_json()
+        self.figures.append({
+            'name': name,
+            'bytes': len(payload.encode('utf-8')),
+            'traces': len(fig.data),
+            'serialize_ms': (time.perf_counter() - start) * 1000
+        })
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self._origin) * 1000
+
+    def summary(self):
+        """Aggregate spans by name into a per-rerun breakdown table"""
+        if not self.spans:
+            return pd.DataFrame(columns=['Name', 'Kind', 'Calls', 'Total ms', 'Mean ms', 'Max ms'])
+
+        spans_df = pd.DataFrame(self.spans)
+        summary = spans_df.groupby(['name', 'kind'], sort=False)['duration_ms'].agg(
+            ['count', 'sum', 'mean', 'max']).reset_index()
+        summary.columns = ['Name', 'Kind', 'Calls', 'Total ms', 'Mean ms', 'Max ms']
+        return summary.sort_values('Total ms', ascending=False).reset_index(drop=True)
+
+    def to_dict(self):
+        return {
+            'label': self.label,
+            'started_at': self.started_at.isoformat(),
+            'total_ms': self.total_ms,
+            'spans': self.spans,
+            'counters': dict(self.counters),
+            'figures': self.figures
+        }
+
+
+def _counting(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = active_profiler()
+        if profiler is not None:
+            profiler.count(name)
+        return func(*args, **kwargs)
+
+    wrapper.__wrapped_for_profiling__ = True
+    return wrapper
+
+
+def _install_pandas_hooks():
+    """Wrap pd.concat and DataFrame.copy so reruns can count them.
+
+    The wrappers stay installed for the life of the process; they only count
+    when the calling thread has an active profiler.
+    """
+    global _hooks_installed
+    with _hooks_lock:
+        if _hooks_installed:
+            return
+        if not getattr(pd.concat, '__wrapped_for_profiling__', False):
+            pd.concat = _counting('pd.concat', pd.concat)
+        if not getattr(pd.DataFrame.copy, '__wrapped_for_profiling__', False):
+            pd.DataFrame.copy = _counting('DataFrame.copy', pd.DataFrame.copy)
+        _hooks_installed = True
+
+
+@contextmanager
+def profiling_session(profiler):
+    """Attach a profiler to the current script run (no-op for None)"""
+    if profiler is None:
+        yield None
+        return
+
+    _install_pandas_hooks()
+    token = attach_profiler(profiler)
+    try:
+        yield profiler
+    finally:
+        profiler.finish()
+        detach_profiler(token)
+
+
+def profiled(func):
+    """Decorator timing a method under its qualified name"""
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = active_profiler()
+        if profiler is None:
+            return func(*args, **kwargs)
+        with profiler.span(name, kind="method"):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def profile_methods(cls):
+    """Class decorator applying ``profiled`` to every public method"""
+    for attr_name, attr in list(vars(cls).items()):
+        if attr_name.startswith('_') or not callable(attr):
+            continue
+        setattr(cls, attr_name, profiled(attr))
+    return cls
+
+
+def record_figure(name, fig):
+    profiler = active_profiler()
+    if profiler is not None:
+        profiler.record_figure(name, fig)
+
+
+def store_trace(traces, profiler):
+    """Append a finished rerun to a bounded trace list"""
+    traces.append(profiler.to_dict())
+    del traces[:-MAX_STORED_TRACES]
+    return traces
+
+
+def traces_to_json(traces):
+    return json.dumps({'traces': traces}, indent=2, default=str)